@@ -13,3 +13,6 @@ VIEWS_DIR = QUERIES_DIR / "views"
 PROJECT_DIR = MODULE_DIR.parent.resolve()
 DB_FILE = PROJECT_DIR / "serie_a.db"
 EXPORTS_DIR = PROJECT_DIR / "exports"
+HTTP_CACHE_DIR = PROJECT_DIR / ".http_cache"
+PAGE_ARCHIVE_DIR = PROJECT_DIR / ".page_archive"
+RECOVERY_DIR = PROJECT_DIR / ".recovery"
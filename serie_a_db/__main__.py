@@ -3,12 +3,24 @@
 import logging
 import sys
 from argparse import ArgumentParser, Namespace
+from pathlib import Path
 
-from serie_a_db import CONFIG_FILE
+from serie_a_db import CONFIG_FILE, PAGE_ARCHIVE_DIR
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
+from serie_a_db.data_extraction.clients.recording import (
+    Recording,
+    RecordingTransport,
+    ReplayTransport,
+)
+from serie_a_db.data_extraction.clients.transport import (
+    get_default_transport,
+    set_default_transport,
+)
 from serie_a_db.db.client import Db
 from serie_a_db.db.export import export_views_to_csv
-from serie_a_db.db.schema import TABLES
-from serie_a_db.db.update import DbUpdater
+from serie_a_db.db.reparse import reparse_from_archive
+from serie_a_db.db.schema import ARCHIVE_PARSERS, TABLES
+from serie_a_db.db.update import CommitPolicy, DbUpdater
 from serie_a_db.utils import read_yaml
 
 LOGGER = logging.getLogger(__name__)
@@ -18,16 +30,30 @@ def main() -> None:
     """Run the Serie A database."""
     _setup_logging()
     args = _parse_args()
+    _setup_transport(args)
 
     db = Db()
 
     try:
-        if args.update:
+        if args.update or args.reparse_from_archive:
             LOGGER.info("Updating all tables in the database...")
+            config = read_yaml(CONFIG_FILE)
             db.meta.create_meta_tables()
-            db.meta.set_parameters(read_yaml(CONFIG_FILE)["parameters"])
-            builder = DbUpdater(db, schema=TABLES)
+            db.meta.set_parameters(config["parameters"])
+            db.commit()
+            if args.reparse_from_archive:
+                _reparse_from_archive(db, config)
+            builder = DbUpdater(
+                db,
+                schema=TABLES,
+                jobs=args.jobs,
+                full_rebuild=args.full_rebuild or args.reparse_from_archive,
+                commit_policy=args.commit_policy or config["update"]["commit_policy"],
+                chunk_size=config["update"]["staging_chunk_size"],
+                extract=not args.reparse_from_archive,
+            )
             builder.update_all_tables()
+            _log_rate_limit_waits()
             LOGGER.info("Update completed!")
         if args.export:
             LOGGER.info("Exporting views to CSV...")
@@ -38,6 +64,35 @@ def main() -> None:
         db.close_connection()
 
 
+def _setup_transport(args: Namespace) -> None:
+    if args.record:
+        LOGGER.info("Recording the HTTP exchanges into %s", args.record)
+        # Responses served by the cache would be missing from the recording
+        recording = Recording(args.record)
+        set_default_transport(
+            RecordingTransport.from_config(use_cache=False, recording=recording)
+        )
+    elif args.replay:
+        LOGGER.info("Replaying the HTTP exchanges recorded in %s", args.replay)
+        set_default_transport(
+            ReplayTransport(Recording(args.replay), latency_factor=args.replay_latency)
+        )
+
+
+def _reparse_from_archive(db: Db, config: dict) -> None:
+    archive = PageArchive(PAGE_ARCHIVE_DIR)
+    try:
+        reparse_from_archive(
+            db,
+            TABLES,
+            ARCHIVE_PARSERS,
+            archive,
+            chunk_size=config["update"]["staging_chunk_size"],
+        )
+    finally:
+        archive.close()
+
+
 def _parse_args() -> Namespace:
     parser = ArgumentParser(prog="serie_a_db", description="Serie A database")
     parser.add_argument(
@@ -52,9 +107,74 @@ def _parse_args() -> Namespace:
         default=False,
         help="Export the views to CSV.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of staging tables allowed to extract data at the same time.",
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        default=False,
+        help="Populate the warehouse tables from all the staging data.",
+    )
+    parser.add_argument(
+        "--reparse-from-archive",
+        action="store_true",
+        default=False,
+        help=(
+            "Rebuild the staging tables from the archived pages, without "
+            "fetching anything, then all the warehouse tables from them."
+        ),
+    )
+    network = parser.add_mutually_exclusive_group()
+    network.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Record every HTTP response received into the directory.",
+    )
+    network.add_argument(
+        "--replay",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Serve the HTTP requests from a recording, without network access.",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0,
+        metavar="FACTOR",
+        help=(
+            "Simulate the latency of the network when replaying, waiting the "
+            "recorded response times multiplied by the factor."
+        ),
+    )
+    parser.add_argument(
+        "--commit-policy",
+        choices=list(CommitPolicy),
+        default=None,
+        help="When to commit the changes, overriding the configuration file.",
+    )
     return parser.parse_args()
 
 
+def _log_rate_limit_waits() -> None:
+    rate_limiter = get_default_transport().rate_limiter
+    if rate_limiter is None:
+        return
+    for host, stats in rate_limiter.stats().items():
+        LOGGER.info(
+            "Sent %d requests to %s, waiting %.1f seconds for the rate limit",
+            stats.requests,
+            host,
+            stats.seconds_waited,
+        )
+
+
 def _setup_logging() -> None:
     logging.basicConfig(
         level=logging.INFO,
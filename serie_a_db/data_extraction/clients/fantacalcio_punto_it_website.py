@@ -1,32 +1,89 @@
 """Get data from the website Fantacalcio.it."""
 
 import re
+from itertools import groupby
+from typing import Iterator
 
-import requests
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
+from serie_a_db.data_extraction.clients.transport import (
+    Transport,
+    get_default_transport,
+)
 
 
 class FantacalcioPuntoItWebsite:
     """Client to request data from the Fantacalcio.it website."""
 
-    ROOT = "https://www.fantacalcio.it"
+    HOST = "www.fantacalcio.it"
+    ROOT = f"https://{HOST}"
+    # Paths of the pages, capturing the season start year and match day number
+    GRADES_PAGE_PATH = r"/voti-fantacalcio-serie-a/(\d{4})-\d{2}/(\d+)$"
+    PLAYERS_LIST_PAGE_PATH = r"/quotazioni-fantacalcio/(\d{4})-\d{2}$"
+    # Encoding of the pages of the website
+    ENCODING = "utf-8"
+
+    def __init__(self, transport: Transport | None = None) -> None:
+        self.transport = transport or get_default_transport()
+
+    def get_grades_page(
+        self, season_year_start: int, match_day_number: int, completed: bool = False
+    ) -> bytes:
+        """Get the raw HTML of the grades page, not decoded.
+
+        The grades of completed match days never change, so they are never
+        requested again once cached.
+        """
+        url = self._grades_page_url(season_year_start, match_day_number)
+        return self.transport.get(url, immutable=completed).content
+
+    def forget_grades_page(self, season_year_start: int, match_day_number: int) -> None:
+        """Drop the cached grades page, e.g. if it turned out incomplete."""
+        self.transport.forget(self._grades_page_url(season_year_start, match_day_number))
+
+    def _grades_page_url(self, season_year_start: int, match_day_number: int) -> str:
+        season_tag = self.make_season_tag(season_year_start)
+        return f"{self.ROOT}/voti-fantacalcio-serie-a/{season_tag}/{match_day_number}"
+
+    def get_players_list_page(self, season_year_start: int) -> str:
+        """Get the raw HTML of the players list page."""
+        season_tag = self.make_season_tag(season_year_start)
+        url = f"{self.ROOT}/quotazioni-fantacalcio/{season_tag}"
+        return self.transport.get(url).text
 
     @classmethod
-    def get_grades_page(cls, season_year_start: int, match_day_number: int) -> str:
-        """Get the raw HTML of the grades page."""
-        season_tag = cls.make_season_tag(season_year_start)
-        url = f"{cls.ROOT}/voti-fantacalcio-serie-a/{season_tag}/{match_day_number}"
-        resp = requests.get(url, timeout=5)
-        resp.raise_for_status()
-        return resp.text
+    def archived_grades_pages(
+        cls, archive: PageArchive
+    ) -> Iterator[tuple[int, int, str]]:
+        """Yield the last grades page archived for each match day.
+
+        Returns
+        -------
+            Tuples in the form (season_year_start, match_day_number, page).
+
+        """
+        pattern = re.escape(cls.ROOT) + cls.GRADES_PAGE_PATH
+        for page in archive.pages(pattern, latest_only=True):
+            season_year_start, match_day_number = re.findall(pattern, page.url)[0]
+            yield int(season_year_start), int(match_day_number), archive.read_text(page)
 
     @classmethod
-    def get_players_list_page(cls, season_year_start: int) -> str:
-        """Get the raw HTML of the players list page."""
-        season_tag = cls.make_season_tag(season_year_start)
-        url = f"{cls.ROOT}/quotazioni-fantacalcio/{season_tag}"
-        resp = requests.get(url, timeout=5)
-        resp.raise_for_status()
-        return resp.text
+    def archived_players_list_pages(
+        cls, archive: PageArchive
+    ) -> Iterator[tuple[int, list[tuple[str, str]]]]:
+        """Yield all the players list pages archived, grouped by season.
+
+        Returns
+        -------
+            Tuples in the form (season_year_start, [(fetched_at, page), ...]).
+
+        """
+        pattern = re.escape(cls.ROOT) + cls.PLAYERS_LIST_PAGE_PATH
+        for url, pages in groupby(archive.pages(pattern), key=lambda page: page.url):
+            season_year_start = int(re.findall(pattern, url)[0])
+            yield (
+                season_year_start,
+                [(page.fetched_at, archive.read_text(page)) for page in pages],
+            )
 
     @staticmethod
     def make_season_tag(season_year_start: int) -> str:
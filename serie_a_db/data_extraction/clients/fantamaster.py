@@ -1,6 +1,22 @@
 """Get data from the Fantamaster website."""
 
-import requests
+from typing import TypedDict
+
+from serie_a_db.data_extraction.clients.json_decoding import decode_records, iter_array
+from serie_a_db.data_extraction.clients.transport import (
+    Transport,
+    get_default_transport,
+)
+
+
+class FmPlayerPayload(TypedDict):
+    """The fields read of a player in the players API of Fantamaster."""
+
+    id: int
+    name: str
+    team: str
+    role: str
+    value: float
 
 
 class FantamasterWebsite:
@@ -8,9 +24,17 @@ class FantamasterWebsite:
 
     ROOT_API = "https://apicdn.fantamaster.it"
 
-    @classmethod
-    def get_players(cls) -> list[dict]:
-        """Return a list of players data, each represented as a dict."""
-        resp = requests.get(cls.ROOT_API + "/playersstats/", timeout=5)
-        resp.raise_for_status()
-        return resp.json()["players"]
+    def __init__(self, transport: Transport | None = None) -> None:
+        self.transport = transport or get_default_transport()
+
+    def get_players(self) -> list[FmPlayerPayload]:
+        """Return a list of players data, each represented as a dict.
+
+        The players are decoded one at a time and only the fields read are
+        kept, as the payload holds many statistics for each player.
+        """
+        resp = self.transport.get(self.ROOT_API + "/playersstats/")
+        source = "Fantamaster players"
+        return decode_records(
+            iter_array(resp.content, "players", source), FmPlayerPayload, source
+        )
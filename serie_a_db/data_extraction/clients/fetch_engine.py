@@ -0,0 +1,211 @@
+"""Engine fetching batches of pages concurrently, within per-host limits."""
+
+import asyncio
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Self,
+)
+
+from serie_a_db import CONFIG_FILE
+from serie_a_db.utils import read_yaml
+
+# Put on the prefetch queue once the results are over
+_DONE = object()
+
+
+class Fetch(NamedTuple):
+    """A request to be sent by the engine, identified by a hashable key."""
+
+    key: Any
+    host: str
+    call: Callable[[], Any]
+
+
+class FetchResult(NamedTuple):
+    """The outcome of a fetch, either its value or the error it raised."""
+
+    key: Any
+    value: Any = None
+    error: Exception | None = None
+
+    def get(self) -> Any:
+        """Return the value of the fetch, raising its error if it failed."""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class FetchEngine:
+    """Send many requests at once, limiting those in flight to each host.
+
+    The requests are blocking calls, e.g. the methods of the website clients,
+    run in worker threads and scheduled by an asyncio event loop. Each host
+    gets its own semaphore, so that the whole batch is limited by the number
+    of requests the host is willing to serve at once, rather than by the
+    round trips of sending them one at a time.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 2,
+        host_max_in_flight: dict[str, int] | None = None,
+        max_prefetched: int = 2,
+    ) -> None:
+        """Initialize the engine.
+
+        Args:
+        ----
+            max_in_flight: The maximum number of requests sent at the same
+                time to a host.
+            host_max_in_flight: The limits of specific hosts, overriding the
+                default one.
+            max_prefetched: The maximum number of results fetched ahead of
+                the caller by prefetch_in_order. If 0, the results are
+                fetched only while the caller waits for them.
+
+        """
+        self.max_in_flight = max_in_flight
+        self.host_max_in_flight = host_max_in_flight or {}
+        self.max_prefetched = max_prefetched
+
+    @classmethod
+    def from_config(cls) -> Self:
+        """Create an engine with the settings of the configuration file."""
+        config = read_yaml(CONFIG_FILE)["fetch"]
+        return cls(
+            max_in_flight=config["max_in_flight"],
+            host_max_in_flight=config["host_max_in_flight"],
+            max_prefetched=config["max_prefetched"],
+        )
+
+    def limit(self, host: str) -> int:
+        """Return the maximum number of requests in flight to the host."""
+        return self.host_max_in_flight.get(host, self.max_in_flight)
+
+    def fetch_all(self, fetches: Iterable[Fetch]) -> Generator[FetchResult, None, None]:
+        """Send all the requests, yielding their results as they complete.
+
+        Errors are not raised but returned in the results, so that the caller
+        decides whether to go on. If the caller stops iterating, the requests
+        not yet sent are cancelled.
+        """
+        fetches = list(fetches)
+        if not fetches:
+            return
+        hosts = {fetch.host for fetch in fetches}
+        workers = min(len(fetches), sum(self.limit(host) for host in hosts))
+
+        loop = asyncio.new_event_loop()
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="fetch")
+        semaphores = {host: asyncio.Semaphore(self.limit(host)) for host in hosts}
+
+        async def send(fetch: Fetch) -> FetchResult:
+            async with semaphores[fetch.host]:
+                try:
+                    value = await loop.run_in_executor(executor, fetch.call)
+                except Exception as e:  # noqa: BLE001
+                    return FetchResult(fetch.key, error=e)
+                return FetchResult(fetch.key, value)
+
+        pending = {loop.create_task(send(fetch)) for fetch in fetches}
+        try:
+            while pending:
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.wait(pending))
+            executor.shutdown(wait=True)
+            loop.close()
+
+    def fetch_in_order(
+        self, fetches: Iterable[Fetch]
+    ) -> Generator[FetchResult, None, None]:
+        """Send all the requests, yielding their results in the passed order.
+
+        Each result is yielded as soon as it and all the previous ones are
+        available, so that the caller can process them in order while the
+        following ones are still being fetched. The keys must be unique.
+        """
+        fetches = list(fetches)
+        keys = deque(fetch.key for fetch in fetches)
+        waiting: dict[Any, FetchResult] = {}
+        results = self.fetch_all(fetches)
+        try:
+            for result in results:
+                waiting[result.key] = result
+                while keys and keys[0] in waiting:
+                    yield waiting.pop(keys.popleft())
+        finally:
+            results.close()
+
+    def prefetch_in_order(self, fetches: Iterable[Fetch]) -> Iterator[FetchResult]:
+        """Yield the results in the passed order, fetching them in the background.
+
+        Unlike fetch_in_order, the requests go on while the caller processes
+        a result, e.g. parsing a page, so that the processing overlaps the
+        network and the rate limiting waits rather than adding to them. The
+        results not yet taken by the caller are held in a bounded queue: once
+        full, no more requests are sent until the caller catches up.
+        """
+        if self.max_prefetched < 1:
+            yield from self.fetch_in_order(fetches)
+            return
+
+        prefetched: queue.Queue = queue.Queue(self.max_prefetched)
+        stop = threading.Event()
+        errors: list[BaseException] = []
+
+        def put(item: Any) -> bool:
+            """Wait for room in the queue, returning False if the caller left."""
+            while not stop.is_set():
+                try:
+                    prefetched.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                return True
+            return False
+
+        def produce() -> None:
+            results = self.fetch_in_order(fetches)
+            try:
+                for result in results:
+                    if not put(result):
+                        return
+            except BaseException as e:  # noqa: BLE001
+                errors.append(e)
+            finally:
+                results.close()
+                put(_DONE)
+
+        producer = threading.Thread(target=produce, name="prefetch", daemon=True)
+        producer.start()
+        try:
+            while (item := prefetched.get()) is not _DONE:
+                yield item
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            producer.join()
+
+
+@cache
+def get_default_fetch_engine() -> FetchEngine:
+    """Return the fetch engine shared by all the extractors of the process."""
+    return FetchEngine.from_config()
@@ -0,0 +1,208 @@
+"""Persistent cache of the HTTP responses, surviving across runs."""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Headers describing the payload as sent over the wire, not as stored
+TRANSPORT_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CachedResponse(NamedTuple):
+    """A response stored in the cache."""
+
+    url: str
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    fetched_at: float
+    immutable: bool
+
+    def is_fresh(self, ttl: float) -> bool:
+        """Return True if the response can be used without revalidation."""
+        return self.immutable or time.time() - self.fetched_at < ttl
+
+    def validators(self) -> dict[str, str]:
+        """Return the headers asking the server to confirm the response is current."""
+        headers = CaseInsensitiveDict(self.headers)
+        validators = {}
+        if "etag" in headers:
+            validators["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            validators["If-Modified-Since"] = headers["last-modified"]
+        return validators
+
+    def to_response(self) -> requests.Response:
+        """Rebuild the requests response."""
+        resp = requests.Response()
+        resp.url = self.url
+        resp.status_code = self.status_code
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp._content = self.content
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        return resp
+
+
+class HttpCache:
+    """Responses stored on disk, keyed by URL.
+
+    Each response is reused without contacting the server until its time to
+    live expires. Afterwards, it is revalidated with a conditional request,
+    which the server can answer without a body if the content did not
+    change. Responses marked as immutable, e.g. about completed match days,
+    are never requested again. When the cache exceeds its maximum size, the
+    least recently used responses are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size_bytes: int,
+        default_ttl: float = 0,
+        ttls: dict[str, float] | None = None,
+    ) -> None:
+        """Open the cache, creating it if needed.
+
+        Args:
+        ----
+            directory: The directory storing the cache.
+            max_size_bytes: The maximum total size of the stored contents.
+            default_ttl: The seconds a response is used without revalidation.
+            ttls: The time to live of the responses whose URL matches the
+                regular expressions used as keys, overriding the default.
+
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        self.default_ttl = default_ttl
+        self.ttls = {re.compile(pattern): ttl for pattern, ttl in (ttls or {}).items()}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            directory / "responses.sqlite", isolation_level=None, check_same_thread=False
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response (
+                url STR PRIMARY KEY,
+                status_code INT NOT NULL,
+                headers STR NOT NULL,
+                content BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                immutable INT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+
+    def ttl(self, url: str) -> float:
+        """Return the time to live of the responses from the URL."""
+        for pattern, ttl in self.ttls.items():
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Return the response stored for the URL, if any."""
+        with self._lock:
+            row = self._db.execute(
+                """
+                SELECT url, status_code, headers, content, fetched_at, immutable
+                FROM response
+                WHERE url = ?
+                """,
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE response SET last_used = ? WHERE url = ?", (time.time(), url)
+            )
+        url, status_code, headers, content, fetched_at, immutable = row
+        return CachedResponse(
+            url, status_code, json.loads(headers), content, fetched_at, bool(immutable)
+        )
+
+    def store(
+        self, url: str, resp: requests.Response, immutable: bool = False
+    ) -> CachedResponse:
+        """Store the response to the URL, replacing any previous one."""
+        headers = {
+            key: value
+            for key, value in resp.headers.items()
+            if key.lower() not in TRANSPORT_HEADERS
+        }
+        cached = CachedResponse(
+            url, resp.status_code, headers, resp.content, time.time(), immutable
+        )
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO response(
+                    url, status_code, headers, content, fetched_at, immutable, last_used
+                )
+                VALUES(?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    cached.status_code,
+                    json.dumps(headers),
+                    cached.content,
+                    cached.fetched_at,
+                    cached.immutable,
+                    cached.fetched_at,
+                ),
+            )
+            self._evict_least_recently_used()
+        return cached
+
+    def refresh(self, cached: CachedResponse, immutable: bool = False) -> CachedResponse:
+        """Record that the server confirmed the stored response is current."""
+        refreshed = cached._replace(
+            fetched_at=time.time(), immutable=cached.immutable or immutable
+        )
+        with self._lock:
+            self._db.execute(
+                "UPDATE response SET fetched_at = ?, immutable = ? WHERE url = ?",
+                (refreshed.fetched_at, refreshed.immutable, cached.url),
+            )
+        return refreshed
+
+    def forget(self, url: str) -> None:
+        """Remove the response stored for the URL, if any."""
+        with self._lock:
+            self._db.execute("DELETE FROM response WHERE url = ?", (url,))
+
+    def size(self) -> int:
+        """Return the total size in bytes of the stored contents."""
+        with self._lock:
+            return self._size()
+
+    def close(self) -> None:
+        """Close the cache."""
+        self._db.close()
+
+    def _size(self) -> int:
+        query = "SELECT IFNULL(SUM(LENGTH(content)), 0) FROM response"
+        return self._db.execute(query).fetchone()[0]
+
+    def _evict_least_recently_used(self) -> None:
+        excess = self._size() - self.max_size_bytes
+        if excess <= 0:
+            return
+        rows = self._db.execute(
+            "SELECT url, LENGTH(content) FROM response ORDER BY last_used"
+        ).fetchall()
+        evicted = []
+        for url, size in rows:
+            if excess <= 0:
+                break
+            evicted.append((url,))
+            excess -= size
+        self._db.executemany("DELETE FROM response WHERE url = ?", evicted)
@@ -0,0 +1,148 @@
+"""Decode the JSON payloads of the APIs, keeping only the fields read.
+
+The shape of the records read from a payload is declared as a TypedDict.
+Each record is checked against it and stripped of all the other fields, so
+that a change in the schema of an API fails with a clear error when the
+payload is decoded, rather than somewhere down the extraction.
+
+Large arrays can be decoded one item at a time with iter_array, which
+saves memory rather than time: the decoding itself is still done by the
+json module of the standard library.
+"""
+
+import json
+import types
+from typing import Any, Iterable, Iterator, TypeVar, Union, get_args, get_origin
+
+from serie_a_db.exceptions import UnexpectedPayloadError
+
+T = TypeVar("T")
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def decode_records(records: Iterable[Any], struct: type[T], source: str) -> list[T]:
+    """Check the records against the struct, keeping only its fields.
+
+    Args:
+    ----
+        records: The records decoded from the payload, e.g. the items of
+            one of its arrays.
+        struct: The TypedDict declaring the fields read and their types.
+        source: The description of the records for the error messages,
+            e.g. "Fantamaster players".
+
+    Raises:
+    ------
+        UnexpectedPayloadError: If a record is not an object, misses any of
+            the fields or has one of an unexpected type.
+
+    """
+    fields = _fields(struct)
+    output = []
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise UnexpectedPayloadError(
+                source, f"record {position} is a {type(record).__name__}"
+            )
+        projected = {}
+        for name, allowed_types in fields:
+            try:
+                value = record[name]
+            except KeyError:
+                raise UnexpectedPayloadError(
+                    source, f"record {position} has no field '{name}'"
+                ) from None
+            if not isinstance(value, allowed_types):
+                raise UnexpectedPayloadError(
+                    source,
+                    f"field '{name}' of record {position} is a "
+                    f"{type(value).__name__}: {value!r}",
+                )
+            projected[name] = value
+        output.append(projected)
+    return output  # type: ignore[return-value]
+
+
+def iter_array(content: bytes | str, key: str, source: str) -> Iterator[Any]:
+    """Yield the items of an array of the top-level object, one at a time.
+
+    Only one item is turned into Python objects at a time, so that the
+    objects of all the items of a large array are never held at once. The
+    document itself is decoded to text as a whole, so its text is held
+    along with its content. The other top-level fields are decoded only to
+    be skipped.
+
+    Args:
+    ----
+        content: The JSON document.
+        key: The field of the top-level object holding the array.
+        source: The description of the payload for the error messages.
+
+    Raises:
+    ------
+        UnexpectedPayloadError: If the document is not an object or has no
+            array in the field.
+
+    """
+    text = content.decode() if isinstance(content, bytes) else content
+    try:
+        index = _expect(text, 0, "{")
+        while text[index] != "}":
+            name, index = _DECODER.raw_decode(text, index)
+            index = _expect(text, index, ":")
+            if name == key:
+                yield from _iter_items(text, _expect(text, index, "["))
+                return
+            _, index = _DECODER.raw_decode(text, index)
+            index = _skip_whitespace(text, index)
+            if text[index] == ",":
+                index = _skip_whitespace(text, index + 1)
+    except (ValueError, IndexError) as e:
+        raise UnexpectedPayloadError(source, f"malformed document: {e}") from e
+    raise UnexpectedPayloadError(source, f"no array in field '{key}'")
+
+
+def _iter_items(text: str, index: int) -> Iterator[Any]:
+    if text[index] == "]":
+        return
+    while True:
+        item, index = _DECODER.raw_decode(text, index)
+        yield item
+        index = _skip_whitespace(text, index)
+        if text[index] == "]":
+            return
+        index = _expect(text, index, ",")
+
+
+def _expect(text: str, index: int, token: str) -> int:
+    """Check the next token, returning the start of what follows it."""
+    index = _skip_whitespace(text, index)
+    if text[index] != token:
+        raise ValueError(f"expected '{token}' at position {index}")
+    return _skip_whitespace(text, index + 1)
+
+
+def _skip_whitespace(text: str, index: int) -> int:
+    while text[index] in _WHITESPACE:
+        index += 1
+    return index
+
+
+def _fields(struct: type) -> tuple[tuple[str, tuple[type, ...]], ...]:
+    """Return the fields of the TypedDict along with the types allowed."""
+    return tuple(
+        (name, _allowed_types(hint)) for name, hint in struct.__annotations__.items()
+    )
+
+
+def _allowed_types(hint: Any) -> tuple[type, ...]:
+    if get_origin(hint) in (Union, types.UnionType):
+        return tuple(t for arg in get_args(hint) for t in _allowed_types(arg))
+    if hint is None or hint is type(None):
+        return (type(None),)
+    # JSON numbers with no decimals are decoded as integers
+    if hint is float:
+        return (int, float)
+    return (hint,)
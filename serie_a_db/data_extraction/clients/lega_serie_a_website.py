@@ -1,44 +1,114 @@
 """Get data from the official Serie A website."""
 
-from functools import lru_cache
+import json
+from typing import Any, TypedDict
 
-import requests
+from serie_a_db.data_extraction.clients.json_decoding import decode_records
+from serie_a_db.data_extraction.clients.transport import (
+    Transport,
+    get_default_transport,
+)
+from serie_a_db.exceptions import UnexpectedPayloadError
+
+
+class MatchDayPayload(TypedDict):
+    """The fields read of a match day in the season API."""
+
+    id_category: int
+    description: str
+    category_status: str
+
+
+class MatchPayload(TypedDict):
+    """The fields read of a match in the match day API."""
+
+    match_id: int
+    home_team_short_name: str
+    home_team_name: str
+    home_goal: int
+    home_penalty_goal: int
+    home_schema: str
+    home_coach_id: int
+    home_coach_name: str
+    home_coach_surname: str
+    away_team_short_name: str
+    away_team_name: str
+    away_goal: int
+    away_penalty_goal: int
+    away_schema: str
+    away_coach_id: int
+    away_coach_name: str
+    away_coach_surname: str
+    minutes_played: str
+    date_time: str
+    match_hm: str
+    match_status: int
 
 
 class SerieAWebsite:
     """Client to request data from the Serie A website."""
 
-    ROOT = "https://www.legaseriea.it"
+    HOST = "www.legaseriea.it"
+    ROOT = f"https://{HOST}"
 
-    @classmethod
-    def get_homepage(cls) -> str:
+    def __init__(self, transport: Transport | None = None) -> None:
+        self.transport = transport or get_default_transport()
+        self._season_pages: dict[int, dict] = {}
+
+    def get_homepage(self) -> str:
         """Get the raw HTML of the Serie A homepage."""
-        resp = requests.get(f"{cls.ROOT}/en/serie-a", timeout=5)
-        resp.raise_for_status()
-        return resp.text
-
-    @classmethod
-    @lru_cache(maxsize=128)
-    def get_season_page(cls, season_api_code: int) -> dict:
-        """Get the API data for a single season."""
-        resp = requests.get(
-            f"{cls.ROOT}/api/season/{season_api_code}/championship/A/matchday?lang=eng",
-            timeout=5,
-        )
-        resp.raise_for_status()
-        return resp.json()
-
-    @classmethod
-    def get_match_day_page(cls, match_day_api_code: int) -> dict:
-        """Get the API data for a single match day."""
-        resp = requests.get(
-            f"{cls.ROOT}/api/stats/live/match?extra_link&lang=en&match_day_id={match_day_api_code}",
-            timeout=5,
+        return self.transport.get(f"{self.ROOT}/en/serie-a").text
+
+    def get_season_page(self, season_api_code: int) -> dict[str, Any]:
+        """Get the API data for a single season.
+
+        Only the fields read of its match days are kept, under "data".
+        """
+        if season_api_code not in self._season_pages:
+            page = json.loads(
+                self.transport.get(
+                    f"{self.ROOT}/api/season/{season_api_code}/championship/A/matchday?lang=eng"
+                ).content
+            )
+            self._season_pages[season_api_code] = {
+                "data": decode_records(
+                    _data(page, "season"), MatchDayPayload, "Serie A match days"
+                )
+            }
+        return self._season_pages[season_api_code]
+
+    def get_match_day_page(
+        self, match_day_api_code: int, completed: bool = False
+    ) -> dict[str, Any]:
+        """Get the API data for a single match day.
+
+        The data about completed match days never changes, so it is never
+        requested again once cached. Only the fields read of its matches are
+        kept, under "data".
+        """
+        page = json.loads(
+            self.transport.get(
+                f"{self.ROOT}/api/stats/live/match?extra_link&lang=en&match_day_id={match_day_api_code}",
+                immutable=completed,
+            ).content
         )
-        resp.raise_for_status()
-        return resp.json()
+        return {
+            "data": decode_records(
+                _data(page, "match day"), MatchPayload, "Serie A matches"
+            )
+        }
 
-    @classmethod
-    def get_matches(cls, match_day_api_code: int) -> list[dict]:
+    def get_matches(
+        self, match_day_api_code: int, completed: bool = False
+    ) -> list[MatchPayload]:
         """Get the matches only API data for a single match day."""
-        return cls.get_match_day_page(match_day_api_code)["data"]
+        return self.get_match_day_page(match_day_api_code, completed)["data"]
+
+
+def _data(page: Any, page_name: str) -> list:
+    """Return the records of the page of the API, under "data"."""
+    if not isinstance(page, dict) or not isinstance(page.get("data"), list):
+        raise UnexpectedPayloadError(
+            f"Serie A {page_name} page", 'no array in field "data"'
+        )
+    return page["data"]
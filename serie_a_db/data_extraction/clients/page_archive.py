@@ -0,0 +1,125 @@
+"""Archive of the raw pages fetched from the websites."""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, NamedTuple
+from urllib.parse import urlsplit
+
+from serie_a_db.utils import now
+
+
+class ArchivedPage(NamedTuple):
+    """A page stored in the archive."""
+
+    url: str
+    fetched_at: str
+    digest: str
+    encoding: str | None
+
+
+class PageArchive:
+    """Compressed copies of every page fetched, to parse them again offline.
+
+    Pages are stored as compressed blobs named after the hash of their
+    content, so that a page fetched many times without changing is stored
+    once. An index records which content was fetched from which URL and when.
+    """
+
+    def __init__(self, directory: Path, compression_level: int = 6) -> None:
+        """Open the archive, creating it if needed.
+
+        Args:
+        ----
+            directory: The directory storing the archive.
+            compression_level: The zlib compression level of the blobs.
+
+        """
+        self.blobs_dir = directory / "blobs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            directory / "index.sqlite", isolation_level=None, check_same_thread=False
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS page (
+                url STR NOT NULL,
+                host STR NOT NULL,
+                fetched_at STR NOT NULL,
+                digest STR NOT NULL,
+                encoding STR
+            )
+            """
+        )
+
+    def store(
+        self, url: str, content: bytes, encoding: str | None = None
+    ) -> ArchivedPage:
+        """Archive the content fetched from the URL, along with its encoding."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # Write then rename, so that a blob is never found half-written
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(zlib.compress(content, self.compression_level))
+            tmp_path.replace(path)
+        fetched_at = now().isoformat(sep=" ", timespec="milliseconds")
+        page = ArchivedPage(url, fetched_at, digest, encoding)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO page VALUES (?, ?, ?, ?, ?)",
+                (url, urlsplit(url).netloc, fetched_at, digest, encoding),
+            )
+        return page
+
+    def read(self, page: ArchivedPage) -> bytes:
+        """Return the content of the archived page."""
+        return zlib.decompress(self._blob_path(page.digest).read_bytes())
+
+    def read_text(self, page: ArchivedPage) -> str:
+        """Return the content of the archived page decoded as when fetched."""
+        return self.read(page).decode(page.encoding or "utf-8", errors="replace")
+
+    def pages(
+        self, url_pattern: str, latest_only: bool = False
+    ) -> Iterator[ArchivedPage]:
+        """Yield the archived pages whose URL matches the regular expression.
+
+        Args:
+        ----
+            url_pattern: The regular expression searched in the URLs.
+            latest_only: Whether to yield only the last page fetched from
+                each URL, rather than all of them.
+
+        """
+        pattern = re.compile(url_pattern)
+        query = """
+            SELECT url, fetched_at, digest, encoding
+            FROM page
+            ORDER BY url, rowid
+        """
+        if latest_only:
+            query = """
+                SELECT url, fetched_at, digest, encoding
+                FROM page
+                WHERE rowid IN (SELECT MAX(rowid) FROM page GROUP BY url)
+                ORDER BY url
+            """
+        with self._lock:
+            rows = self._db.execute(query).fetchall()
+        for row in rows:
+            if pattern.search(row[0]):
+                yield ArchivedPage(*row)
+
+    def close(self) -> None:
+        """Close the index of the archive."""
+        self._db.close()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / f"{digest}.zz"
@@ -0,0 +1,175 @@
+"""Limit the rate of the requests sent to each host."""
+
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Self
+
+LOGGER = logging.getLogger(__name__)
+
+# When the server pushes back, the rate is halved down to this fraction of
+# the configured one, then restored by this fraction after each success
+MIN_RATE_FRACTION = 1 / 16
+RECOVERY_FRACTION = 1 / 10
+
+
+class HostRate(NamedTuple):
+    """The configured rate of the requests to a host."""
+
+    requests_per_minute: float
+    burst: int
+
+
+class RateLimitStats(NamedTuple):
+    """How much the requests to a host were held back."""
+
+    requests: int
+    seconds_waited: float
+    requests_per_minute: float
+
+
+class TokenBucket:
+    """Allow requests at a steady rate, with bursts up to a number of tokens.
+
+    Tokens are added at the configured rate up to the burst size, and each
+    request takes one. When none is left, the request waits for the next
+    token. If the server signals it is overloaded, the rate is reduced and
+    requests are held until the time it asked for has passed.
+    """
+
+    def __init__(self, rate: HostRate) -> None:
+        self.max_rate = rate.requests_per_minute / 60
+        self.rate = self.max_rate
+        self.burst = rate.burst
+        self._tokens = float(rate.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._requests = 0
+        self._seconds_waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Wait for a token, returning the seconds waited."""
+        with self._lock:
+            current = self._refill()
+            # Take the token in advance, so that concurrent callers queue up
+            self._tokens -= 1
+            wait = max(self._blocked_until - current, -self._tokens / self.rate, 0)
+            self._requests += 1
+            self._seconds_waited += wait
+        time.sleep(wait)
+        return wait
+
+    def slow_down(self, retry_after: float | None = None) -> None:
+        """Halve the rate and hold the requests, as the server pushed back.
+
+        Args:
+        ----
+            retry_after: The seconds the server asked to wait. If not passed,
+                the requests are held until the next token at the new rate.
+
+        """
+        with self._lock:
+            current = self._refill()
+            self.rate = max(self.rate / 2, self.max_rate * MIN_RATE_FRACTION)
+            self._tokens = min(self._tokens, 0)
+            delay = retry_after if retry_after is not None else 1 / self.rate
+            self._blocked_until = max(self._blocked_until, current + delay)
+
+    def speed_up(self) -> None:
+        """Move the rate back towards the configured one, after a success."""
+        with self._lock:
+            self.rate = min(self.rate + self.max_rate * RECOVERY_FRACTION, self.max_rate)
+
+    def stats(self) -> RateLimitStats:
+        """Return the requests and the seconds they waited so far."""
+        with self._lock:
+            return RateLimitStats(self._requests, self._seconds_waited, self.rate * 60)
+
+    def _refill(self) -> float:
+        current = time.monotonic()
+        elapsed = current - self._updated
+        self._tokens = min(self._tokens + elapsed * self.rate, self.burst)
+        self._updated = current
+        return current
+
+
+class RateLimiter:
+    """Token buckets shared by all the requests, one per host."""
+
+    def __init__(
+        self, default_rate: HostRate, host_rates: dict[str, HostRate] | None = None
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+        ----
+            default_rate: The rate of the requests to any host.
+            host_rates: The rates of specific hosts, overriding the default one.
+
+        """
+        self.default_rate = default_rate
+        self.host_rates = host_rates or {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> Self:
+        """Create a limiter from the rate_limit section of the configuration."""
+        return cls(
+            default_rate=HostRate(config["requests_per_minute"], config["burst"]),
+            host_rates={
+                host: HostRate(rate["requests_per_minute"], rate["burst"])
+                for host, rate in config["hosts"].items()
+            },
+        )
+
+    def acquire(self, host: str) -> float:
+        """Wait until a request can be sent to the host, returning the seconds waited."""
+        waited = self._bucket(host).acquire()
+        if waited:
+            LOGGER.debug("Waited %.1f seconds before requesting %s", waited, host)
+        return waited
+
+    def slow_down(self, host: str, retry_after: float | None = None) -> None:
+        """Reduce the rate of the requests to the host, which pushed back."""
+        LOGGER.warning("%s asked to slow down, reducing the request rate", host)
+        self._bucket(host).slow_down(retry_after)
+
+    def speed_up(self, host: str) -> None:
+        """Restore the rate of the requests to the host, which served one."""
+        self._bucket(host).speed_up()
+
+    def stats(self) -> dict[str, RateLimitStats]:
+        """Return how much the requests to each host were held back."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.stats() for host, bucket in buckets.items()}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                rate = self.host_rates.get(host, self.default_rate)
+                self._buckets[host] = TokenBucket(rate)
+            return self._buckets[host]
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the seconds to wait from a Retry-After header, if valid.
+
+    The header holds either a number of seconds or an HTTP date.
+    """
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    # HTTP dates are in GMT, yet dates with a "-0000" offset are parsed as naive
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0)
@@ -0,0 +1,193 @@
+"""Record the HTTP exchanges of a run, to replay them offline."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from serie_a_db.data_extraction.clients.http_cache import TRANSPORT_HEADERS
+from serie_a_db.data_extraction.clients.retry import RetryPolicy
+from serie_a_db.data_extraction.clients.transport import Transport
+
+
+class RecordedResponse(NamedTuple):
+    """A response recorded along with the URL requested."""
+
+    url: str
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    elapsed_seconds: float
+
+    def to_response(self) -> requests.Response:
+        """Rebuild the requests response."""
+        resp = requests.Response()
+        resp.url = self.url
+        resp.status_code = self.status_code
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp._content = self.content
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        return resp
+
+
+class Recording:
+    """The responses received during a run, in the order they arrived."""
+
+    def __init__(self, directory: Path) -> None:
+        """Open the recording, creating it if needed."""
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            directory / "exchanges.sqlite", isolation_level=None, check_same_thread=False
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS exchange (
+                sequence INTEGER PRIMARY KEY AUTOINCREMENT,
+                url STR NOT NULL,
+                status_code INT NOT NULL,
+                headers STR NOT NULL,
+                content BLOB NOT NULL,
+                elapsed_seconds REAL NOT NULL
+            )
+            """
+        )
+        self._queues: dict[str, deque[int]] | None = None
+        self._last: dict[str, int] = {}
+
+    def record(self, url: str, resp: requests.Response) -> None:
+        """Append the response received from the URL."""
+        headers = {
+            key: value
+            for key, value in resp.headers.items()
+            if key.lower() not in TRANSPORT_HEADERS
+        }
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO exchange(
+                    url, status_code, headers, content, elapsed_seconds
+                )
+                VALUES(?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    resp.status_code,
+                    json.dumps(headers),
+                    resp.content,
+                    resp.elapsed.total_seconds(),
+                ),
+            )
+
+    def next_response(self, url: str) -> RecordedResponse | None:
+        """Return the next response recorded for the URL, if any.
+
+        The responses to the same URL are returned in the order they were
+        recorded. Once they are over, the last one is returned again.
+        """
+        with self._lock:
+            if self._queues is None:
+                self._queues = defaultdict(deque)
+                for recorded_url, sequence in self._db.execute(
+                    "SELECT url, sequence FROM exchange ORDER BY sequence"
+                ):
+                    self._queues[recorded_url].append(sequence)
+            queue = self._queues.get(url)
+            if queue:
+                self._last[url] = queue.popleft()
+            if url not in self._last:
+                return None
+            row = self._db.execute(
+                """
+                SELECT url, status_code, headers, content, elapsed_seconds
+                FROM exchange
+                WHERE sequence = ?
+                """,
+                (self._last[url],),
+            ).fetchone()
+        url, status_code, headers, content, elapsed_seconds = row
+        return RecordedResponse(
+            url, status_code, json.loads(headers), content, elapsed_seconds
+        )
+
+    def close(self) -> None:
+        """Close the recording."""
+        self._db.close()
+
+
+class RecordingTransport(Transport):
+    """Transport recording every response received from the network."""
+
+    def __init__(self, recording: Recording, **kwargs: Any) -> None:
+        """Initialize the transport.
+
+        Args:
+        ----
+            recording: The recording the responses are appended to.
+            kwargs: The arguments of the base transport.
+
+        """
+        super().__init__(**kwargs)
+        self.recording = recording
+
+    def close(self) -> None:
+        """Close the sessions and the recording."""
+        super().close()
+        self.recording.close()
+
+    def _request(self, host: str, url: str, **kwargs: Any) -> requests.Response:
+        resp = super()._request(host, url, **kwargs)
+        self.recording.record(url, resp)
+        return resp
+
+
+class ReplayTransport(Transport):
+    """Transport serving the responses of a recording, without any network access.
+
+    Nothing is cached, archived nor rate limited, so that replaying the same
+    recording always runs the same way. Failed responses are recorded too:
+    with the retry policy of the recorded run, they are retried just as they
+    were, while without any policy the first failure is raised.
+    """
+
+    def __init__(
+        self,
+        recording: Recording,
+        latency_factor: float = 0,
+        *,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+        ----
+            recording: The recording the responses are served from.
+            latency_factor: The factor applied to the recorded response
+                times to simulate the latency of the network, e.g. 1 to
+                wait as long as the original responses took. By default,
+                responses are served straight away.
+            retry_policy: The policy retrying the requests whose recorded
+                response failed for transient reasons.
+
+        """
+        super().__init__(retry_policy=retry_policy)
+        self.recording = recording
+        self.latency_factor = latency_factor
+
+    def close(self) -> None:
+        """Close the recording."""
+        super().close()
+        self.recording.close()
+
+    def _request(self, host: str, url: str, **kwargs: Any) -> requests.Response:  # noqa: ARG002
+        recorded = self.recording.next_response(url)
+        if recorded is None:
+            raise requests.ConnectionError(f"No response to {url} was recorded.")
+        time.sleep(recorded.elapsed_seconds * self.latency_factor)
+        return recorded.to_response()
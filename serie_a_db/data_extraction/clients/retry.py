@@ -0,0 +1,158 @@
+"""Retry failed requests and stop requesting hosts that keep failing."""
+
+import logging
+import random
+import threading
+import time
+from typing import Self
+
+import requests
+
+LOGGER = logging.getLogger(__name__)
+
+# Statuses of transient failures, which might not happen again
+RETRYABLE_STATUS_CODES = {
+    requests.codes.too_many_requests,
+    requests.codes.internal_server_error,
+    requests.codes.bad_gateway,
+    requests.codes.service_unavailable,
+    requests.codes.gateway_timeout,
+}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Requests to a host are refused, as it failed too many times in a row."""
+
+    def __init__(self, host: str, seconds_left: float) -> None:
+        msg = (
+            f"Not requesting {host} after repeated failures, "
+            f"trying again in {seconds_left:.0f} seconds."
+        )
+        super().__init__(msg)
+
+
+def is_retryable(error: requests.RequestException) -> bool:
+    """Return True if the request failed for a reason likely to be transient."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return not isinstance(error, CircuitOpenError)
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+class RetryPolicy:
+    """When and after how long to send a failed GET request again.
+
+    The delays grow exponentially with the attempts, each picked at random up
+    to its cap so that concurrent requests do not retry all at once. The
+    retries across all the requests are limited by a budget, so that a
+    source down for good does not stretch the run indefinitely.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 2,
+        max_delay: float = 60,
+        budget: int = 50,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+        ----
+            max_attempts: The maximum number of times a request is sent.
+            base_delay: The cap in seconds of the delay before the first retry,
+                doubling at each of the following ones.
+            max_delay: The maximum cap in seconds of the delays.
+            budget: The maximum number of retries across all the requests.
+
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self._retries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> Self:
+        """Create a policy from the retry section of the configuration."""
+        return cls(**config)
+
+    def allows_retry(self, attempt: int) -> bool:
+        """Return True if the request can be sent again, taking from the budget.
+
+        Args:
+        ----
+            attempt: The number of times the request was sent so far.
+
+        """
+        if attempt >= self.max_attempts:
+            return False
+        with self._lock:
+            if self._retries >= self.budget:
+                LOGGER.warning("Retry budget of %d retries exhausted", self.budget)
+                return False
+            self._retries += 1
+            return True
+
+    def backoff(self, attempt: int) -> float:
+        """Return the seconds to wait before sending the request again."""
+        cap = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return random.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """Refuse the requests to the hosts which keep failing.
+
+    After a number of consecutive failures, the circuit of the host opens and
+    its requests fail straight away, so that the extractors of other sources
+    can go on. Once the reset timeout expires, requests are let through again
+    to probe the host: the circuit closes at the first success and opens
+    again at the first failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 300) -> None:
+        """Initialize the breaker.
+
+        Args:
+        ----
+            failure_threshold: The consecutive failures opening the circuit.
+            reset_timeout: The seconds before probing a host again.
+
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> Self:
+        """Create a breaker from the circuit_breaker section of the configuration."""
+        return cls(**config)
+
+    def check(self, host: str) -> None:
+        """Raise CircuitOpenError if the requests to the host are refused."""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return
+        seconds_left = opened_at + self.reset_timeout - time.monotonic()
+        if seconds_left > 0:
+            raise CircuitOpenError(host, seconds_left)
+
+    def record_success(self, host: str) -> None:
+        """Close the circuit of the host, which served a request."""
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        """Count a failure of the host, opening its circuit if too many."""
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.failure_threshold:
+                if host not in self._opened_at:
+                    LOGGER.warning("Too many failures, not requesting %s for now", host)
+                self._opened_at[host] = time.monotonic()
@@ -0,0 +1,251 @@
+"""HTTP transport shared by the website clients."""
+
+import logging
+import threading
+import time
+from typing import Any, Self
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+from serie_a_db import CONFIG_FILE, HTTP_CACHE_DIR, PAGE_ARCHIVE_DIR
+from serie_a_db.data_extraction.clients.http_cache import HttpCache
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
+from serie_a_db.data_extraction.clients.rate_limiter import (
+    RateLimiter,
+    parse_retry_after,
+)
+from serie_a_db.data_extraction.clients.retry import (
+    CircuitBreaker,
+    RetryPolicy,
+    is_retryable,
+)
+from serie_a_db.utils import read_yaml
+
+LOGGER = logging.getLogger(__name__)
+
+# Responses of a server asking to slow down
+PUSH_BACK_STATUS_CODES = {
+    requests.codes.too_many_requests,
+    requests.codes.service_unavailable,
+}
+
+
+class Transport:
+    """Pooled HTTP sessions, one per host.
+
+    Connections to the same host are kept alive and reused across requests,
+    instead of paying a new TCP and TLS handshake each time. Responses are
+    decompressed with any of the encodings urllib3 is able to decode and,
+    if a cache is passed, stored for the next requests and runs. Requests
+    failing for transient reasons are retried, unless their host keeps
+    failing. Pages fetched from the network can be archived, to parse them
+    again later without fetching them.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        pool_size: int = 10,
+        timeout: float = 5,
+        host_timeouts: dict[str, float] | None = None,
+        *,
+        cache: HttpCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        archive: PageArchive | None = None,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+        ----
+            pool_size: The maximum number of connections kept alive per host.
+            timeout: The timeout in seconds of the requests.
+            host_timeouts: The timeouts of specific hosts, overriding the
+                default one.
+            cache: The cache of the responses.
+            rate_limiter: The limiter of the rate of the requests sent to each
+                host. Responses served by the cache are not limited.
+            retry_policy: The policy retrying the requests failed for
+                transient reasons.
+            circuit_breaker: The breaker refusing the requests to the hosts
+                which keep failing.
+            archive: The archive storing every page fetched from the
+                network.
+
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.host_timeouts = host_timeouts or {}
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.archive = archive
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, use_cache: bool = True, **kwargs: Any) -> Self:
+        """Create a transport with the settings of the configuration file.
+
+        Args:
+        ----
+            use_cache: Whether to use the HTTP cache, if enabled in the
+                configuration file.
+            kwargs: Further arguments of the transport.
+
+        """
+        config = read_yaml(CONFIG_FILE)
+        cache = None
+        if use_cache and config["http_cache"]["enabled"]:
+            cache = HttpCache(
+                HTTP_CACHE_DIR,
+                max_size_bytes=config["http_cache"]["max_size_mb"] * 1024**2,
+                default_ttl=config["http_cache"]["default_ttl"],
+                ttls=config["http_cache"]["ttls"],
+            )
+        archive = None
+        if config["page_archive"]["enabled"]:
+            archive = PageArchive(
+                PAGE_ARCHIVE_DIR,
+                compression_level=config["page_archive"]["compression_level"],
+            )
+        return cls(
+            pool_size=config["transport"]["pool_size"],
+            timeout=config["transport"]["timeout"],
+            host_timeouts=config["transport"]["host_timeouts"],
+            cache=cache,
+            rate_limiter=RateLimiter.from_config(config["rate_limit"]),
+            retry_policy=RetryPolicy.from_config(config["retry"]),
+            circuit_breaker=CircuitBreaker.from_config(config["circuit_breaker"]),
+            archive=archive,
+            **kwargs,
+        )
+
+    def get(self, url: str, immutable: bool = False, **kwargs: Any) -> requests.Response:
+        """Send a GET request, raising an error if the response is not ok.
+
+        Args:
+        ----
+            url: The URL to request.
+            immutable: Whether the content will never change, so that the
+                response can always be reused once cached.
+            kwargs: Further arguments of the request.
+
+        """
+        if self.cache is None:
+            return self._send(url, **kwargs)
+
+        cached = self.cache.get(url)
+        if cached is None:
+            resp = self._send(url, **kwargs)
+            self.cache.store(url, resp, immutable)
+            return resp
+        if cached.is_fresh(self.cache.ttl(url)):
+            return cached.to_response()
+
+        headers = cached.validators() | kwargs.pop("headers", {})
+        resp = self._send(url, headers=headers, **kwargs)
+        if resp.status_code == requests.codes.not_modified:
+            return self.cache.refresh(cached, immutable).to_response()
+        self.cache.store(url, resp, immutable)
+        return resp
+
+    def forget(self, url: str) -> None:
+        """Drop the cached response to the URL, e.g. if it proved incomplete."""
+        if self.cache:
+            self.cache.forget(url)
+
+    def close(self) -> None:
+        """Close the sessions and all their connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+        if self.cache:
+            self.cache.close()
+        if self.archive:
+            self.archive.close()
+
+    def _send(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send the request, retrying it if it fails for a transient reason."""
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", self.host_timeouts.get(host, self.timeout))
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.circuit_breaker:
+                self.circuit_breaker.check(host)
+            try:
+                resp = self._send_once(host, url, **kwargs)
+            except requests.RequestException as e:
+                if not is_retryable(e):
+                    raise
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure(host)
+                if self.retry_policy is None or not self.retry_policy.allows_retry(
+                    attempt
+                ):
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+                LOGGER.warning(
+                    "Request to %s failed (%s), retrying in %.1f seconds", url, e, delay
+                )
+                time.sleep(delay)
+                continue
+            if self.circuit_breaker:
+                self.circuit_breaker.record_success(host)
+            if self.archive and resp.status_code == requests.codes.ok:
+                self.archive.store(url, resp.content, resp.encoding)
+            return resp
+
+    def _send_once(self, host: str, url: str, **kwargs: Any) -> requests.Response:
+        if self.rate_limiter:
+            self.rate_limiter.acquire(host)
+        resp = self._request(host, url, **kwargs)
+        if self.rate_limiter:
+            if resp.status_code in PUSH_BACK_STATUS_CODES:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                self.rate_limiter.slow_down(host, retry_after)
+            else:
+                self.rate_limiter.speed_up(host)
+        resp.raise_for_status()
+        return resp
+
+    def _request(self, host: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send the request over the network."""
+        return self._session(host).get(url, **kwargs)
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(make_headers(accept_encoding=True))
+                self._sessions[host] = session
+            return self._sessions[host]
+
+
+_default_transport: Transport | None = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> Transport:
+    """Return the transport shared by all the clients of the process."""
+    global _default_transport  # noqa: PLW0603
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = Transport.from_config()
+        return _default_transport
+
+
+def set_default_transport(transport: Transport) -> None:
+    """Make the clients created from now on use the passed transport."""
+    global _default_transport  # noqa: PLW0603
+    with _default_transport_lock:
+        _default_transport = transport
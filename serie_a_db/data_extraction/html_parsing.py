@@ -0,0 +1,237 @@
+"""Parse the HTML pages scraped, with the backend set in the configuration.
+
+The parsers of the extractors navigate the pages through HtmlNode, so that
+the library building the tree can be swapped without changing them. The
+grades page is the exception: it is parsed in a single streaming pass, with
+no tree, by the parser of st_fpi_player_match.
+
+The backends are:
+
+- "html.parser": BeautifulSoup with the parser of the standard library.
+- "lxml": lxml, several times faster, to be installed separately.
+"""
+
+import importlib.util
+import logging
+from functools import cache
+from typing import Any, Protocol, Self
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+from serie_a_db import CONFIG_FILE
+from serie_a_db.exceptions import SetupError
+from serie_a_db.utils import read_yaml
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "html.parser"
+# The backends, mapped to the module they need besides BeautifulSoup
+BACKENDS = {DEFAULT_BACKEND: None, "lxml": "lxml"}
+
+
+class HtmlNode(Protocol):
+    """An element of a parsed page.
+
+    Elements are searched among all the descendants by tag, by one of their
+    classes and by attributes, either with the given value or with any value
+    if True.
+    """
+
+    @property
+    def text(self) -> str:
+        """The text of the element and of all its descendants."""
+        ...
+
+    def attr(self, name: str) -> str:
+        """Return the value of the attribute, raising KeyError if missing."""
+        ...
+
+    def find(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> Self:
+        """Return the first matching descendant, raising ValueError if none."""
+        ...
+
+    def contains(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> bool:
+        """Return True if any descendant matches."""
+        ...
+
+    def find_all(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> list[Self]:
+        """Return all the matching descendants, in document order."""
+        ...
+
+
+def parse_html(
+    page: str, only: str | None = None, backend: str | None = None
+) -> HtmlNode:
+    """Parse the HTML page, returning its root.
+
+    Args:
+    ----
+        page: The raw HTML of the page.
+        only: The tag of the elements holding the data, e.g. "tr". Backends
+            which can, build the tree only of those elements and skip the rest
+            of the page.
+        backend: The backend parsing the page. By default, the one in the
+            html_parsing section of the configuration.
+
+    """
+    if (backend or get_backend()) == "lxml":
+        return _LxmlNode.parse(page)
+    return _SoupNode.parse(page, only)
+
+
+@cache
+def get_backend() -> str:
+    """Return the configured backend, or the default one if not installed."""
+    backend = read_yaml(CONFIG_FILE)["html_parsing"]["backend"]
+    if backend not in BACKENDS:
+        raise SetupError(
+            f"Unknown HTML parsing backend '{backend}', expected one of "
+            f"{', '.join(BACKENDS)}."
+        )
+    module = BACKENDS[backend]
+    if module is not None and importlib.util.find_spec(module) is None:
+        LOGGER.warning(
+            "HTML parsing backend '%s' is not installed, using '%s'",
+            backend,
+            DEFAULT_BACKEND,
+        )
+        return DEFAULT_BACKEND
+    return backend
+
+
+class _SoupNode:
+    """An element of a page parsed with BeautifulSoup."""
+
+    def __init__(self, tag: Tag) -> None:
+        self._tag = tag
+
+    @classmethod
+    def parse(cls, page: str, only: str | None = None) -> Self:
+        parse_only = SoupStrainer(only) if only is not None else None
+        return cls(BeautifulSoup(page, DEFAULT_BACKEND, parse_only=parse_only))
+
+    @property
+    def text(self) -> str:
+        return self._tag.text
+
+    def attr(self, name: str) -> str:
+        value = self._tag[name]
+        return value if isinstance(value, str) else " ".join(value)
+
+    def find(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> Self:
+        found = self._tag.find_all(tag, attrs=self._attrs(cls, attrs), limit=1)
+        if not found:
+            raise ValueError(_not_found_message(tag, cls, attrs))
+        return type(self)(found[0])
+
+    def contains(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> bool:
+        return bool(self._tag.find_all(tag, attrs=self._attrs(cls, attrs), limit=1))
+
+    def find_all(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> list[Self]:
+        return [
+            type(self)(found)
+            for found in self._tag.find_all(tag, attrs=self._attrs(cls, attrs))
+        ]
+
+    @staticmethod
+    def _attrs(class_: str | None, attrs: dict[str, str | bool]) -> dict[str, Any]:
+        attrs = {_attribute_name(name): value for name, value in attrs.items()}
+        if class_ is not None:
+            attrs["class"] = class_
+        return attrs
+
+
+class _LxmlNode:
+    """An element of a page parsed with lxml, searched with compiled XPaths."""
+
+    def __init__(self, element: Any) -> None:
+        self._element = element
+
+    @classmethod
+    def parse(cls, page: str) -> Self:
+        import lxml.html  # type: ignore[import-untyped]  # noqa: PLC0415
+
+        return cls(lxml.html.document_fromstring(page))
+
+    @property
+    def text(self) -> str:
+        return self._element.text_content()
+
+    def attr(self, name: str) -> str:
+        value = self._element.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def find(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> Self:
+        found = _xpath(tag, cls, tuple(attrs.items()), first=True)(self._element)
+        if not found:
+            raise ValueError(_not_found_message(tag, cls, attrs))
+        return type(self)(found[0])
+
+    def contains(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> bool:
+        return bool(_xpath(tag, cls, tuple(attrs.items()), first=True)(self._element))
+
+    def find_all(
+        self, tag: str | None = None, cls: str | None = None, **attrs: str | bool
+    ) -> list[Self]:
+        found = _xpath(tag, cls, tuple(attrs.items()), first=False)(self._element)
+        return [type(self)(element) for element in found]
+
+
+@cache
+def _xpath(
+    tag: str | None,
+    cls: str | None,
+    attrs: tuple[tuple[str, str | bool], ...],
+    first: bool,
+) -> Any:
+    """Compile the XPath searching the descendants like BeautifulSoup would."""
+    from lxml import etree  # type: ignore[import-untyped]  # noqa: PLC0415
+
+    conditions = []
+    if cls is not None:
+        conditions.append(
+            f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+        )
+    for name, value in attrs:
+        attribute = f"@{_attribute_name(name)}"
+        conditions.append(attribute if value is True else f'{attribute}="{value}"')
+    path = f"descendant::{tag or '*'}"
+    if conditions:
+        path += f"[{' and '.join(conditions)}]"
+    if first:
+        path += "[1]"
+    return etree.XPath(path)
+
+
+def _not_found_message(
+    tag: str | None, cls: str | None, attrs: dict[str, str | bool]
+) -> str:
+    description = f"<{tag or '*'}>"
+    if cls is not None:
+        description += f" of class '{cls}'"
+    if attrs:
+        description += f" with attributes {attrs}"
+    return f"No element {description} found in the page."
+
+
+def _attribute_name(keyword: str) -> str:
+    """Convert a keyword argument to the name of an attribute, e.g. data_value."""
+    return keyword.replace("_", "-")
@@ -1,9 +1,10 @@
 """BaseModel for input data with conversion to namedtuple."""
 
 from collections import namedtuple
-from typing import NamedTuple
+from functools import cache
+from typing import Any, Iterable, NamedTuple, Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 class DbInputBaseModel(BaseModel):
@@ -11,11 +12,84 @@ class DbInputBaseModel(BaseModel):
 
     def to_namedtuple(self) -> NamedTuple:
         """Convert the model to a namedtuple."""
-        dict_instance = self.model_dump()
-        # Mypy complains about the string not being a string literal, but
-        # the code works as expected. No evidence that this is a problem.
-        blueprint = namedtuple(self.__class__.__name__, dict_instance.keys())  # type: ignore
-        return blueprint(**dict_instance)
+        return self.to_row()
+
+    def to_row(self, strings: dict[str, str] | None = None) -> NamedTuple:
+        """Convert the model to a namedtuple of the row type of the model.
+
+        Args:
+        ----
+            strings: The strings already found in the batch of rows being
+                converted, so that repeated values, e.g. IDs and names, are
+                stored once. Updated with the strings of the row.
+
+        """
+        row_type = self.row_type()
+        values = self.__dict__
+        row = [values[field] for field in row_type._fields]
+        if strings is not None:
+            # Only plain strings are shared: members of string enums are equal
+            # to their values, and either could replace the other otherwise
+            row = [
+                strings.setdefault(value, value)
+                if type(value) is str  # noqa: E721
+                else value
+                for value in row
+            ]
+        return row_type._make(row)
+
+    @classmethod
+    def to_rows(
+        cls, models: Iterable[Self], strings: dict[str, str] | None = None
+    ) -> list[NamedTuple]:
+        """Convert the models to namedtuples, sharing their repeated strings."""
+        strings = {} if strings is None else strings
+        return [model.to_row(strings) for model in models]
+
+    @classmethod
+    def validate_many(cls, records: Iterable[dict[str, Any]]) -> list[Self]:
+        """Validate the records at once, returning their models.
+
+        The whole batch is validated in a single call, rather than calling
+        the constructor of each model. If a record is invalid, the
+        ValidationError raised reports its position in the batch.
+        """
+        return _list_adapter(cls).validate_python(list(records))
+
+    @classmethod
+    def records_to_rows(
+        cls,
+        records: Iterable[dict[str, Any]],
+        trusted: bool = False,
+        strings: dict[str, str] | None = None,
+    ) -> list[NamedTuple]:
+        """Convert the records, e.g. those parsed from a page, to namedtuples.
+
+        Args:
+        ----
+            records: The values of the fields of each row.
+            trusted: Whether the records come from an internal source, e.g.
+                the database, and are valid already. If so, they are neither
+                validated nor converted and must hold all the fields.
+            strings: The strings already found in the batch, see to_row.
+
+        """
+        if trusted:
+            row_type = cls.row_type()
+            return [
+                row_type._make([record[field] for field in row_type._fields])
+                for record in records
+            ]
+        return cls.to_rows(cls.validate_many(records), strings)
+
+    @classmethod
+    def row_type(cls) -> Any:
+        """Return the namedtuple type of the rows of the model.
+
+        The type is created once per model and its instances can be pickled,
+        e.g. to be sent to another process.
+        """
+        return _row_type(cls)
 
     @classmethod
     def fields(cls) -> tuple[str, ...]:
@@ -37,3 +111,30 @@ class DbInputBaseModel(BaseModel):
                 ) from e
             differences = {k: (this[k], other[k]) for k in this if this[k] != other[k]}
             raise AssertionError(f"Models have different values: {differences}") from e
+
+
+@cache
+def _row_type(model: type[DbInputBaseModel]) -> Any:
+    # Mypy complains about the string not being a string literal, but
+    # the code works as expected. No evidence that this is a problem.
+    blueprint = namedtuple(model.__name__, model.fields())  # type: ignore
+    # The type is not reachable by name from its module, so rows are pickled
+    # as their model and values instead
+    return type(
+        model.__name__,
+        (blueprint,),
+        {"__slots__": (), "_model": model, "__reduce__": _reduce_row},
+    )
+
+
+@cache
+def _list_adapter(model: type[DbInputBaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])  # type: ignore[valid-type]
+
+
+def _reduce_row(row: Any) -> tuple[Any, tuple[Any, ...]]:
+    return _rebuild_row, (row._model, tuple(row))
+
+
+def _rebuild_row(model: type[DbInputBaseModel], values: tuple[Any, ...]) -> Any:
+    return model.row_type()._make(values)
@@ -0,0 +1,127 @@
+"""Parse many pages at once, in worker processes."""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import cache
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Self
+
+from serie_a_db import CONFIG_FILE
+from serie_a_db.data_extraction.clients.fetch_engine import FetchResult
+from serie_a_db.utils import read_yaml
+
+# Parse a page given its key and its content, returning records
+PageParser = Callable[[Any, Any], list[NamedTuple]]
+
+
+class ParseExecutor:
+    """Parse pages in worker processes, returning their records in order.
+
+    Parsing is bound by the CPU, so parsing pages in threads does not help.
+    With more than one worker, the pages are sent to a pool of processes
+    and their records are returned in the order of the pages, while the
+    following ones are still being parsed. With one worker, the pages are
+    parsed in the calling thread.
+
+    Workers are not forked from the calling process, which runs threads,
+    e.g. the fetch engine, whose locks a forked child would inherit held.
+    They are started by a fork server where available, else spawned.
+    """
+
+    def __init__(self, workers: int = 1) -> None:
+        """Initialize the executor.
+
+        Args:
+        ----
+            workers: The number of processes parsing the pages, one per core
+                if 0.
+
+        """
+        self.workers = workers or os.cpu_count() or 1
+
+    @classmethod
+    def from_config(cls) -> Self:
+        """Create an executor with the settings of the configuration file."""
+        return cls(workers=read_yaml(CONFIG_FILE)["html_parsing"]["workers"])
+
+    def parse_in_order(
+        self, parse: PageParser, pages: Iterable[FetchResult]
+    ) -> Iterator[FetchResult]:
+        """Parse the pages, yielding their records in the order of the pages.
+
+        Pages are consumed lazily, up to a couple per worker ahead of the
+        caller, so that they can be fetched while the previous ones are
+        parsed. Failed fetches and parsing errors are not raised but
+        returned in the results, so that the caller decides whether to go on.
+
+        Args:
+        ----
+            parse: The function parsing a page given its key and its content.
+                It must be defined at module level, to be sent to the workers.
+            pages: The pages, as fetched.
+
+        """
+        if self.workers == 1:
+            for page in pages:
+                yield _parse_page(parse, page)
+            return
+
+        pending: deque[tuple[Any, Future[list[NamedTuple]] | FetchResult]] = deque()
+        with ProcessPoolExecutor(self.workers, mp_context=_worker_context()) as pool:
+            try:
+                for page in pages:
+                    if page.error is not None:
+                        pending.append((page.key, page))
+                    else:
+                        future = pool.submit(
+                            _parse_in_worker, parse, page.key, page.value
+                        )
+                        pending.append((page.key, future))
+                    while len(pending) > 2 * self.workers:
+                        yield _unpack(*pending.popleft())
+                while pending:
+                    yield _unpack(*pending.popleft())
+            finally:
+                for _, outcome in pending:
+                    if isinstance(outcome, Future):
+                        outcome.cancel()
+
+
+@cache
+def get_default_parse_executor() -> ParseExecutor:
+    """Return the parse executor shared by all the extractors of the process."""
+    return ParseExecutor.from_config()
+
+
+def _worker_context() -> Any:
+    """Return the context starting the worker processes, without forking."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _parse_page(parse: PageParser, page: FetchResult) -> FetchResult:
+    if page.error is not None:
+        return page
+    try:
+        return FetchResult(page.key, parse(page.key, page.value))
+    except Exception as e:  # noqa: BLE001
+        return FetchResult(page.key, error=e)
+
+
+def _parse_in_worker(parse: PageParser, key: Any, content: Any) -> list[NamedTuple]:
+    try:
+        return parse(key, content)
+    except ValueError as e:
+        # Validation errors cannot always be pickled, their message can
+        raise ValueError(str(e)) from None
+
+
+def _unpack(key: Any, outcome: Future[list[NamedTuple]] | FetchResult) -> FetchResult:
+    if isinstance(outcome, FetchResult):
+        return outcome
+    try:
+        return FetchResult(key, outcome.result())
+    except Exception as e:  # noqa: BLE001
+        return FetchResult(key, error=e)
@@ -1,13 +1,13 @@
 """Store definitions used across multiple importers."""
 
+import hashlib
 import logging
-import random
-import time
 import traceback
 from enum import StrEnum
-from typing import Any
+from typing import Any, Iterable, Sequence
 
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import RunContext
 
 
 class PlayerRole(StrEnum):
@@ -44,25 +44,43 @@ def log_fatal_error(
     )
 
 
-def sleep_not_to_overload_the_website(sleep_time: int) -> None:
-    """Sleep for a random time around the provided sleep time."""
-    seconds_sleep = random.randint(sleep_time - 5, sleep_time + 5)
-    time.sleep(seconds_sleep)
+def make_season_id(season_year_start: int) -> str:
+    """Create a season identifier, in the format "S24"."""
+    return f"S{str(season_year_start)[-2:]}"
 
 
-def get_relevant_season(db: Db, close_connection: bool = True) -> str:
+def fingerprint_records(records: Iterable[Sequence[Any]]) -> str:
+    """Return a hash of the records, whatever their order.
+
+    Values are hashed as text, so that records read back from the database
+    get the same fingerprint as the extracted ones, even if SQLite converted
+    their types when storing them.
+    """
+    rows = sorted(repr(tuple(map(_as_text, record))) for record in records)
+    return hashlib.sha256("\n".join(rows).encode()).hexdigest()
+
+
+def _as_text(value: Any) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(int(value))
+    return str(value)
+
+
+def get_relevant_season(run_context: RunContext) -> str:
     """Return the ID of the season new data is about.
 
     Either the ongoing season - if any - otherwise the first upcoming one.
     """
-    try:
-        query = """
-        SELECT MIN(season_id)
-        FROM dm_season
-        WHERE
-            status IN ('ongoing', 'upcoming')
-        """
-        return db.select(query)[0][0]
-    finally:
-        if close_connection:
-            db.close_connection()
+    return run_context.lookup("relevant_season", {"dm_season"}, _query_relevant_season)
+
+
+def _query_relevant_season(db: Db) -> str:
+    query = """
+    SELECT MIN(season_id)
+    FROM dm_season
+    WHERE
+        status IN ('ongoing', 'upcoming')
+    """
+    return db.select(query)[0][0]
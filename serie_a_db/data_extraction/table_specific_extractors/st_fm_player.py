@@ -1,6 +1,6 @@
 """Import the player list from Fantamaster."""
 
-from typing import NamedTuple
+from typing import Iterator, NamedTuple
 
 from pydantic import PositiveInt
 
@@ -13,8 +13,7 @@ from serie_a_db.data_extraction.table_specific_extractors.shared_definitions imp
 from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player_match import (
     translate_role,
 )
-from serie_a_db.db.client import Db
-from serie_a_db.utils import now
+from serie_a_db.db.run_context import RunContext
 
 
 class FmPlayer(DbInputBaseModel):
@@ -30,29 +29,26 @@ class FmPlayer(DbInputBaseModel):
 
 
 def scrape_player_data(
-    db: Db | None = None,
+    run_context: RunContext,
     website_client: FantamasterWebsite | None = None,
-) -> list[NamedTuple]:
+) -> Iterator[NamedTuple]:
     """Scape player data from the Fantamaster website."""
-    if db is None:
-        db = Db()
     if website_client is None:
         website_client = FantamasterWebsite()
 
-    season_id = get_relevant_season(db)
-    load_ts = now().isoformat(sep=" ", timespec="milliseconds")
-
-    raw_players = FantamasterWebsite.get_players()
-    parsed_players = [
-        FmPlayer(
-            load_ts=load_ts,
-            season_id=season_id,
-            team_id=player["team"].upper()[:3],
-            code_fm=player["id"],
-            name=player["name"],
-            role=translate_role(player["role"]),
-            value=player["value"],
-        ).to_namedtuple()
+    season_id = get_relevant_season(run_context)
+    load_ts = run_context.load_ts
+
+    raw_players = website_client.get_players()
+    yield from FmPlayer.records_to_rows(
+        {
+            "load_ts": load_ts,
+            "season_id": season_id,
+            "team_id": player["team"].upper()[:3],
+            "code_fm": player["id"],
+            "name": player["name"],
+            "role": translate_role(player["role"]),
+            "value": player["value"],
+        }
         for player in raw_players
-    ]
-    return parsed_players
+    )
@@ -1,24 +1,40 @@
 """Import the player list from Fantacalcio.it."""
 
 import logging
-from typing import NamedTuple
+from functools import partial
+from itertools import groupby
+from typing import Iterator, NamedTuple
 
-from bs4 import BeautifulSoup
 from pydantic import NonNegativeInt
+from requests import RequestException
 
 from serie_a_db.data_extraction.clients.fantacalcio_punto_it_website import (
     FantacalcioPuntoItWebsite,
 )
+from serie_a_db.data_extraction.clients.fetch_engine import (
+    Fetch,
+    FetchEngine,
+    FetchResult,
+    get_default_fetch_engine,
+)
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
+from serie_a_db.data_extraction.html_parsing import parse_html
 from serie_a_db.data_extraction.input_base_model import DbInputBaseModel
+from serie_a_db.data_extraction.parse_executor import (
+    ParseExecutor,
+    get_default_parse_executor,
+)
 from serie_a_db.data_extraction.table_specific_extractors.shared_definitions import (
     PlayerRole,
     log_fatal_error,
-    sleep_not_to_overload_the_website,
+    make_season_id,
 )
 from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player_match import (
     translate_role,
 )
 from serie_a_db.db.client import Db
+from serie_a_db.db.reparse import ArchiveBatch
+from serie_a_db.db.run_context import RunContext
 from serie_a_db.utils import now, strip_whitespaces_and_newlines
 
 LOGGER = logging.getLogger(__name__)
@@ -38,99 +54,164 @@ class FpiPlayer(DbInputBaseModel):
 
 
 def scrape_player_data(
-    db: Db | None = None,
+    run_context: RunContext,
     website_client: FantacalcioPuntoItWebsite | None = None,
-    sleep_time: int = 30,
     max_match_days_to_scrape: int = 37,
-) -> list[NamedTuple]:
-    """Extract data about players performance in a match."""
-    if db is None:
-        db = Db()
+    fetch_engine: FetchEngine | None = None,
+    parse_executor: ParseExecutor | None = None,
+) -> Iterator[NamedTuple]:
+    """Extract data about players performance in a match.
+
+    The players pages are requested all at once, within the limit of requests
+    in flight to the website. Each page is parsed while the following ones are
+    being fetched, by the parse executor.
+    """
     if website_client is None:
         website_client = FantacalcioPuntoItWebsite()
+    if fetch_engine is None:
+        fetch_engine = get_default_fetch_engine()
+    if parse_executor is None:
+        parse_executor = get_default_parse_executor()
+
+    seasons_to_import = run_context.lookup(
+        "seasons_to_import_fpi",
+        {"dm_season", "st_fpi_player"},
+        _get_seasons_to_import,
+    )
+    if len(seasons_to_import) > max_match_days_to_scrape:
+        _log_info_hit_max_seasons_to_scrape(max_match_days_to_scrape)
+        seasons_to_import = seasons_to_import[:max_match_days_to_scrape]
+
+    fetches = [
+        Fetch(
+            season_id,
+            website_client.HOST,
+            partial(website_client.get_players_list_page, season_year_start),
+        )
+        for season_year_start, season_id in seasons_to_import
+    ]
 
-    seasons_to_import = _get_seasons_to_import(db)
-
-    player_matches = []
-    for index, (season_year_start, season_id) in enumerate(seasons_to_import, start=1):
-        if index > max_match_days_to_scrape:
-            _log_info_hit_max_seasons_to_scrape(max_match_days_to_scrape)
-            break
-
-        _log_info_season_being_extracted(season_id)
-        match_day_results_page = website_client.get_players_list_page(season_year_start)
+    pages = fetch_engine.prefetch_in_order(fetches)
+    for result in parse_executor.parse_in_order(_parse_players_page, pages):
+        season_id = result.key
+        _log_info_season_extracted(season_id)
 
         # Try getting all the matches for the match day. If one fails, stop
         # without erroring out so that what successfully extracted so far
         # is still imported
         try:
-            player_matches.extend(parse_players_page(match_day_results_page, season_id))
-        except ValueError:
+            players = result.get()
+        except (ValueError, RequestException):
             log_fatal_error(LOGGER, season_id, "season")
             break
+        yield from players
+
+
+def reparse_player_data(
+    archive: PageArchive, parse_executor: ParseExecutor | None = None
+) -> Iterator[ArchiveBatch]:
+    """Parse again all the players list pages archived for each season.
+
+    Each version of a page is loaded with the time it was fetched. Only the
+    snapshots taken since the first version was archived are replaced, so
+    that the ones loaded before the archive existed are kept.
+    """
+    if parse_executor is None:
+        parse_executor = get_default_parse_executor()
+    pages = (
+        FetchResult((make_season_id(season_year_start), fetched_at), page)
+        for (
+            season_year_start,
+            season_pages,
+        ) in FantacalcioPuntoItWebsite.archived_players_list_pages(archive)
+        for fetched_at, page in season_pages
+    )
+    results = parse_executor.parse_in_order(_parse_archived_players_page, pages)
+    for season_id, season_results in groupby(results, key=lambda r: r.key[0]):
+        # Versions are archived in the order they were fetched
+        versions = list(season_results)
+        _, first_fetched_at = versions[0].key
+        try:
+            players = [player for result in versions for player in result.get()]
+        except ValueError:
+            log_fatal_error(LOGGER, season_id, "archived season")
+            continue
+        yield ArchiveBatch(
+            {"season_id": season_id}, players, {"load_ts": first_fetched_at}
+        )
+
 
-        sleep_not_to_overload_the_website(sleep_time)
+def _parse_players_page(season_id: str, page: str) -> list[NamedTuple]:
+    """Parse the players list page of the season, see ParseExecutor."""
+    return parse_players_page(page, season_id)
 
-    return player_matches
+
+def _parse_archived_players_page(key: tuple[str, str], page: str) -> list[NamedTuple]:
+    """Parse a players list page archived at a given time, see ParseExecutor."""
+    season_id, fetched_at = key
+    return parse_players_page(page, season_id, load_ts=fetched_at)
 
 
 def _get_seasons_to_import(db: Db) -> list[tuple[int, str]]:
-    try:
-        query = """
-        SELECT DISTINCT
-            dms.year_start,
-            dms.season_id
-        FROM dm_season AS dms
-            LEFT JOIN st_fpi_player AS st ON dms.season_id = st.season_id
-        WHERE
-            -- Either seasons with no data or non-completed seasons
-            (dms.status <> 'completed'
-                OR st.season_id IS NULL)
-            -- Data on the website starts from season 2015/16
-            AND dms.year_start >= 2015
-        ORDER BY
-            -- Start from the latest season
-            dms.year_start DESC
-        """
-        return db.select(query)
-    finally:
-        db.close_connection()
-
-
-def parse_players_page(players_page: str, season_id: str) -> list[NamedTuple]:
-    """Parse the page of a match day to extract a list of player matches."""
-    soup = BeautifulSoup(players_page, "html.parser")
-    load_ts = now().isoformat(sep=" ", timespec="milliseconds")
+    query = """
+    SELECT DISTINCT
+        dms.year_start,
+        dms.season_id
+    FROM dm_season AS dms
+        LEFT JOIN st_fpi_player AS st ON dms.season_id = st.season_id
+    WHERE
+        -- Either seasons with no data or non-completed seasons
+        (dms.status <> 'completed'
+            OR st.season_id IS NULL)
+        -- Data on the website starts from season 2015/16
+        AND dms.year_start >= 2015
+    ORDER BY
+        -- Start from the latest season
+        dms.year_start DESC
+    """
+    return db.select(query)
+
+
+def parse_players_page(
+    players_page: str, season_id: str, load_ts: str | None = None
+) -> list[NamedTuple]:
+    """Parse the page of a match day to extract a list of player matches.
+
+    Args:
+    ----
+        players_page: The raw HTML of the players list page.
+        season_id: The ID of the season of the page.
+        load_ts: The time the page was fetched, by default now.
+
+    """
+    root = parse_html(players_page, only="tr")
+    load_ts = load_ts or now().isoformat(sep=" ", timespec="milliseconds")
 
     output = []
-    for player in soup.find_all("tr", attrs={"class": "player-row"}):
-        role = player.find("span", attrs={"class": "role"})["data-value"]
+    for player in root.find_all("tr", cls="player-row"):
+        role = player.find("span", cls="role").attr("data-value")
         code = FantacalcioPuntoItWebsite.strip_player_id_from_url(
-            player.find("a", attrs={"class": "player-name player-link"})["href"]
+            player.find("a", cls="player-name").attr("href")
         )
-        name = player.find("th", attrs={"class": "player-name"}).text
-        team = player.find("td", attrs={"class": "player-team"}).text
-        price_initial = player.find(
-            "td", attrs={"class": "player-classic-initial-price"}
-        ).text
-        price_current = player.find(
-            "td", attrs={"class": "player-classic-current-price"}
-        ).text
+        name = player.find("th", cls="player-name").text
+        team = player.find("td", cls="player-team").text
+        price_initial = int(player.find("td", cls="player-classic-initial-price").text)
+        price_current = int(player.find("td", cls="player-classic-current-price").text)
         output.append(
-            FpiPlayer(
-                season_id=season_id,
-                load_ts=load_ts,
-                team_id=strip_whitespaces_and_newlines(team),
-                name=strip_whitespaces_and_newlines(name),
-                code_fpi=code,
-                role=translate_role(role),
-                price_initial=price_initial,
-                price_current=price_current,
-            ).to_namedtuple()
+            {
+                "season_id": season_id,
+                "load_ts": load_ts,
+                "team_id": strip_whitespaces_and_newlines(team),
+                "name": strip_whitespaces_and_newlines(name),
+                "code_fpi": code,
+                "role": translate_role(role),
+                "price_initial": price_initial,
+                "price_current": price_current,
+            }
         )
     if not output:
         raise ValueError("No player match was found in the page.")
-    return output
+    return FpiPlayer.records_to_rows(output)
 
 
 def _log_info_hit_max_seasons_to_scrape(max_match_days_to_scrape) -> None:
@@ -140,5 +221,5 @@ def _log_info_hit_max_seasons_to_scrape(max_match_days_to_scrape) -> None:
     )
 
 
-def _log_info_season_being_extracted(season_id: str) -> None:
-    LOGGER.info("Extracting players for season %s...", season_id)
+def _log_info_season_extracted(season_id: str) -> None:
+    LOGGER.info("Extracted players for season %s", season_id)
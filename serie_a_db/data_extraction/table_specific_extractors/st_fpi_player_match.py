@@ -1,25 +1,46 @@
 """Logic to extract data from the website fantacalcio.it."""
 
+import codecs
 import logging
-from typing import NamedTuple
+from functools import partial
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, NamedTuple
 
-from bs4 import BeautifulSoup, Tag
 from pydantic import Field, NonNegativeInt
+from requests import RequestException
 
 from serie_a_db.data_extraction.clients.fantacalcio_punto_it_website import (
     FantacalcioPuntoItWebsite,
 )
+from serie_a_db.data_extraction.clients.fetch_engine import (
+    Fetch,
+    FetchEngine,
+    FetchResult,
+    get_default_fetch_engine,
+)
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
 from serie_a_db.data_extraction.input_base_model import DbInputBaseModel
+from serie_a_db.data_extraction.parse_executor import (
+    ParseExecutor,
+    get_default_parse_executor,
+)
 from serie_a_db.data_extraction.table_specific_extractors.shared_definitions import (
     PlayerRole,
     log_fatal_error,
-    sleep_not_to_overload_the_website,
 )
+from serie_a_db.data_extraction.table_specific_extractors.st_match_day import MatchDay
 from serie_a_db.db.client import Db
+from serie_a_db.db.reparse import ArchiveBatch
+from serie_a_db.db.run_context import RunContext
 from serie_a_db.utils import strip_whitespaces_and_newlines
 
 LOGGER = logging.getLogger(__name__)
 
+# A match day is considered complete with at least these many teams and
+# players, see _get_match_days_to_import
+MIN_TEAMS_COMPLETE = 20
+MIN_PLAYERS_COMPLETE = 20 * 12
+
 
 class PlayerMatch(DbInputBaseModel):
     """Info about the performance of a player in a match."""
@@ -49,166 +70,410 @@ class PlayerMatch(DbInputBaseModel):
 
 
 def scrape_player_match_data(
-    db: Db | None = None,
+    run_context: RunContext,
     website_client: FantacalcioPuntoItWebsite | None = None,
-    sleep_time: int = 30,
     max_match_days_to_scrape: int = 1,
-) -> list[NamedTuple]:
-    """Extract data about players performance in a match."""
-    if db is None:
-        db = Db()
+    fetch_engine: FetchEngine | None = None,
+    parse_executor: ParseExecutor | None = None,
+) -> Iterator[NamedTuple]:
+    """Extract data about players performance in a match.
+
+    The grades pages are requested all at once, within the limit of requests
+    in flight to the website. Each page is parsed while the following ones are
+    being fetched, by the parse executor.
+    """
     if website_client is None:
         website_client = FantacalcioPuntoItWebsite()
-
-    match_days_to_import = _get_match_days_to_import(db)
-
-    player_matches = []
-    for index, (season_year_start, match_day_number, match_day_id) in enumerate(
-        match_days_to_import, start=1
-    ):
-        if index > max_match_days_to_scrape:
-            _log_info_hit_max_matches_to_scrape(max_match_days_to_scrape)
-            break
-
-        _log_info_match_day_being_extracted(match_day_id)
+    if fetch_engine is None:
+        fetch_engine = get_default_fetch_engine()
+    if parse_executor is None:
+        parse_executor = get_default_parse_executor()
+
+    match_days_to_import = run_context.lookup(
+        "match_days_to_import_fpi",
+        {"dm_season", "dm_match_day", "st_fpi_player_match"},
+        _get_match_days_to_import,
+    )
+    if len(match_days_to_import) > max_match_days_to_scrape:
+        _log_info_hit_max_matches_to_scrape(max_match_days_to_scrape)
+        match_days_to_import = match_days_to_import[:max_match_days_to_scrape]
+
+    fetches = [
+        Fetch(
+            (season_year_start, match_day_number, match_day_id),
+            website_client.HOST,
+            partial(
+                website_client.get_grades_page,
+                season_year_start,
+                match_day_number,
+                completed=True,
+            ),
+        )
+        for season_year_start, match_day_number, match_day_id in match_days_to_import
+    ]
+
+    pages = fetch_engine.prefetch_in_order(fetches)
+    for result in parse_executor.parse_in_order(_parse_grades_page, pages):
+        season_year_start, match_day_number, match_day_id = result.key
+        _log_info_match_day_extracted(match_day_id)
 
         # Try getting all the matches for the match day. If one fails, stop
         # without erroring out so that what successfully extracted so far
         # is still imported
         try:
-            match_day_results_page = website_client.get_grades_page(
-                season_year_start, match_day_number
-            )
-            player_matches.extend(
-                parse_match_day_page(match_day_results_page, match_day_id)
-            )
-        except (ValueError, ConnectionError):
+            parsed = result.get()
+            if not _is_complete(parsed):
+                # The grades might still be published: request the page again
+                # next time
+                website_client.forget_grades_page(season_year_start, match_day_number)
+        except (ValueError, RequestException):
             log_fatal_error(LOGGER, match_day_id, "match day")
             break
+        yield from parsed
+
+
+def reparse_player_match_data(
+    archive: PageArchive, parse_executor: ParseExecutor | None = None
+) -> Iterator[ArchiveBatch]:
+    """Parse again the last grades page archived for each match day."""
+    if parse_executor is None:
+        parse_executor = get_default_parse_executor()
+    pages = (
+        FetchResult(
+            (
+                season_year_start,
+                match_day_number,
+                MatchDay.make_id(season_year_start, match_day_number),
+            ),
+            page,
+        )
+        for (
+            season_year_start,
+            match_day_number,
+            page,
+        ) in FantacalcioPuntoItWebsite.archived_grades_pages(archive)
+    )
+    for result in parse_executor.parse_in_order(_parse_grades_page, pages):
+        *_, match_day_id = result.key
+        try:
+            player_matches = result.get()
+        except ValueError:
+            log_fatal_error(LOGGER, match_day_id, "archived match day")
+            continue
+        yield ArchiveBatch({"match_day_id": match_day_id}, player_matches)
 
-        sleep_not_to_overload_the_website(sleep_time)
 
-    return player_matches
+def _parse_grades_page(key: tuple[int, int, str], page: str | bytes) -> list[NamedTuple]:
+    """Parse the grades page of the match day, see ParseExecutor."""
+    *_, match_day_id = key
+    return parse_match_day_page(page, match_day_id, FantacalcioPuntoItWebsite.ENCODING)
 
 
 def _get_match_days_to_import(db: Db) -> list[tuple[int, int, str]]:
-    try:
-        query = """
-        SELECT
-            dms.year_start,
-            dmmd.number,
-            dmmd.match_day_id
-        FROM dm_match_day AS dmmd
-            INNER JOIN dm_season AS dms ON dmmd.season_id = dms.season_id
-            LEFT JOIN st_fpi_player_match AS st ON dmmd.match_day_id = st.match_day_id
-        WHERE
-            dmmd.status = 'completed'
-            -- Data on the website starts from season 2015/16
-            AND dms.year_start >= 2015
-        GROUP BY dmmd.match_day_id
-        HAVING IFNULL(COUNT(DISTINCT st.team_name), 0) < 20
-            OR IFNULL(COUNT(DISTINCT st.code_fpi), 0) < (20 * 12)
-        ORDER BY dms.year_start DESC,
-            dmmd.number
-        """
-        return db.select(query)
-    finally:
-        db.close_connection()
-
-
-def parse_match_day_page(grades_page: str, match_day_id: str) -> list[NamedTuple]:
-    """Parse the page of a match day to extract a list of player matches."""
-    soup = BeautifulSoup(grades_page, "html.parser")
-    team_tables = soup.find_all("li", attrs={"class": "team-table"})
-
-    output = []
-
-    for team in team_tables:
-        head = team.find("thead")
-        team_name = head.find("a", attrs={"class": "team-name team-link"}).text
-
-        body = team.find("tbody")
-        for player in body.find_all("tr"):
-            ids, grades, bonuses = player.find_all("td")
-
-            role = ids.find("span", attrs={"class": "role"})["data-value"]
-            # No need to extract the coach
-            if role == "all":
-                continue
-
-            name = ids.text
-            url = ids.find("a", attrs={"class": "player-name player-link"})["href"]
-            code = FantacalcioPuntoItWebsite.strip_player_id_from_url(url)
-            subbed_in = "Icona subentrato" in str(ids)
-            subbed_out = "Icona sostituito" in str(ids)
-
-            website, ita, stats = grades.find_all("div", attrs={"class": "pill"})
-            website_grade, website_fanta_grade = _parse_grades(website)
-            ita_grade, ita_fanta_grade = _parse_grades(ita)
-            stats_grade, stats_fanta_grade = _parse_grades(stats)
-            # Ignore players that didn't play long enough to get a grade
-            if ita_grade is None:
-                continue
-            ita_fanta_grade = ita_fanta_grade or ita_grade
-            website_grade = website_grade or ita_grade
-            website_fanta_grade = website_fanta_grade or ita_fanta_grade
-            stats_grade = stats_grade or ita_grade
-            stats_fanta_grade = stats_fanta_grade or ita_fanta_grade
-
-            yellow_card = "yellow-card" in str(grades)
-            red_card = "red-card" in str(grades)
-
-            goals_scored_excl_penalties = _extract_bonus(bonuses, "Gol segnati")
-            goals_conceded = _extract_bonus(bonuses, "Gol subiti")
-            own_goals = _extract_bonus(bonuses, "Autoreti")
-            penalties_scored = _extract_bonus(bonuses, "Rigori segnati")
-            penalties_missed = _extract_bonus(bonuses, "Rigori sbagliati")
-            penalties_saved = _extract_bonus(bonuses, "Rigori parati")
-            assists = _extract_bonus(bonuses, "Assist")
-
-            output.append(
-                PlayerMatch(
-                    match_day_id=match_day_id,
-                    team_name=strip_whitespaces_and_newlines(team_name),
-                    name=strip_whitespaces_and_newlines(name),
-                    code_fpi=code,
-                    role=translate_role(role),
-                    fantacalcio_punto_it_grade=website_grade,
-                    fantacalcio_punto_it_fanta_grade=website_fanta_grade,
-                    italia_grade=ita_grade,
-                    italia_fanta_grade=ita_fanta_grade,
-                    statistical_grade=stats_grade,
-                    statistical_fanta_grade=stats_fanta_grade,
-                    goals_scored=goals_scored_excl_penalties + penalties_scored,
-                    goals_conceded=goals_conceded,
-                    own_goals=own_goals,
-                    penalties_scored=penalties_scored,
-                    penalties_missed=penalties_missed,
-                    penalties_saved=penalties_saved,
-                    assists=assists,
-                    yellow_card=yellow_card,
-                    red_card=red_card,
-                    subbed_in=subbed_in,
-                    subbed_out=subbed_out,
-                ).to_namedtuple()
-            )
+    query = """
+    SELECT
+        dms.year_start,
+        dmmd.number,
+        dmmd.match_day_id
+    FROM dm_match_day AS dmmd
+        INNER JOIN dm_season AS dms ON dmmd.season_id = dms.season_id
+        LEFT JOIN st_fpi_player_match AS st ON dmmd.match_day_id = st.match_day_id
+    WHERE
+        dmmd.status = 'completed'
+        -- Data on the website starts from season 2015/16
+        AND dms.year_start >= 2015
+    GROUP BY dmmd.match_day_id
+    HAVING IFNULL(COUNT(DISTINCT st.team_name), 0) < 20
+        OR IFNULL(COUNT(DISTINCT st.code_fpi), 0) < (20 * 12)
+    ORDER BY dms.year_start DESC,
+        dmmd.number
+    """
+    return db.select(query)
+
+
+def _is_complete(player_matches: list[NamedTuple]) -> bool:
+    teams = {player_match.team_name for player_match in player_matches}  # type: ignore
+    return (
+        len(teams) >= MIN_TEAMS_COMPLETE and len(player_matches) >= MIN_PLAYERS_COMPLETE
+    )
+
+
+def parse_match_day_page(
+    grades_page: str | bytes, match_day_id: str, encoding: str = "utf-8"
+) -> list[NamedTuple]:
+    """Parse the page of a match day to extract a list of player matches.
+
+    Args:
+    ----
+        grades_page: The HTML of the page, either as text or as raw bytes.
+        match_day_id: The ID of the match day of the page.
+        encoding: The encoding of the raw bytes.
+
+    """
+    output = list(iter_match_day_page(grades_page, match_day_id, encoding))
     if not output:
         raise ValueError("No player match was found in the page.")
     return output
 
 
-def _parse_grades(pill: Tag) -> tuple[None, None] | tuple[float, float]:
-    grade = pill.find("span", attrs={"class": "player-grade"})["data-value"]  # type: ignore
+def iter_match_day_page(
+    grades_page: str | bytes,
+    match_day_id: str,
+    encoding: str = "utf-8",
+    chunk_size: int = 64 * 1024,
+) -> Iterator[NamedTuple]:
+    """Yield the player matches of the page of a match day, in a single pass.
+
+    The page is read one chunk at a time and no tree of the document is
+    built: each player match is yielded as soon as its row is over. Raw
+    bytes are decoded chunk by chunk as well.
+    """
+    parser = _GradesPageParser()
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    # Team names and the match day ID are shared by the rows of the page
+    strings: dict[str, str] = {}
+    for start in range(0, len(grades_page), chunk_size):
+        chunk = grades_page[start : start + chunk_size]
+        parser.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        yield from _to_player_matches(parser.pop_rows(), match_day_id, strings)
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    yield from _to_player_matches(parser.pop_rows(), match_day_id, strings)
+
+
+class _PlayerRow(NamedTuple):
+    """The raw values of a row of the grades page."""
+
+    team_name: str
+    text: str
+    role: str
+    url: str | None
+    subbed_in: bool
+    subbed_out: bool
+    # The grade and fanta grade of the website, Italia and statistical
+    grades: list[tuple[str | None, str | None]]
+    yellow_card: bool
+    red_card: bool
+    bonuses: dict[str, int]
+
+
+# The cells of a player row
+PLAYER_CELL, GRADES_CELL, BONUSES_CELL = range(3)
+
+
+class _RowState:
+    """The values of the player row being read."""
+
+    def __init__(self, team_name: str) -> None:
+        self.team_name = team_name
+        self.cell = -1
+        self.in_cell = False
+        self.text: list[str] = []
+        self.role: str | None = None
+        self.url: str | None = None
+        self.subbed_in = False
+        self.subbed_out = False
+        self.grades: list[list[str | None]] = []
+        self.yellow_card = False
+        self.red_card = False
+        self.bonuses: dict[str, int] = {}
+
+    def start_cell_tag(self, tag: str, attributes: dict[str, str | None]) -> None:
+        """Read the values of a tag opened in the current cell."""
+        classes = (attributes.get("class") or "").split()
+        if self.cell == PLAYER_CELL:
+            if tag == "span" and "role" in classes and self.role is None:
+                self.role = attributes.get("data-value")
+            elif tag == "a" and "player-name" in classes and self.url is None:
+                self.url = attributes.get("href")
+            elif tag == "img" and attributes.get("alt") == "Icona subentrato":
+                self.subbed_in = True
+            elif tag == "img" and attributes.get("alt") == "Icona sostituito":
+                self.subbed_out = True
+        elif self.cell == GRADES_CELL:
+            self.yellow_card = self.yellow_card or "yellow-card" in classes
+            self.red_card = self.red_card or "red-card" in classes
+            if tag == "div" and "pill" in classes:
+                self.grades.append([None, None])
+            elif tag == "span" and self.grades:
+                grade = self.grades[-1]
+                if "player-grade" in classes and grade[0] is None:
+                    grade[0] = attributes.get("data-value")
+                elif "player-fanta-grade" in classes and grade[1] is None:
+                    grade[1] = attributes.get("data-value")
+        elif self.cell == BONUSES_CELL and tag == "span" and "title" in attributes:
+            title = attributes["title"] or ""
+            value = int(attributes.get("data-value") or "")
+            self.bonuses.setdefault(title, value)
+
+    def to_row(self) -> _PlayerRow:
+        """Return the values of the row, once it is over."""
+        n_cells = self.cell + 1
+        if n_cells != len((PLAYER_CELL, GRADES_CELL, BONUSES_CELL)):
+            raise ValueError(f"Unexpected player row with {n_cells} cells.")
+        if self.role is None:
+            raise ValueError("Player role not found in a player row.")
+        return _PlayerRow(
+            team_name=self.team_name,
+            text="".join(self.text),
+            role=self.role,
+            url=self.url,
+            subbed_in=self.subbed_in,
+            subbed_out=self.subbed_out,
+            grades=[(grade, fanta_grade) for grade, fanta_grade in self.grades],
+            yellow_card=self.yellow_card,
+            red_card=self.red_card,
+            bonuses=self.bonuses,
+        )
+
+
+class _GradesPageParser(HTMLParser):
+    """Collect the rows of the team tables of the grades page as it is fed.
+
+    Each team is a "team-table" list item, holding the team name in the
+    table head and a row per player in the table body. Only the row being
+    read is kept, until collected with pop_rows.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._rows: list[_PlayerRow] = []
+        self._li_depth = 0
+        self._team_depth: int | None = None
+        self._team_name: list[str] | None = None
+        self._in_team_name = False
+        self._in_head = False
+        self._in_body = False
+        self._row: _RowState | None = None
+
+    def pop_rows(self) -> list[_PlayerRow]:
+        """Return the rows read since the last call."""
+        rows, self._rows = self._rows, []
+        return rows
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        """Keep track of where the parser is, reading the values of the rows."""
+        attributes = dict(attrs)
+        if tag == "li":
+            self._li_depth += 1
+            if "team-table" in (attributes.get("class") or "").split():
+                self._team_depth = self._li_depth
+                self._team_name = None
+        if self._team_depth is None:
+            return
+        if tag == "thead":
+            self._in_head = True
+        elif tag == "tbody":
+            self._in_body = True
+        elif self._in_head and tag == "a" and self._team_name is None:
+            if "team-name" in (attributes.get("class") or "").split():
+                self._team_name = []
+                self._in_team_name = True
+        elif self._in_body and tag == "tr":
+            self._row = _RowState("".join(self._team_name or []))
+        elif self._row is not None and tag == "td":
+            self._row.cell += 1
+            self._row.in_cell = True
+        elif self._row is not None and self._row.in_cell:
+            self._row.start_cell_tag(tag, attributes)
+
+    def handle_endtag(self, tag: str) -> None:
+        """Keep track of where the parser is, emitting the rows once over."""
+        if tag == "li":
+            if self._li_depth == self._team_depth:
+                self._team_depth = None
+                self._in_head = self._in_body = False
+            self._li_depth -= 1
+        elif tag == "thead":
+            self._in_head = False
+        elif tag == "tbody":
+            self._in_body = False
+        elif tag == "a":
+            self._in_team_name = False
+        elif tag == "td" and self._row is not None:
+            self._row.in_cell = False
+        elif tag == "tr" and self._row is not None:
+            self._rows.append(self._row.to_row())
+            self._row = None
+
+    def handle_data(self, data: str) -> None:
+        """Collect the text of the team name and of the player cells."""
+        if self._in_team_name and self._team_name is not None:
+            self._team_name.append(data)
+        elif (
+            self._row is not None and self._row.in_cell and self._row.cell == PLAYER_CELL
+        ):
+            self._row.text.append(data)
+
+
+def _to_player_matches(
+    rows: Iterable[_PlayerRow], match_day_id: str, strings: dict[str, str]
+) -> list[NamedTuple]:
+    records = []
+    for row in rows:
+        # No need to extract the coach
+        if row.role == "all":
+            continue
+        if row.url is None:
+            raise ValueError("Player link not found in a player row.")
+        if len(row.grades) != len(("website", "italia", "statistical")):
+            raise ValueError(f"Unexpected player row with {len(row.grades)} grades.")
+        website, ita, stats = (_parse_grades(*grades) for grades in row.grades)
+        website_grade, website_fanta_grade = website
+        ita_grade, ita_fanta_grade = ita
+        stats_grade, stats_fanta_grade = stats
+        # Ignore players that didn't play long enough to get a grade
+        if ita_grade is None:
+            continue
+        ita_fanta_grade = ita_fanta_grade or ita_grade
+        website_grade = website_grade or ita_grade
+        website_fanta_grade = website_fanta_grade or ita_fanta_grade
+        stats_grade = stats_grade or ita_grade
+        stats_fanta_grade = stats_fanta_grade or ita_fanta_grade
+
+        goals_scored_excl_penalties = row.bonuses["Gol segnati"]
+        penalties_scored = row.bonuses["Rigori segnati"]
+
+        records.append(
+            {
+                "match_day_id": match_day_id,
+                "team_name": strip_whitespaces_and_newlines(row.team_name),
+                "name": strip_whitespaces_and_newlines(row.text),
+                "code_fpi": FantacalcioPuntoItWebsite.strip_player_id_from_url(row.url),
+                "role": translate_role(row.role),
+                "fantacalcio_punto_it_grade": website_grade,
+                "fantacalcio_punto_it_fanta_grade": website_fanta_grade,
+                "italia_grade": ita_grade,
+                "italia_fanta_grade": ita_fanta_grade,
+                "statistical_grade": stats_grade,
+                "statistical_fanta_grade": stats_fanta_grade,
+                "goals_scored": goals_scored_excl_penalties + penalties_scored,
+                "goals_conceded": row.bonuses["Gol subiti"],
+                "own_goals": row.bonuses["Autoreti"],
+                "penalties_scored": penalties_scored,
+                "penalties_missed": row.bonuses["Rigori sbagliati"],
+                "penalties_saved": row.bonuses["Rigori parati"],
+                "assists": row.bonuses["Assist"],
+                "yellow_card": row.yellow_card,
+                "red_card": row.red_card,
+                "subbed_in": row.subbed_in,
+                "subbed_out": row.subbed_out,
+            }
+        )
+    return PlayerMatch.records_to_rows(records, strings=strings)
+
+
+def _parse_grades(
+    grade: str | None, fanta_grade: str | None
+) -> tuple[None, None] | tuple[float, float]:
+    if grade is None:
+        raise ValueError("Player grade not found in a player row.")
     # If the grade is 55 or 56, it means the player didn't play
     if grade in ("55", "56"):
         return None, None
-    fanta_grade = pill.find("span", attrs={"class": "player-fanta-grade"})["data-value"]  # type: ignore
-    return float(grade.replace(",", ".")), float(fanta_grade.replace(",", "."))  # type: ignore
-
-
-def _extract_bonus(bonus: Tag, bonus_name: str) -> int:
-    bonus_value = bonus.find("span", attrs={"title": bonus_name})
-    return int(bonus_value["data-value"])  # type: ignore
+    if fanta_grade is None:
+        raise ValueError("Player fanta grade not found in a player row.")
+    return float(grade.replace(",", ".")), float(fanta_grade.replace(",", "."))
 
 
 def translate_role(role: str) -> PlayerRole:
@@ -229,5 +494,5 @@ def _log_info_hit_max_matches_to_scrape(max_match_days_to_scrape) -> None:
     )
 
 
-def _log_info_match_day_being_extracted(match_day_id: str) -> None:
-    LOGGER.info("Extracting matches for match day %s...", match_day_id)
+def _log_info_match_day_extracted(match_day_id: str) -> None:
+    LOGGER.info("Extracted matches for match day %s", match_day_id)
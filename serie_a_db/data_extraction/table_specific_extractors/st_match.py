@@ -1,17 +1,28 @@
 """Extract data to populate the st_match table."""
 
 import logging
-import random
-import time
-from datetime import datetime
-from typing import NamedTuple, Self
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Iterator, NamedTuple, Self
 
 from pydantic import Field, NonNegativeInt, ValidationError
+from requests import RequestException
 
+from serie_a_db.data_extraction.clients.fetch_engine import (
+    Fetch,
+    FetchEngine,
+    get_default_fetch_engine,
+)
 from serie_a_db.data_extraction.clients.lega_serie_a_website import SerieAWebsite
 from serie_a_db.data_extraction.input_base_model import DbInputBaseModel
+from serie_a_db.data_extraction.table_specific_extractors.shared_definitions import (
+    fingerprint_records,
+    log_fatal_error,
+)
 from serie_a_db.data_extraction.table_specific_extractors.st_match_day import Status
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import RunContext
+from serie_a_db.utils import now
 
 LOGGER = logging.getLogger(__name__)
 
@@ -75,86 +86,168 @@ class Match(DbInputBaseModel):
 
 
 def scrape_match_data(
-    db: Db | None = None,
+    run_context: RunContext,
     serie_a_website_client: SerieAWebsite | None = None,
-    sleep_time: int = 15,
     max_match_days_to_scrape: int = 38 * 10,
-) -> list[NamedTuple]:
-    """Extract match data."""
-    if db is None:
-        db = Db()
+    fetch_engine: FetchEngine | None = None,
+) -> Iterator[NamedTuple]:
+    """Extract match data.
+
+    The match days are requested all at once, within the limit of requests in
+    flight to the Serie A website, and processed in order as they arrive.
+
+    Ongoing match days are requested at every run, unless their matches
+    already loaded cannot have changed since: all of them are completed or
+    only due after tomorrow. Their matches are loaded only if they differ
+    from the ones already in the table, so that polling while nothing
+    happens does not rewrite the same rows.
+    """
     if serie_a_website_client is None:
         serie_a_website_client = SerieAWebsite()
+    if fetch_engine is None:
+        fetch_engine = get_default_fetch_engine()
 
-    match_days_to_import = _get_match_days_to_import(db)
-
-    matches = []
-    for index, (match_day_id, match_day_api_code) in enumerate(
-        match_days_to_import, start=1
-    ):
-        if index > max_match_days_to_scrape:
-            _log_info_hit_max_matches_to_scrape(max_match_days_to_scrape)
-            break
+    match_days_to_import = run_context.lookup(
+        "match_days_to_import_serie_a",
+        {"dm_match_day", "st_match"},
+        _get_match_days_to_import,
+    )
+    if len(match_days_to_import) > max_match_days_to_scrape:
+        _log_info_hit_max_matches_to_scrape(max_match_days_to_scrape)
+        match_days_to_import = match_days_to_import[:max_match_days_to_scrape]
+    loaded_fingerprints = run_context.lookup(
+        "ongoing_match_days_fingerprints",
+        {"dm_match_day", "st_match"},
+        _get_ongoing_match_days_fingerprints,
+    )
 
-        _log_info_match_day_being_extracted(match_day_id, match_day_api_code)
-        raw_matches = serie_a_website_client.get_matches(match_day_api_code)
+    fetches = [
+        Fetch(
+            match_day_id,
+            serie_a_website_client.HOST,
+            partial(
+                serie_a_website_client.get_matches,
+                match_day_api_code,
+                completed=status == Status.COMPLETED,
+            ),
+        )
+        for match_day_id, match_day_api_code, status in match_days_to_import
+    ]
+
+    for result in fetch_engine.fetch_in_order(fetches):
+        match_day_id = result.key
 
         # Try getting all the matches for the match day. If one fails, stop
         # without erroring out so that what successfully extracted so far
         # is still imported
         try:
-            matches.extend(_scrape_matches_for_one_match_day(raw_matches, match_day_id))
+            records = _api_response_to_records(result.get(), match_day_id)
+        except RequestException:
+            log_fatal_error(LOGGER, match_day_id, "match day")
+            break
+
+        # Compare the values read from the payload before validating them, so
+        # that unchanged match days are neither validated nor loaded
+        if loaded_fingerprints.get(match_day_id) == _fingerprint(records):
+            _log_info_match_day_unchanged(match_day_id)
+            continue
+        try:
+            parsed = Match.records_to_rows(records)
         except ValidationError as err:
             _log_warn_validation_error(match_day_id, err)
             break
+        _log_info_match_day_extracted(match_day_id)
+        yield from parsed
 
-        _sleep_not_to_overload_the_website(sleep_time)
-
-    return matches
 
-
-def _get_match_days_to_import(db: Db) -> list[tuple[str, int]]:
+def _get_match_days_to_import(db: Db) -> list[tuple[str, int, str]]:
     """Get match days to import.
 
+    These are the completed match days not loaded yet, plus the ongoing ones
+    with matches that may have changed: the ones not loaded yet, ongoing, or
+    due by tomorrow. The dates of the matches are the local ones of the
+    website, hence the day of margin.
+
     Args:
     ----
         db: Database client.
 
     Returns:
     -------
-        List of tuples in the form (match_day_id, match_day_code_serie_a_api).
+        List of tuples in the form (match_day_id, match_day_code_serie_a_api,
+        status).
 
     """
-    try:
-        # The two tables should always be available
-        query = """
-        SELECT
-            dmmd.match_day_id,
-            dmmd.code_serie_a_api
-        FROM dm_match_day AS dmmd
-            LEFT JOIN st_match AS st
-                ON dmmd.match_day_id = st.match_day_id
-        WHERE
-            dmmd.status = 'ongoing'
-            OR (st.match_day_id IS NULL
-                AND dmmd.status = 'completed')
-        ORDER BY
-            dmmd.match_day_id;
-        """
-        return db.select(query)
-    finally:
-        db.close_connection()
-
-
-def _scrape_matches_for_one_match_day(
+    # The two tables should always be available
+    query = """
+    SELECT
+        dmmd.match_day_id,
+        dmmd.code_serie_a_api,
+        dmmd.status
+    FROM dm_match_day AS dmmd
+    WHERE
+        (dmmd.status = 'ongoing'
+            AND (NOT EXISTS (
+                    SELECT 1 FROM st_match AS st
+                    WHERE st.match_day_id = dmmd.match_day_id
+                )
+                OR EXISTS (
+                    SELECT 1 FROM st_match AS st
+                    WHERE
+                        st.match_day_id = dmmd.match_day_id
+                        AND st.status != 'completed'
+                        AND st.date <= ?
+                )))
+        OR (dmmd.status = 'completed'
+            AND NOT EXISTS (
+                SELECT 1 FROM st_match AS st
+                WHERE st.match_day_id = dmmd.match_day_id
+            ))
+    ORDER BY
+        dmmd.match_day_id;
+    """
+    tomorrow = (now() + timedelta(days=1)).date().isoformat()
+    return db.execute(query, (tomorrow,)).fetchall()
+
+
+def _get_ongoing_match_days_fingerprints(db: Db) -> dict[str, str]:
+    """Get the fingerprints of the matches loaded for the ongoing match days.
+
+    Returns
+    -------
+        The fingerprint of the matches of each match day, by match day ID.
+
+    """
+    query = """
+    SELECT st.*
+    FROM st_match AS st
+        INNER JOIN dm_match_day AS dmmd
+            ON st.match_day_id = dmmd.match_day_id
+    WHERE
+        dmmd.status = 'ongoing'
+    """
+    matches_by_match_day: dict[str, list[tuple]] = {}
+    for match in db.select(query):
+        matches_by_match_day.setdefault(match[0], []).append(match)
+    return {
+        match_day_id: fingerprint_records(matches)
+        for match_day_id, matches in matches_by_match_day.items()
+    }
+
+
+def _api_response_to_records(
     matches_data: list[dict], match_day_id: str
-) -> list[NamedTuple]:
-    parsed_matches = []
-    for match in matches_data:
-        match_patched = _apply_manual_overrides(match)
-        obj = api_response_to_match(match_day_id, match_patched).to_namedtuple()
-        parsed_matches.append(obj)
-    return parsed_matches
+) -> list[dict[str, Any]]:
+    return [
+        _api_response_to_record(match_day_id, _apply_manual_overrides(match))
+        for match in matches_data
+    ]
+
+
+def _fingerprint(records: list[dict[str, Any]]) -> str:
+    """Fingerprint the records as the rows of the table, see fingerprint_records."""
+    fields = Match.fields()
+    return fingerprint_records([record[field] for field in fields] for record in records)
 
 
 def _apply_manual_overrides(match: dict) -> dict:
@@ -175,31 +268,35 @@ def _apply_manual_overrides(match: dict) -> dict:
 
 def api_response_to_match(match_day_id: str, match: dict) -> Match:
     """Convert API response to a match object."""
-    return Match(
-        match_day_id=match_day_id,
-        match_code_serie_a_api=match["match_id"],
-        away_team_id=match["away_team_short_name"],
-        away_team_name=match["away_team_name"].title(),
-        home_team_id=match["home_team_short_name"],
-        home_team_name=match["home_team_name"].title(),
-        away_goals=match["away_goal"],
-        away_penalty_goals=match["away_penalty_goal"],
-        home_goals=match["home_goal"],
-        home_penalty_goals=match["home_penalty_goal"],
-        away_schema=match["away_schema"].replace(" ", ""),
-        home_schema=match["home_schema"].replace(" ", ""),
-        duration_minutes=_extract_minutes(match["minutes_played"]),
-        date=_extract_date(match["date_time"]),
-        time=match["match_hm"],
-        time_zone="UTC+2",
-        status=_map_status(match["match_status"]),
-        away_coach_code_serie_a_api=match["away_coach_id"],
-        away_coach_name=match["away_coach_name"].title(),
-        away_coach_surname=match["away_coach_surname"].title(),
-        home_coach_code_serie_a_api=match["home_coach_id"],
-        home_coach_name=match["home_coach_name"].title(),
-        home_coach_surname=match["home_coach_surname"].title(),
-    )
+    return Match(**_api_response_to_record(match_day_id, match))
+
+
+def _api_response_to_record(match_day_id: str, match: dict) -> dict[str, Any]:
+    return {
+        "match_day_id": match_day_id,
+        "match_code_serie_a_api": match["match_id"],
+        "away_team_id": match["away_team_short_name"],
+        "away_team_name": match["away_team_name"].title(),
+        "home_team_id": match["home_team_short_name"],
+        "home_team_name": match["home_team_name"].title(),
+        "away_goals": match["away_goal"],
+        "away_penalty_goals": match["away_penalty_goal"],
+        "home_goals": match["home_goal"],
+        "home_penalty_goals": match["home_penalty_goal"],
+        "away_schema": match["away_schema"].replace(" ", ""),
+        "home_schema": match["home_schema"].replace(" ", ""),
+        "duration_minutes": _extract_minutes(match["minutes_played"]),
+        "date": _extract_date(match["date_time"]),
+        "time": match["match_hm"],
+        "time_zone": "UTC+2",
+        "status": _map_status(match["match_status"]),
+        "away_coach_code_serie_a_api": match["away_coach_id"],
+        "away_coach_name": match["away_coach_name"].title(),
+        "away_coach_surname": match["away_coach_surname"].title(),
+        "home_coach_code_serie_a_api": match["home_coach_id"],
+        "home_coach_name": match["home_coach_name"].title(),
+        "home_coach_surname": match["home_coach_surname"].title(),
+    }
 
 
 def _extract_minutes(minutes_str: str) -> int | None:
@@ -231,11 +328,6 @@ def _map_status(external_status: int) -> Status:
         raise ValueError(msg) from err
 
 
-def _sleep_not_to_overload_the_website(sleep_time: int) -> None:
-    seconds_sleep = random.randint(sleep_time - 5, sleep_time + 5)
-    time.sleep(seconds_sleep)
-
-
 def _log_info_hit_max_matches_to_scrape(max_match_days_to_scrape) -> None:
     LOGGER.info(
         "Reached the maximum number of match days to scrape (%s).",
@@ -243,12 +335,12 @@ def _log_info_hit_max_matches_to_scrape(max_match_days_to_scrape) -> None:
     )
 
 
-def _log_info_match_day_being_extracted(match_day_id, match_day_api_code) -> None:
-    LOGGER.info(
-        "Extracting matches for match day %s (%s)...",
-        match_day_id,
-        match_day_api_code,
-    )
+def _log_info_match_day_extracted(match_day_id) -> None:
+    LOGGER.info("Extracted matches for match day %s", match_day_id)
+
+
+def _log_info_match_day_unchanged(match_day_id) -> None:
+    LOGGER.info("Matches unchanged for match day %s, not loading them", match_day_id)
 
 
 def _log_warn_validation_error(match_day_id, err) -> None:
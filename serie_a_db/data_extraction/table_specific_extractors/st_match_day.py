@@ -2,14 +2,21 @@
 
 import logging
 from enum import StrEnum
-from typing import NamedTuple, Self
+from functools import partial
+from typing import Iterator, NamedTuple, Self
 
-from bs4 import BeautifulSoup, NavigableString
 from pydantic import Field
 
+from serie_a_db.data_extraction.clients.fetch_engine import (
+    Fetch,
+    FetchEngine,
+    get_default_fetch_engine,
+)
 from serie_a_db.data_extraction.clients.lega_serie_a_website import SerieAWebsite
+from serie_a_db.data_extraction.html_parsing import parse_html
 from serie_a_db.data_extraction.input_base_model import DbInputBaseModel
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import RunContext
 from serie_a_db.exceptions import NoSuchTableError
 
 LOGGER = logging.getLogger(__name__)
@@ -56,24 +63,31 @@ class MatchDay(DbInputBaseModel):
 
 
 def scrape_match_day_data(
-    db: Db | None = None,
+    run_context: RunContext,
     serie_a_website_client: SerieAWebsite | None = None,
-) -> list[NamedTuple]:
+    fetch_engine: FetchEngine | None = None,
+) -> Iterator[NamedTuple]:
     """Extract match day data."""
     # Facilitate replacement with mocks for testing
-    if db is None:
-        db = Db()
     if serie_a_website_client is None:
         serie_a_website_client = SerieAWebsite()
+    if fetch_engine is None:
+        fetch_engine = get_default_fetch_engine()
 
     all_seasons = _scape_seasons(serie_a_website_client)
 
-    earliest_season = _get_earliest_season_to_import(db)
+    earliest_season = run_context.lookup(
+        "earliest_season_to_import",
+        {"dm_season", "st_match_day", "dm_parameter"},
+        _get_earliest_season_to_import,
+    )
     if earliest_season is None:
-        return []
+        return
     relevant_seasons = _filter_seasons(all_seasons, earliest_season)
 
-    return _scrape_match_day_data_from_the_web(serie_a_website_client, relevant_seasons)
+    yield from _scrape_match_day_data_from_the_web(
+        serie_a_website_client, relevant_seasons, fetch_engine
+    )
 
 
 def _get_earliest_season_to_import(db: Db) -> int:
@@ -95,8 +109,6 @@ def _get_earliest_season_to_import(db: Db) -> int:
     except (NoSuchTableError, IndexError):
         # Use minimum season if no active season is found
         return int(db.meta.get_parameter("include_seasons_from_year"))
-    finally:
-        db.close_connection()
 
 
 def _scape_seasons(client: SerieAWebsite) -> list[tuple[int, int]]:
@@ -112,16 +124,14 @@ def _scape_seasons(client: SerieAWebsite) -> list[tuple[int, int]]:
 
     """
     homepage = client.get_homepage()
-    soup = BeautifulSoup(homepage, "html.parser")
-    selector = soup.find("select", attrs={"class": "hm-select", "name": "season"})
-
-    if selector is None:
-        raise ValueError("Season selector not found in the Serie A homepage.")
-    if isinstance(selector, NavigableString):
-        raise ValueError("Season selector has not the expected format.")
+    root = parse_html(homepage, only="select")
+    try:
+        selector = root.find("select", cls="hm-select", name="season")
+    except ValueError as err:
+        raise ValueError("Season selector not found in the Serie A homepage.") from err
 
     return [
-        (int(option.text[:4]), int(option["value"]))
+        (int(option.text[:4]), int(option.attr("value")))
         for option in selector.find_all("option")
     ]
 
@@ -133,24 +143,32 @@ def _filter_seasons(
 
 
 def _scrape_match_day_data_from_the_web(
-    serie_a_website_client: SerieAWebsite, seasons: list[tuple[int, int]]
-) -> list[NamedTuple]:
-    """Scrape match day data from the web."""
-    data = []
-    for season_year_start, season_code in seasons:
+    serie_a_website_client: SerieAWebsite,
+    seasons: list[tuple[int, int]],
+    fetch_engine: FetchEngine,
+) -> Iterator[NamedTuple]:
+    """Scrape match day data from the web, requesting all the seasons at once."""
+    fetches = [
+        Fetch(
+            (season_year_start, season_code),
+            serie_a_website_client.HOST,
+            partial(serie_a_website_client.get_season_page, season_code),
+        )
+        for season_year_start, season_code in seasons
+    ]
+    for result in fetch_engine.fetch_in_order(fetches):
+        season_year_start, season_code = result.key
         LOGGER.info("Scraping match days for season %d", season_year_start)
-        season_page = serie_a_website_client.get_season_page(season_code)
-        for match_day in season_page["data"]:
-            data.append(
-                MatchDay(
-                    season_code_serie_a_api=season_code,
-                    season_year_start=season_year_start,
-                    code_serie_a_api=match_day["id_category"],
-                    number=int(match_day["description"]),
-                    status=_map_status(match_day["category_status"]),
-                ).to_namedtuple()
-            )
-    return data
+        yield from MatchDay.records_to_rows(
+            {
+                "season_code_serie_a_api": season_code,
+                "season_year_start": season_year_start,
+                "code_serie_a_api": match_day["id_category"],
+                "number": int(match_day["description"]),
+                "status": _map_status(match_day["category_status"]),
+            }
+            for match_day in result.get()["data"]
+        )
 
 
 def _map_status(external_status: str) -> Status:
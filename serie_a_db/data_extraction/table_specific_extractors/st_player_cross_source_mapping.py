@@ -1,7 +1,7 @@
 """Perform the players matching across different sources."""
 
 import logging
-from typing import NamedTuple, Self
+from typing import Any, NamedTuple, Self
 
 from pydantic import BaseModel, PositiveInt
 from thefuzz import fuzz  # type: ignore
@@ -12,6 +12,7 @@ from serie_a_db.data_extraction.table_specific_extractors.shared_definitions imp
     get_relevant_season,
 )
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import RunContext
 
 LOGGER = logging.getLogger(__name__)
 
@@ -57,14 +58,12 @@ class PlayerRecord(BaseModel):
         return cls(**data)  # type: ignore
 
 
-def derive_mappings(db: Db | None = None) -> list[NamedTuple]:
+def derive_mappings(run_context: RunContext) -> list[NamedTuple]:
     """Use the db data to derive the cross-source matches."""
-    if db is None:
-        db = Db()
+    season_id = get_relevant_season(run_context)
 
-    season_id = get_relevant_season(db, close_connection=False)
-
-    players_fpi, players_fm = _get_players_from_db(db)
+    with run_context.pool.connection() as db:
+        players_fpi, players_fm = _get_players_from_db(db)
 
     mappings = find_player_mappings(players_fpi, players_fm, season_id)
 
@@ -75,21 +74,18 @@ def _get_players_from_db(
     db: Db,
 ) -> tuple[dict[str, set[PlayerRecord]], dict[str, set[PlayerRecord]]]:
     """Return two data structures in the form {team_id : {player_set}}."""
-    try:
-        query = """
-        SELECT
-            code_$SOURCE$ AS code,
-            name,
-            team_id,
-            role
-        FROM st_$SOURCE$_player
-        WHERE load_ts = (SELECT MAX(load_ts) FROM st_$SOURCE$_player)
-        """
-        fpi = db.select(query.replace("$SOURCE$", "fpi"))
-        fm = db.select(query.replace("$SOURCE$", "fm"))
-        return _structure(fpi), _structure(fm)
-    finally:
-        db.close_connection()
+    query = """
+    SELECT
+        code_$SOURCE$ AS code,
+        name,
+        team_id,
+        role
+    FROM st_$SOURCE$_player
+    WHERE load_ts = (SELECT MAX(load_ts) FROM st_$SOURCE$_player)
+    """
+    fpi = db.select(query.replace("$SOURCE$", "fpi"))
+    fm = db.select(query.replace("$SOURCE$", "fm"))
+    return _structure(fpi), _structure(fm)
 
 
 def _structure(raw_records: list[tuple]) -> dict[str, set[PlayerRecord]]:
@@ -116,7 +112,7 @@ def find_player_mappings(  # noqa: PLR0912
     season_id: str,
 ) -> list[NamedTuple]:
     """Find the player mappings using different strategies."""
-    mappings = []
+    mappings: list[dict[str, Any]] = []
     players_fpi_copy = players_fpi.copy()
     players_fm_copy = players_fm.copy()
 
@@ -127,13 +123,7 @@ def find_player_mappings(  # noqa: PLR0912
         for player_fm in set(team_players_fm):
             for player_fpi in set(players_fpi_copy[team_id]):
                 if player_fm == player_fpi:
-                    mappings.append(
-                        PlayerMapping(
-                            season_id=season_id,
-                            code_fpi=player_fpi.code,
-                            code_fm=player_fm.code,
-                        ).to_namedtuple()
-                    )
+                    mappings.append(_mapping(season_id, player_fpi, player_fm))
                     players_fpi_copy[team_id].remove(player_fpi)
                     players_fm_copy[team_id].remove(player_fm)
 
@@ -144,13 +134,7 @@ def find_player_mappings(  # noqa: PLR0912
         for player_fm in set(team_players_fm):
             for player_fpi in set(players_fpi_copy[team_id]):
                 if player_fm.name == player_fpi.name:
-                    mappings.append(
-                        PlayerMapping(
-                            season_id=season_id,
-                            code_fpi=player_fpi.code,
-                            code_fm=player_fm.code,
-                        ).to_namedtuple()
-                    )
+                    mappings.append(_mapping(season_id, player_fpi, player_fm))
                     players_fpi_copy[team_id].remove(player_fpi)
                     players_fm_copy[team_id].remove(player_fm)
 
@@ -169,20 +153,25 @@ def find_player_mappings(  # noqa: PLR0912
                     best_match = (player_fpi, score)
 
             if best_match[1] >= MIN_ACCEPTED_SIMILIARITY:
-                mappings.append(
-                    PlayerMapping(
-                        season_id=season_id,
-                        code_fpi=best_match[0].code,
-                        code_fm=player_fm.code,
-                    ).to_namedtuple()
-                )
+                mappings.append(_mapping(season_id, best_match[0], player_fm))
                 players_fpi_copy[team_id].remove(best_match[0])
                 players_fm_copy[team_id].remove(player_fm)
 
     unmatched_players = _regroup_unmatched_players(players_fm_copy)
     if unmatched_players:
         LOGGER.warning("%s players could not be matched", len(unmatched_players))
-    return mappings
+    # The codes come from the database, where they were validated already
+    return PlayerMapping.records_to_rows(mappings, trusted=True)
+
+
+def _mapping(
+    season_id: str, player_fpi: PlayerRecord, player_fm: PlayerRecord
+) -> dict[str, Any]:
+    return {
+        "season_id": season_id,
+        "code_fpi": player_fpi.code,
+        "code_fm": player_fm.code,
+    }
 
 
 def _regroup_unmatched_players(
@@ -1,30 +1,58 @@
 """Wrapper around sqlite3.db adding some utility methods."""
 
 import sqlite3
-from datetime import datetime
 from pathlib import Path
 from sqlite3 import Connection, Cursor, connect
-from time import sleep
-from typing import Self
+from typing import TYPE_CHECKING, Self
 
 from serie_a_db import DB_FILE, META_DIR
+from serie_a_db.db.profile import get_profile
+from serie_a_db.db.statements import StatementRegistry
 from serie_a_db.exceptions import raise_proper_operational_error
-from serie_a_db.utils import now
+
+if TYPE_CHECKING:
+    from serie_a_db.db.ledger import TableUpdate
 
 
 class Db:
     """Interface to the database."""
 
-    def __init__(self, db_path: Path | str = DB_FILE) -> None:
+    def __init__(
+        self,
+        db_path: Path | str = DB_FILE,
+        profile: str | None = None,
+        check_same_thread: bool = True,
+    ) -> None:
+        """Connect to the database.
+
+        Args:
+        ----
+            db_path: The path to the database file.
+            profile: The name of the connection profile to apply. If not passed,
+                the one set for the process is used.
+            check_same_thread: Whether only the thread creating the connection
+                can use it.
+
+        """
+        self.path = db_path
+        self.profile = get_profile(profile)
         # MyPy is somehow unaware of the existence of autocommit
-        self.db: Connection = connect(db_path, autocommit=False)  # type: ignore
+        self.db: Connection = connect(  # type: ignore
+            db_path,
+            autocommit=True,
+            check_same_thread=check_same_thread,
+            cached_statements=self.profile.statement_cache_size,
+        )
+        self.profile.apply(self.db)
+        self.db.autocommit = False  # type: ignore
         self.cursor: Cursor = self.db.cursor()
+        self.statements = StatementRegistry(self)
         self.meta = DbMeta(self)
 
     @classmethod
-    def in_memory(cls) -> Self:
+    def in_memory(cls, profile: str | None = None) -> Self:
         """Create a Db instance in memory."""
-        return cls(db_path=":memory:")
+        return cls(db_path=":memory:", profile=profile)
 
     def select(
         self, statement: str, include_attributes: bool = False, *args, **kwargs
@@ -51,22 +79,26 @@ class Db:
         """Commit the transaction."""
         self.db.commit()
 
+    def rollback(self) -> None:
+        """Roll back the transaction."""
+        self.db.rollback()
+
     def count_rows(self, table_name: str) -> int:
         """Return the number of rows in the table."""
-        return self.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        return self.statements.execute("count_rows", table_name=table_name).fetchone()[0]
+
+    def max_rowid(self, table_name: str) -> int:
+        """Return the highest rowid in the table, 0 if the table is empty."""
+        return self.statements.execute("max_rowid", table_name=table_name).fetchone()[0]
 
     def get_all_rows(self, table_name: str) -> list[tuple] | list:
         """Return all rows from the table."""
-        return self.execute(f"SELECT * FROM {table_name}").fetchall()
+        return self.statements.execute("get_all_rows", table_name=table_name).fetchall()
 
     def get_attributes(self, table_name: str) -> tuple[str, ...]:
         """Return the attributes of the table."""
-        return tuple(
-            result[0]
-            for result in self.select(
-                f"SELECT name FROM PRAGMA_TABLE_INFO('{table_name}');"
-            )
-        )
+        cursor = self.statements.execute("get_attributes", (table_name,))
+        return tuple(result[0] for result in cursor)
 
 
 class DbMeta:
@@ -81,7 +113,47 @@ class DbMeta:
             statements = file.read_text().split(";")
             for statement in statements:
                 self.db.execute(statement)
-        return self.db.commit()
+        self._migrate_tables_update()
+
+    def _migrate_tables_update(self) -> None:
+        """Rebuild ft_tables_update if created by an earlier version.
+
+        Earlier versions logged the rows of the table after each update, keyed
+        each update by its table and timestamp, and later added the run id and
+        sequence. The table is rebuilt with the current key: rows logged with
+        a run id are the rows written by the update, the others keep the
+        number of rows of the table and get a sequence from their rowid.
+        """
+        attributes = self.db.get_attributes("ft_tables_update")
+        if "rows_written" in attributes:
+            return
+        if "run_id" in attributes:
+            run_id, sequence = "run_id", "sequence"
+        else:
+            run_id, sequence = "NULL", "NULL"
+        self.db.execute("ALTER TABLE ft_tables_update RENAME TO ft_tables_update_old")
+        self.db.execute((META_DIR / "ft_tables.sql").read_text())
+        self.db.execute(
+            f"""
+            INSERT INTO ft_tables_update(
+                table_name,
+                datetime_updated,
+                rows_number,
+                rows_written,
+                run_id,
+                sequence
+            )
+            SELECT
+                table_name,
+                datetime_updated,
+                CASE WHEN {run_id} IS NULL THEN rows_number END,
+                CASE WHEN {run_id} IS NOT NULL THEN rows_number END,
+                COALESCE({run_id}, 'legacy'),
+                COALESCE({sequence}, rowid)
+            FROM ft_tables_update_old
+            """
+        )
+        self.db.execute("DROP TABLE ft_tables_update_old")
 
     def set_parameters(self, parameters: dict[str, float]) -> None:
         """Insert the parameters into the database."""
@@ -92,52 +164,71 @@ class DbMeta:
             """,
             [(key, value) for key, value in parameters.items()],
         )
-        return self.db.commit()
 
     def get_parameter(self, key: str) -> float:
         """Return the value of the parameter."""
-        return self.db.execute(
-            f"SELECT value FROM dm_parameter WHERE key = '{key}'"
-        ).fetchone()[0]
+        return self.db.statements.execute("get_parameter", (key,)).fetchone()[0]
+
+    def get_parameters(self) -> dict[str, float]:
+        """Return all the parameters."""
+        return dict(self.db.statements.execute("get_parameters"))
+
+    def get_watermarks(self, table_name: str) -> dict[str, tuple[int, str]]:
+        """Return the watermarks of the table's sources.
 
-    def log_table_update(self, table_name: str) -> None:
-        """Log the update on the ft_tables_update."""
-        n_rows = self.db.count_rows(table_name)
+        Each source is mapped to the highest rowid already processed and the
+        hash of the table definition at the time.
+        """
+        rows = self.db.statements.execute("get_watermarks", (table_name,))
+        return {source: (mark, definition_hash) for source, mark, definition_hash in rows}
 
+    def set_watermarks(
+        self, table_name: str, high_water_marks: dict[str, int], definition_hash: str
+    ) -> None:
+        """Store the highest rowid processed for each source of the table."""
+        self.db.cursor.executemany(
+            """
+            INSERT OR REPLACE INTO ft_tables_watermark(
+                table_name, source_table_name, high_water_mark, definition_hash
+            )
+            VALUES(?, ?, ?, ?);
+            """,
+            [
+                (table_name, source, mark, definition_hash)
+                for source, mark in high_water_marks.items()
+            ],
+        )
+
+    def reset_watermarks(self, source_table_name: str) -> None:
+        """Forget the watermarks on the source, e.g. after it was recreated."""
         self.db.execute(
+            "DELETE FROM ft_tables_watermark WHERE source_table_name = ?",
+            (source_table_name,),
+        )
+
+    def get_input_markers(self, table_name: str) -> dict[str, str]:
+        """Return the markers of the table's inputs as of its last build."""
+        return dict(self.db.statements.execute("get_input_markers", (table_name,)))
+
+    def set_input_markers(self, table_name: str, markers: dict[str, str]) -> None:
+        """Replace the markers of the table's inputs."""
+        self.db.execute("DELETE FROM ft_tables_input WHERE table_name = ?", (table_name,))
+        self.db.cursor.executemany(
             """
-            INSERT INTO ft_tables_update(table_name, datetime_updated, rows_number)
+            INSERT INTO ft_tables_input(table_name, input_table_name, marker)
             VALUES(?, ?, ?);
             """,
-            (table_name, now().isoformat(sep=" ", timespec="milliseconds"), n_rows),
+            [(table_name, name, marker) for name, marker in markers.items()],
+        )
+
+    def log_table_updates(self, updates: "list[TableUpdate]") -> None:
+        """Log the updates on the ft_tables_update."""
+        self.db.cursor.executemany(
+            """
+            INSERT INTO ft_tables_update(
+                table_name, datetime_updated, rows_written, run_id, sequence
+            )
+            VALUES(?, ?, ?, ?, ?);
+            """,
+            updates,
         )
-        # Sleep for one millisecond to ensure that two updates cannot
-        # be logged at the same time
-        sleep(0.001)
-
-    def was_updated_today(self, table_name: str) -> bool:
-        """Return True if the table was updated today."""
-        last_updated = self.last_updated(table_name)
-        if last_updated is None:
-            return False
-        return last_updated.date() == now().date()
-
-    def was_updated_since(self, table_name: str, since: datetime) -> bool:
-        """Return True if the table was updated since the passed datetime."""
-        last_updated = self.last_updated(table_name)
-        if last_updated is None:
-            return False
-        return last_updated >= since
-
-    def last_updated(self, table_name: str) -> None | datetime:
-        """Return the timestamp for the last update of this table."""
-        try:
-            datetime_str = self.db.execute(
-                f"""SELECT datetime_updated FROM ft_tables_update
-                WHERE table_name = '{table_name}'
-                ORDER BY datetime_updated DESC
-                LIMIT 1"""
-            ).fetchone()[0]
-        except (IndexError, TypeError):
-            return None
-        return datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S.%f")
@@ -0,0 +1,100 @@
+"""Dependency graph between the tables of a schema."""
+
+from typing import Iterable
+
+from serie_a_db.db.table import DbTable
+from serie_a_db.exceptions import CyclicDependencyError
+
+
+class SchemaGraph:
+    """Dependencies between the tables of a schema, computed once.
+
+    The direct dependencies of each table are derived when the graph is built,
+    together with their reverse edges, a topological order and the upstream
+    and downstream closures of every table. Querying the graph afterwards
+    does not involve any parsing.
+    """
+
+    def __init__(self, schema: dict[str, DbTable]) -> None:
+        self._upstream = {
+            name: frozenset(table.depends_on(schema)) for name, table in schema.items()
+        }
+        downstream: dict[str, set[str]] = {name: set() for name in schema}
+        for name, dependencies in self._upstream.items():
+            for dependency in dependencies:
+                downstream[dependency].add(name)
+        self._downstream = {name: frozenset(deps) for name, deps in downstream.items()}
+
+        self.topological_order = self._sort_topologically()
+
+        self._levels: dict[str, int] = {}
+        self._upstream_closure: dict[str, frozenset[str]] = {}
+        for name in self.topological_order:
+            self._levels[name] = 1 + max(
+                (self._levels[dep] for dep in self._upstream[name]), default=-1
+            )
+            self._upstream_closure[name] = frozenset().union(
+                self._upstream[name],
+                *(self._upstream_closure[dep] for dep in self._upstream[name]),
+            )
+        self._downstream_closure: dict[str, frozenset[str]] = {}
+        for name in reversed(self.topological_order):
+            self._downstream_closure[name] = frozenset().union(
+                self._downstream[name],
+                *(self._downstream_closure[dep] for dep in self._downstream[name]),
+            )
+
+    def dependencies(self, table_name: str) -> frozenset[str]:
+        """Return the tables the passed table directly depends on."""
+        return self._upstream[table_name]
+
+    def dependents(self, table_name: str) -> frozenset[str]:
+        """Return the tables directly depending on the passed table."""
+        return self._downstream[table_name]
+
+    def upstream(self, table_names: Iterable[str]) -> set[str]:
+        """Return all the tables the passed ones depend on, even indirectly."""
+        return set().union(*(self._upstream_closure[name] for name in table_names))
+
+    def downstream(self, table_names: Iterable[str]) -> set[str]:
+        """Return all the tables depending on the passed ones, even indirectly."""
+        return set().union(*(self._downstream_closure[name] for name in table_names))
+
+    def levels(self, table_names: Iterable[str]) -> list[list[str]]:
+        """Group the passed tables by dependency level, in topological order.
+
+        Tables with no dependencies are at level zero, the other ones one
+        level above their highest dependency. Tables at the same level do not
+        depend on each other.
+        """
+        selected = set(table_names)
+        levels: list[list[str]] = []
+        for name in self.topological_order:
+            if name in selected:
+                level = self._levels[name]
+                levels.extend([] for _ in range(level + 1 - len(levels)))
+                levels[level].append(name)
+        return [level for level in levels if level]
+
+    def _sort_topologically(self) -> tuple[str, ...]:
+        """Sort the tables so that each one comes after its dependencies.
+
+        Among the tables whose dependencies are satisfied, the order of the
+        schema is preserved.
+        """
+        missing = {name: len(deps) for name, deps in self._upstream.items()}
+        order: list[str] = []
+        ready = [name for name, count in missing.items() if count == 0]
+        while ready:
+            order.extend(ready)
+            newly_ready = set()
+            for name in ready:
+                for dependent in self._downstream[name]:
+                    missing[dependent] -= 1
+                    if missing[dependent] == 0:
+                        newly_ready.add(dependent)
+            ready = [name for name in self._upstream if name in newly_ready]
+
+        if len(order) != len(self._upstream):
+            raise CyclicDependencyError(sorted(set(self._upstream) - set(order)))
+        return tuple(order)
@@ -0,0 +1,65 @@
+"""Keep track of the tables updated during a run."""
+
+from typing import NamedTuple
+from uuid import uuid4
+
+from serie_a_db.db.client import Db
+from serie_a_db.utils import now
+
+
+class TableUpdate(NamedTuple):
+    """Record of a table update, as stored in ft_tables_update.
+
+    The rows written by the update are logged, rather than the rows of the
+    table, as counting the latter would scan it.
+    """
+
+    table_name: str
+    datetime_updated: str
+    rows_written: int
+    run_id: str
+    sequence: int
+
+
+class UpdateLedger:
+    """In-memory record of the tables updated during one run.
+
+    Records are identified by the run id plus a sequence number, which is
+    unique without relying on the update timestamps. They are written to the
+    database in batches when the ledger is flushed.
+    """
+
+    def __init__(self, run_id: str | None = None) -> None:
+        self.run_id = run_id or uuid4().hex
+        self.records: list[TableUpdate] = []
+        self._updated_tables: set[str] = set()
+        self._n_flushed = 0
+
+    def was_updated(self, table_name: str) -> bool:
+        """Return True if the table was updated during this run."""
+        return table_name in self._updated_tables
+
+    def record(self, table_name: str, rows_written: int) -> None:
+        """Record that the table was updated."""
+        self.records.append(
+            TableUpdate(
+                table_name=table_name,
+                datetime_updated=now().isoformat(sep=" ", timespec="milliseconds"),
+                rows_written=rows_written,
+                run_id=self.run_id,
+                sequence=len(self.records),
+            )
+        )
+        self._updated_tables.add(table_name)
+
+    def discard_unflushed(self) -> None:
+        """Forget the records not yet in the database, e.g. once rolled back."""
+        for record in self.records[self._n_flushed :]:
+            self._updated_tables.discard(record.table_name)
+        del self.records[self._n_flushed :]
+
+    def flush(self, db: Db) -> None:
+        """Write the records not yet in the database and commit."""
+        db.meta.log_table_updates(self.records[self._n_flushed :])
+        db.commit()
+        self._n_flushed = len(self.records)
@@ -0,0 +1,76 @@
+"""Connection profiles, tuning SQLite for the kind of work being done."""
+
+import logging
+import os
+from functools import cache
+from sqlite3 import Connection
+from typing import NamedTuple
+
+from serie_a_db import CONFIG_FILE
+from serie_a_db.exceptions import SetupError
+from serie_a_db.utils import read_yaml
+
+LOGGER = logging.getLogger(__name__)
+
+PROFILE_ENV_VAR = "SERIE_A_DB_PROFILE"
+
+
+class ConnectionProfile(NamedTuple):
+    """Settings of every new connection to the database, mostly pragmas."""
+
+    name: str
+    statement_cache_size: int
+    journal_mode: str
+    synchronous: str
+    cache_size: int
+    mmap_size: int
+    temp_store: str
+    busy_timeout: int
+    foreign_keys: bool
+
+    def apply(self, connection: Connection) -> None:
+        """Set the pragmas on the connection, which must be in autocommit mode.
+
+        The journal mode and foreign keys cannot be changed within a
+        transaction.
+        """
+        for pragma, value in self._asdict().items():
+            if pragma not in ("name", "statement_cache_size"):
+                connection.execute(f"PRAGMA {pragma} = {value}")
+        _log_applied_profile(self.name)
+
+
+def get_profile(name: str | None = None) -> ConnectionProfile:
+    """Return the connection profile to use in this process.
+
+    Args:
+    ----
+        name: The name of the profile. If not passed, the one in the
+            environment variable SERIE_A_DB_PROFILE is used, falling back to
+            the default of the configuration file.
+
+    """
+    config = _read_connection_config()
+    name = name or os.environ.get(PROFILE_ENV_VAR) or config["profile"]
+    try:
+        settings = config["profiles"][name]
+        return ConnectionProfile(
+            name=name,
+            statement_cache_size=config["statement_cache_size"],
+            **settings,
+        )
+    except KeyError as e:
+        available = list(config["profiles"])
+        raise SetupError(
+            f"Unknown connection profile '{name}', expected one of {available}."
+        ) from e
+
+
+@cache
+def _read_connection_config() -> dict:
+    return read_yaml(CONFIG_FILE)["connection"]
+
+
+@cache
+def _log_applied_profile(name: str) -> None:
+    LOGGER.info("Connecting to the database with the '%s' profile", name)
@@ -0,0 +1,81 @@
+"""Rebuild staging tables from the archived pages, without fetching them."""
+
+import logging
+from typing import Any, Callable, Iterable, NamedTuple
+
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
+from serie_a_db.db.client import Db
+from serie_a_db.db.table import DEFAULT_CHUNK_SIZE, DbTable, StagingTable
+from serie_a_db.exceptions import SetupError
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ArchiveBatch(NamedTuple):
+    """Records parsed again from archived pages.
+
+    They replace all the rows of the staging table whose columns have the
+    values in the "replaced" mapping, e.g. all the rows of a match day. If
+    "replaced_from" is passed, only the rows whose columns are at least its
+    values are replaced, e.g. the snapshots taken since the pages of a season
+    were first archived.
+    """
+
+    replaced: dict[str, Any]
+    records: list[NamedTuple]
+    replaced_from: dict[str, Any] | None = None
+
+
+ArchiveParser = Callable[[PageArchive], Iterable[ArchiveBatch]]
+
+
+def reparse_from_archive(
+    db: Db,
+    schema: dict[str, DbTable],
+    parsers: dict[str, ArchiveParser],
+    archive: PageArchive,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> None:
+    """Run the parsers over the archived pages to rebuild the staging tables.
+
+    Each table is rebuilt and committed on its own. Rows of the parts of the
+    table with no archived page are left untouched.
+
+    Args:
+    ----
+        db: The database client.
+        schema: The schema of the database.
+        parsers: The functions parsing the archived pages, by staging table.
+        archive: The archive of the pages.
+        chunk_size: The number of records loaded into the tables at once.
+
+    """
+    for table_name, parse in parsers.items():
+        table = schema[table_name]
+        if not isinstance(table, StagingTable):
+            raise SetupError(f"Cannot rebuild '{table_name}' from archived pages.")
+        LOGGER.info("Rebuilding table %s from the archived pages", table_name)
+        try:
+            table.prepare(db)
+            n_batches = 0
+            for batch in parse(archive):
+                _delete_replaced_rows(db, table_name, batch)
+                table.load(db, batch.records, chunk_size=chunk_size)
+                n_batches += 1
+        except BaseException:
+            db.rollback()
+            raise
+        db.commit()
+        LOGGER.info("Rebuilt %d parts of table %s", n_batches, table_name)
+
+
+def _delete_replaced_rows(db: Db, table_name: str, batch: ArchiveBatch) -> None:
+    replaced_from = batch.replaced_from or {}
+    conditions = " AND ".join(
+        [f"{column} = ?" for column in batch.replaced]
+        + [f"{column} >= ?" for column in replaced_from]
+    )
+    db.execute(
+        f"DELETE FROM {table_name} WHERE {conditions}",
+        (*batch.replaced.values(), *replaced_from.values()),
+    )
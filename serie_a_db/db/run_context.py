@@ -0,0 +1,133 @@
+"""State shared by the extractors during an update run."""
+
+import threading
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from typing import Any, Callable, Iterable, Iterator, Self, TypeVar
+
+from serie_a_db.db.client import Db
+from serie_a_db.exceptions import SetupError
+from serie_a_db.utils import now
+
+T = TypeVar("T")
+
+
+class ConnectionPool:
+    """Connections to the database, reused across the extractors of a run.
+
+    Connections are opened when first needed, up to the size of the pool.
+    Each one is used by a single thread at a time, whatever the thread.
+    """
+
+    def __init__(self, connect: Callable[[], Db], size: int = 1) -> None:
+        self._connect = connect
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: LifoQueue[Db] = LifoQueue()
+        self._opened: list[Db] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_db(cls, db: Db, size: int = 1) -> Self:
+        """Create a pool of connections to the same database as the passed one."""
+
+        def connect() -> Db:
+            if db.path == ":memory:":
+                raise SetupError("Cannot open more connections to an in-memory db.")
+            return Db(db.path, profile=db.profile.name, check_same_thread=False)
+
+        return cls(connect, size)
+
+    @classmethod
+    def lending(cls, db: Db) -> Self:
+        """Create a pool lending the passed connection, which it does not own.
+
+        The connection is neither rolled back nor closed by the pool, which
+        allows to share an in-memory database.
+        """
+
+        def connect() -> Db:
+            raise SetupError("The pool cannot open other connections.")
+
+        pool = cls(connect)
+        pool._idle.put(db)
+        return pool
+
+    @contextmanager
+    def connection(self) -> Iterator[Db]:
+        """Borrow a connection from the pool, waiting if all are in use."""
+        with self._slots:
+            try:
+                db = self._idle.get_nowait()
+            except Empty:
+                db = self._connect()
+                with self._lock:
+                    self._opened.append(db)
+            try:
+                yield db
+            finally:
+                if db in self._opened:
+                    # End the read transaction, so that later commits are visible
+                    db.rollback()
+                self._idle.put(db)
+
+    def close(self) -> None:
+        """Close all the connections opened by the pool."""
+        with self._lock:
+            lent = []
+            while not self._idle.empty():
+                db = self._idle.get_nowait()
+                if db not in self._opened:
+                    lent.append(db)
+            for db in self._opened:
+                db.close_connection()
+            self._opened.clear()
+            for db in lent:
+                self._idle.put(db)
+
+
+class RunContext:
+    """State shared by the extractors during one update run.
+
+    It provides the load timestamp of the run, the connections to the
+    database and lookups which are computed once and reused by all the
+    extractors, until one of the tables they read is updated.
+    """
+
+    def __init__(self, pool: ConnectionPool, load_ts: str | None = None) -> None:
+        self.pool = pool
+        self.load_ts = load_ts or now().isoformat(sep=" ", timespec="milliseconds")
+        self._lookups: dict[str, tuple[frozenset[str], Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_db(cls, db: Db, pool_size: int = 1) -> Self:
+        """Create a context with connections to the same database as the passed one."""
+        return cls(ConnectionPool.for_db(db, pool_size))
+
+    def lookup(self, name: str, tables: Iterable[str], query: Callable[[Db], T]) -> T:
+        """Return the result of the query, running it only if not memoized.
+
+        Args:
+        ----
+            name: The name identifying the lookup.
+            tables: The tables the query reads from.
+            query: The function querying the database.
+
+        """
+        with self._lock:
+            if name not in self._lookups:
+                with self.pool.connection() as db:
+                    self._lookups[name] = (frozenset(tables), query(db))
+            return self._lookups[name][1]
+
+    def invalidate(self, table_names: Iterable[str]) -> None:
+        """Forget the lookups reading from any of the passed tables."""
+        changed = set(table_names)
+        with self._lock:
+            for name, (tables, _) in list(self._lookups.items()):
+                if not tables.isdisjoint(changed):
+                    del self._lookups[name]
+
+    def close(self) -> None:
+        """Release the resources held by the context."""
+        self.pool.close()
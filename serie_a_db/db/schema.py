@@ -4,10 +4,14 @@
 from serie_a_db.data_extraction.table_specific_extractors.st_fm_player import (
     scrape_player_data as scrape_player_data_fm,
 )
+from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player import (
+    reparse_player_data as reparse_player_data_fpi,
+)
 from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player import (
     scrape_player_data as scrape_player_data_fpi,
 )
 from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player_match import (
+    reparse_player_match_data,
     scrape_player_match_data,
 )
 from serie_a_db.data_extraction.table_specific_extractors.st_match import (
@@ -19,6 +23,7 @@ from serie_a_db.data_extraction.table_specific_extractors.st_match_day import (
 from serie_a_db.data_extraction.table_specific_extractors.st_player_cross_source_mapping import (
     derive_mappings,
 )
+from serie_a_db.db.reparse import ArchiveParser
 from serie_a_db.db.table import DbTable
 from serie_a_db.db.table import StagingTable as St
 from serie_a_db.db.table import WarehouseTable as Wt
@@ -29,22 +34,42 @@ TABLES: dict[str, DbTable] = {
     "dm_match_day": Wt.from_file("dm_match_day"),
     "dm_team": Wt.from_file("dm_team"),
     "dm_coach": Wt.from_file("dm_coach"),
-    "ft_match": Wt.from_file("ft_match"),
+    "ft_match": Wt.from_file("ft_match", incremental_sources=["st_match"]),
     "dm_player": Wt.from_file("dm_player"),
     "dm_data_source": Wt.from_file("dm_data_source"),
     "ft_player_role": Wt.from_file("ft_player_role"),
-    "ft_player_grade": Wt.from_file("ft_player_grade"),
-    "ft_player_match": Wt.from_file("ft_player_match"),
+    "ft_player_grade": Wt.from_file(
+        "ft_player_grade", incremental_sources=["st_fpi_player_match"]
+    ),
+    "ft_player_match": Wt.from_file(
+        "ft_player_match", incremental_sources=["st_fpi_player_match"]
+    ),
     # Staging tables
+    # Upstream tables are the ones the extractors read to decide what to extract
     "st_match_day": St.from_file("st_match_day", scrape_match_day_data),
-    "st_match": St.from_file("st_match", scrape_match_data),
-    "st_fpi_player": St.from_file("st_fpi_player", scrape_player_data_fpi),
-    "st_fm_player": St.from_file("st_fm_player", scrape_player_data_fm),
+    "st_match": St.from_file(
+        "st_match", scrape_match_data, upstream_tables={"dm_match_day"}
+    ),
+    "st_fpi_player": St.from_file(
+        "st_fpi_player", scrape_player_data_fpi, upstream_tables={"dm_season"}
+    ),
+    "st_fm_player": St.from_file(
+        "st_fm_player", scrape_player_data_fm, upstream_tables={"dm_season"}
+    ),
     "st_fpi_player_match": St.from_file(
-        "st_fpi_player_match", scrape_player_match_data
+        "st_fpi_player_match",
+        scrape_player_match_data,
+        upstream_tables={"dm_season", "dm_match_day"},
     ),
     "st_player_cross_source_mapping": St.from_file(
         "st_player_cross_source_mapping",
         derive_mappings,
+        upstream_tables={"dm_season", "st_fpi_player", "st_fm_player"},
     ),
 }
+
+# Staging tables which can be rebuilt by parsing the archived pages again
+ARCHIVE_PARSERS: dict[str, ArchiveParser] = {
+    "st_fpi_player": reparse_player_data_fpi,
+    "st_fpi_player_match": reparse_player_match_data,
+}
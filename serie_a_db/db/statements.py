@@ -0,0 +1,84 @@
+"""Named, parameterized statements run against the database."""
+
+import re
+from sqlite3 import Cursor
+from typing import TYPE_CHECKING, Any, NamedTuple, Sequence
+
+if TYPE_CHECKING:
+    from serie_a_db.db.client import Db
+
+IDENTIFIER = re.compile(r"\w+")
+
+# Values are bound as parameters, so that the statement text is the same
+# whatever the values. Identifiers cannot be bound: they are formatted in,
+# giving one statement text per table
+STATEMENTS = {
+    "count_rows": "SELECT COUNT(*) FROM {table_name}",
+    "max_rowid": "SELECT IFNULL(MAX(rowid), 0) FROM {table_name}",
+    "get_all_rows": "SELECT * FROM {table_name}",
+    "get_attributes": "SELECT name FROM PRAGMA_TABLE_INFO(?)",
+    "get_parameter": "SELECT value FROM dm_parameter WHERE key = ?",
+    "get_parameters": "SELECT key, value FROM dm_parameter ORDER BY key",
+    "get_watermarks": """
+        SELECT source_table_name, high_water_mark, definition_hash
+        FROM ft_tables_watermark
+        WHERE table_name = ?
+        """,
+    "get_input_markers": """
+        SELECT input_table_name, marker
+        FROM ft_tables_input
+        WHERE table_name = ?
+        """,
+}
+
+
+class StatementLookupStats(NamedTuple):
+    """Statements run through the registry since the connection opened."""
+
+    lookups: int
+    distinct_statements: int
+
+
+class StatementRegistry:
+    """Named statements, each always run with the same text.
+
+    sqlite3 keeps the compiled statements in a cache keyed by their text, so
+    running a registered statement again can skip compiling it. The stats
+    only count the lookups made through the registry and the distinct texts
+    they ran: sqlite3 does not expose its cache, whose hits also depend on
+    the other statements run on the connection.
+    """
+
+    def __init__(self, db: "Db") -> None:
+        self.db = db
+        self.statements = dict(STATEMENTS)
+        self._lookups = 0
+        self._distinct: set[str] = set()
+
+    def register(self, name: str, statement: str) -> None:
+        """Add a statement to the registry, replacing any with the same name."""
+        self.statements[name] = statement
+
+    def execute(
+        self, name: str, parameters: Sequence[Any] = (), **identifiers: str
+    ) -> Cursor:
+        """Run the named statement.
+
+        Args:
+        ----
+            name: The name of the statement.
+            parameters: The values bound to the statement placeholders.
+            identifiers: The table or column names formatted into the statement.
+
+        """
+        for identifier in identifiers.values():
+            if not IDENTIFIER.fullmatch(identifier):
+                raise ValueError(f"Invalid SQL identifier: '{identifier}'.")
+        statement = self.statements[name].format(**identifiers)
+        self._lookups += 1
+        self._distinct.add(statement)
+        return self.db.execute(statement, parameters)
+
+    def stats(self) -> StatementLookupStats:
+        """Return the lookups made through the registry since the connection opened."""
+        return StatementLookupStats(self._lookups, len(self._distinct))
@@ -1,13 +1,17 @@
 """Define the classes to represent the tables in the database."""
 
 import csv
+import hashlib
 import logging
 from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
-from typing import Callable, NamedTuple, Self
+from sqlite3 import Cursor
+from typing import Callable, Iterable, NamedTuple, Self
 
-from serie_a_db import DEFINITIONS_DIR, context
+from serie_a_db import DEFINITIONS_DIR, RECOVERY_DIR, context
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import RunContext
 from serie_a_db.exceptions import IncompatibleDataError, NoSuchTableError
 from serie_a_db.sql_parsing import (
     depends_on,
@@ -19,9 +23,12 @@ from serie_a_db.sql_parsing import (
     validate_create_statement_wh,
     validate_populate_statement_wh,
 )
+from serie_a_db.utils import chunked
 
 LOGGER = logging.getLogger(__name__)
 
+DEFAULT_CHUNK_SIZE = 5000
+
 
 class DbTable(ABC):
     """Generic table in the database."""
@@ -34,15 +41,26 @@ class DbTable(ABC):
         """Return the names of the tables this table depends on."""
 
     @abstractmethod
-    def update(self, db: Db) -> None:
-        """Return the names of the tables this table depends on."""
+    def update(self, db: Db) -> int:
+        """Update the table, returning the number of rows written."""
 
 
 class WarehouseTable(DbTable):
-    """Table containing the data for the 'production' environment."""
+    """Table containing the data for the 'production' environment.
+
+    A warehouse table can be populated incrementally from some of its
+    sources. In that case, only the rows of those sources added or replaced
+    since the last update are fed to the populate statement. This is only
+    correct if each row of the table is derived from single rows of the
+    incremental sources, with no aggregation across them.
+    """
 
     def __init__(
-        self, name: str, definition_statement: str, populate_statement: str
+        self,
+        name: str,
+        definition_statement: str,
+        populate_statement: str,
+        incremental_sources: Iterable[str] = (),
     ) -> None:
         super().__init__(name)
         self.definition_statement = validate_create_statement_wh(
@@ -51,9 +69,15 @@ class WarehouseTable(DbTable):
         self.populate_statement = validate_populate_statement_wh(
             populate_statement, name
         )
+        self.incremental_sources = tuple(incremental_sources)
 
     @classmethod
-    def from_file(cls, name: str, directory: Path = DEFINITIONS_DIR) -> Self:
+    def from_file(
+        cls,
+        name: str,
+        directory: Path = DEFINITIONS_DIR,
+        incremental_sources: Iterable[str] = (),
+    ) -> Self:
         """Instantiate a WarehouseTable from a file."""
         script = read_script_from_file(name, directory)
         statements = split_statements(script, num_expected=2)
@@ -61,6 +85,7 @@ class WarehouseTable(DbTable):
             name,
             validate_create_statement_wh(statements[0], name),
             validate_populate_statement_wh(statements[1], name),
+            incremental_sources,
         )
 
     def depends_on(self, schema: dict[str, Self]) -> set[str]:
@@ -68,37 +93,89 @@ class WarehouseTable(DbTable):
         all_tables = set(schema.keys())
         return depends_on(self.populate_statement, all_tables) - {self.name}
 
-    def update(self, db: Db) -> None:
-        """Return the names of the tables this table depends on."""
+    def update(self, db: Db, full_rebuild: bool = False) -> int:
+        """Update the table, returning the number of rows written."""
         LOGGER.info("Updating table %s", self.name)
+        table_existed = bool(db.get_attributes(self.name))
         db.execute(self.definition_statement)
-        db.execute(self.populate_statement)
-        db.commit()
+
+        if not self.incremental_sources:
+            return _rows_written(db.execute(self.populate_statement))
+
+        definition_hash = self.definition_hash(db)
+        high_water_marks = {
+            source: db.max_rowid(source) for source in self.incremental_sources
+        }
+        watermarks = db.meta.get_watermarks(self.name)
+        can_go_incremental = table_existed and all(
+            source in watermarks and watermarks[source][1] == definition_hash
+            for source in self.incremental_sources
+        )
+
+        if full_rebuild or not can_go_incremental:
+            n_rows = _rows_written(db.execute(self.populate_statement))
+        else:
+            LOGGER.info("Populating %s incrementally", self.name)
+            n_rows = self._populate_incrementally(
+                db, {source: mark for source, (mark, _) in watermarks.items()}
+            )
+        db.meta.set_watermarks(self.name, high_water_marks, definition_hash)
+        return n_rows
+
+    def _populate_incrementally(self, db: Db, watermarks: dict[str, int]) -> int:
+        """Run the populate statement on the new rows of the sources only.
+
+        Temporary views named after the sources take precedence over them,
+        so the populate statement is run unchanged.
+        """
+        for source in self.incremental_sources:
+            db.execute(
+                f"""CREATE TEMP VIEW {source} AS
+                SELECT * FROM main.{source} WHERE rowid > {watermarks[source]}"""
+            )
+        try:
+            return _rows_written(db.execute(self.populate_statement))
+        finally:
+            for source in self.incremental_sources:
+                db.execute(f"DROP VIEW IF EXISTS temp.{source}")
+
+    def definition_hash(self, db: Db) -> str:
+        """Hash whatever affects the content of the table besides its sources."""
+        parameters = db.meta.get_parameters()
+        content = "\n".join(
+            [self.definition_statement, self.populate_statement, repr(parameters)]
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
 
 
 class StagingTable(DbTable):
     """Table containing data extracted from external sources.
 
     Staging tables are used to store data to serve as input for the warehouse
-    tables.
+    tables. The extracted data can be any iterable of records, generators
+    included: it is loaded one chunk at a time, without holding all of it in
+    memory.
     """
 
     def __init__(
         self,
         name: str,
         definition_statement: str,
-        extract_external_data: Callable[[], list[NamedTuple]],
+        extract_external_data: Callable[[RunContext], Iterable[NamedTuple]],
+        upstream_tables: Iterable[str] = (),
     ) -> None:
         super().__init__(name)
         self.definition_statement = definition_statement
         self.extract_external_data = extract_external_data
+        self.upstream_tables = frozenset(upstream_tables)
 
     @classmethod
     def from_file(
         cls,
         name: str,
-        extract_external_data: Callable[[], list[NamedTuple]],
+        extract_external_data: Callable[[RunContext], Iterable[NamedTuple]],
         directory: Path = DEFINITIONS_DIR,
+        upstream_tables: Iterable[str] = (),
     ) -> Self:
         """Instantiate a StagingTable from a file."""
         script = read_script_from_file(name, directory)
@@ -107,11 +184,17 @@ class StagingTable(DbTable):
             name,
             validate_create_staging_statement(statements[0], name),
             extract_external_data,
+            upstream_tables,
         )
 
-    def depends_on(self, schema: dict[str, Self]) -> set[str]:  # noqa: ARG002
-        """Return the names of the tables this table depends on."""
-        return set()
+    def depends_on(self, schema: dict[str, Self]) -> set[str]:
+        """Return the names of the tables this table depends on.
+
+        Staging tables are populated from external sources, yet the extractors
+        might read from other tables to decide what to extract. Those tables
+        are declared as upstream tables, and only the ones in the schema count.
+        """
+        return set(self.upstream_tables.intersection(schema))
 
     @property
     def populate_statement(self) -> str:
@@ -128,33 +211,97 @@ class StagingTable(DbTable):
         """SQL statement to drop the staging table."""
         return derive_drop_table_statement(self.name)
 
-    def update(self, db: Db) -> None:
-        """Return the names of the tables this table depends on."""
+    def update(self, db: Db, run_context: RunContext | None = None) -> int:
+        """Extract the data from the external source and load it into the table.
+
+        Args:
+        ----
+            db: The database client.
+            run_context: The context of the update run. If not passed, one is
+                created just for this update.
+
+        Returns:
+        -------
+            The number of records loaded.
+
+        """
+        self.prepare(db)
+        if run_context is not None:
+            return self.load(db, self.extract_external_data(run_context))
+        run_context = RunContext.for_db(db)
+        try:
+            return self.load(db, self.extract_external_data(run_context))
+        finally:
+            run_context.close()
+
+    def prepare(self, db: Db) -> None:
+        """Make sure the table exists with the expected attributes.
+
+        This is the first step of the update. It is separated from the
+        extraction so that the latter can run outside of the main thread, and
+        so that the table can be committed beforehand, as extracting external
+        data might rely on it.
+        """
         LOGGER.info("Updating table %s", self.name)
 
         if self._table_should_be_recreated(db):
             # Drop and recreate the staging table
             db.execute(self.drop_statement)
             db.execute(self.definition_statement)
-            # Need to commit as extracting external data might rely on the table
-            db.commit()
+            # Rowids start over, so incremental updates cannot rely on them
+            db.meta.reset_watermarks(self.name)
 
-        data = self.extract_external_data()
-        if not data:
-            LOGGER.info("No data to load into %s", self.name)
-            return
+    def load(
+        self,
+        db: Db,
+        data: Iterable[NamedTuple],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_transaction: Callable[[], AbstractContextManager] = nullcontext,
+    ) -> int:
+        """Insert the extracted data into the table, one chunk at a time.
+
+        Args:
+        ----
+            db: The database client.
+            data: The records to insert.
+            chunk_size: The number of records inserted at once.
+            chunk_transaction: The transaction each chunk is inserted within.
+
+        Returns:
+        -------
+            The number of rows written, leaving out the records identical to
+            rows already in the table.
 
-        try:
-            self.error_if_data_incompatible(data, self.staging_attributes)
-            # New data will always overwrite the existing data on conflict
-            db.cursor.executemany(self.populate_statement, data)
-            db.commit()
-            LOGGER.info("%s records inserted into %s", len(data), self.name)
-        except Exception as e:
-            # If anything goes wrong, emergency save to local csv file
-            LOGGER.error("Something went wrong. Saving data to CSV file...")
-            self._save_to_csv(data)
-            raise e
+        """
+        chunks = chunked(data, chunk_size)
+        n_records = 0
+        n_written = 0
+        for chunk in chunks:
+            try:
+                with chunk_transaction():
+                    self.error_if_data_incompatible(chunk, self.staging_attributes)
+                    # New data will always overwrite the existing data on conflict
+                    db.cursor.executemany(self.populate_statement, chunk)
+                    n_written += _rows_written(db.cursor)
+            except Exception as e:
+                # If anything goes wrong, emergency save to csv file the chunk
+                # not inserted. The records after it are not extracted at all.
+                LOGGER.error("Something went wrong. Saving data to CSV file...")
+                self._save_to_csv(chunk)
+                raise e
+            n_records += len(chunk)
+            LOGGER.debug("%s records inserted into %s so far", n_records, self.name)
+
+        if n_records:
+            LOGGER.info(
+                "%s records loaded into %s, %s of them new or changed",
+                n_records,
+                self.name,
+                n_written,
+            )
+        else:
+            LOGGER.info("No data to load into %s", self.name)
+        return n_written
 
     def _table_should_be_recreated(self, db: Db) -> bool:
         """Check if the table should be recreated."""
@@ -177,21 +324,27 @@ class StagingTable(DbTable):
         query to insert the data into the staging table. We want to avoid
         loading data in the wrong place.
         """
-        # Assuming that if the first and last records are valid, the rest
-        # of the records are valid as well
-        if data[0]._fields != attributes:
-            raise IncompatibleDataError(attributes, data[0]._fields)
-        if data[-1]._fields != attributes:
-            raise IncompatibleDataError(attributes, data[-1]._fields)
+        # Records of the same type share the same fields, so checking one
+        # record per type is enough
+        for record in {type(record): record for record in data}.values():
+            if record._fields != attributes:
+                raise IncompatibleDataError(attributes, record._fields)
 
     def _save_to_csv(self, data: list[NamedTuple]) -> None:
-        """Save the data to a CSV file."""
-        with open(
-            f"recovery_{self.name}.csv", "w", encoding="utf-8", newline=""
-        ) as file:
+        """Save the data to a CSV file in the recovery directory."""
+        RECOVERY_DIR.mkdir(parents=True, exist_ok=True)
+        path = RECOVERY_DIR / f"recovery_{self.name}.csv"
+        with open(path, "w", encoding="utf-8", newline="") as file:
             writer = csv.writer(file)
             writer.writerow(data[0]._fields)
             writer.writerows(data)
+        LOGGER.error("Data not inserted into %s saved to %s", self.name, path)
+
+
+def _rows_written(cursor: Cursor) -> int:
+    """Return the number of rows written by the statement just executed."""
+    # The count is -1 for statements that write no rows, e.g. DDL
+    return max(cursor.rowcount, 0)
 
 
 def read_script_from_file(table_name: str, directory: Path) -> str:
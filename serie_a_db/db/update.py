@@ -1,26 +1,110 @@
 """Logic to update the db."""
 
-from datetime import datetime
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from enum import StrEnum
+from typing import Iterable, Iterator, NamedTuple
 
 from serie_a_db.db.client import Db
-from serie_a_db.db.table import DbTable
+from serie_a_db.db.graph import SchemaGraph
+from serie_a_db.db.ledger import UpdateLedger
+from serie_a_db.db.run_context import ConnectionPool, RunContext
+from serie_a_db.db.table import (
+    DEFAULT_CHUNK_SIZE,
+    DbTable,
+    StagingTable,
+    WarehouseTable,
+)
+from serie_a_db.exceptions import SetupError
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CommitPolicy(StrEnum):
+    """When the changes made by an update are committed.
+
+    Each step of a table update runs within a savepoint, so a failing step
+    rolls back alone. With the table policy, the update then stops. With the
+    level and run policies, the whole update of each table runs within a
+    savepoint too: a failing table is rolled back and recorded, the tables
+    downstream of it are skipped, and the rest of the run goes on. The first
+    failure is raised once the rest is committed.
+
+    With the level and run policies, extractors read through the connection
+    of the update, so that they see the tables updated before them in the
+    same run, and they run one at a time.
+    """
+
+    TABLE = "table"
+    LEVEL = "level"
+    RUN = "run"
 
 
 class DbUpdater:
     """Entity to update the database."""
 
-    def __init__(self, db: Db, schema: dict[str, DbTable]) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        db: Db,
+        schema: dict[str, DbTable],
+        *,
+        jobs: int = 1,
+        full_rebuild: bool = False,
+        commit_policy: CommitPolicy = CommitPolicy.TABLE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        extract: bool = True,
+    ) -> None:
         """Initialize the builder.
 
         Args:
         ----
             db: The database client.
             schema: The schema of the database.
+            jobs: The maximum number of staging tables extracting data from
+                external sources at the same time. Only supported with the
+                table commit policy.
+            full_rebuild: Whether warehouse tables should be populated from all
+                the rows of their sources, even if they support incremental
+                updates or none of their inputs changed.
+            commit_policy: Whether to commit after each table, after each
+                dependency level or once at the end of the run.
+            chunk_size: The number of records loaded into staging tables at
+                once. With the table commit policy, each chunk is committed
+                on its own.
+            extract: Whether staging tables extract new data from external
+                sources. If not, their current content is used as it is, e.g.
+                after rebuilding them from the archived pages.
 
         """
+        if jobs < 1:
+            raise SetupError(f"The number of jobs must be at least 1, got {jobs}.")
+        if jobs > 1 and commit_policy != CommitPolicy.TABLE:
+            raise SetupError(
+                f"Extracting with {jobs} jobs requires the table commit policy, "
+                f"got '{commit_policy}', as extractors must read through the "
+                "connection of the update otherwise."
+            )
         self.db = db
         self.schema = schema
-        self.update_start_ts = datetime.now()
+        self.graph = SchemaGraph(schema)
+        self.jobs = jobs
+        self.full_rebuild = full_rebuild
+        self.commit_policy = CommitPolicy(commit_policy)
+        self.chunk_size = chunk_size
+        self.extract = extract
+        self.ledger = UpdateLedger()
+        if self.commit_policy is CommitPolicy.TABLE:
+            self.run_context = RunContext.for_db(db, pool_size=jobs)
+        else:
+            # Tables updated earlier in the run are not committed yet, so only
+            # this connection sees them
+            self.run_context = RunContext(ConnectionPool.lending(db))
+        self._markers: dict[str, str] = {}
+        self._changed_tables: set[str] = set()
+        self._stop_extracting = threading.Event()
+        self._failures: dict[str, Exception] = {}
 
     def update_all_tables(self) -> None:
         """Update all tables in the schema."""
@@ -29,22 +113,284 @@ class DbUpdater:
     def update_tables(self, tables: dict[str, DbTable]) -> None:
         """Update the passed tables and their upstream dependencies.
 
+        Tables are updated as soon as all their upstream dependencies are
+        up to date. Staging tables ready at the same time extract their data
+        concurrently on a pool of workers, while all the writes to the
+        database happen on the calling thread, one at a time.
+
+        With the level commit policy, tables are updated one dependency level
+        at a time instead, committing at the end of each level.
+
         Args:
         ----
             tables: The tables to update.
 
+        Raises:
+        ------
+            Exception: The first table update failing. With the level and run
+                policies, it is raised after the other tables are updated.
+
         """
-        for table in tables.values():
-            self.update_table_and_upstream_dependencies(table)
+        to_update = set(tables) | self.graph.upstream(tables)
+        self._failures.clear()
+        try:
+            if self.commit_policy is CommitPolicy.LEVEL:
+                for level in self.graph.levels(to_update):
+                    self._update_in_dependency_order({name: set() for name in level})
+                    # The level is committed along with the log of its updates
+                    self.ledger.flush(self.db)
+                    self._commit()
+            else:
+                self._update_in_dependency_order(
+                    {
+                        name: set(self.graph.dependencies(name))
+                        for name in self.graph.topological_order
+                        if name in to_update
+                    }
+                )
+        except BaseException:
+            if self.commit_policy is not CommitPolicy.TABLE:
+                # Failing tables roll back alone, so this is e.g. an interruption
+                self.db.rollback()
+                self.ledger.discard_unflushed()
+            raise
+        finally:
+            # Whatever succeeded is committed along with the log of the updates
+            self.ledger.flush(self.db)
+            self._commit()
+            self.run_context.close()
+        if self._failures:
+            raise next(iter(self._failures.values()))
 
     def update_table_and_upstream_dependencies(self, table: DbTable) -> None:
         """Update the passed table and its upstream dependencies."""
-        for dependency in table.depends_on(self.schema):
-            self.update_table_and_upstream_dependencies(self.schema[dependency])
+        self.update_tables({table.name: table})
+
+    def _update_in_dependency_order(self, dependencies: dict[str, set[str]]) -> None:
+        """Update the tables as soon as their dependencies are up to date."""
+        pending = dict(dependencies)
+        done: set[str] = set()
+        extracting: dict[Future[Iterable[NamedTuple]], StagingTable] = {}
+
+        pool = ThreadPoolExecutor(self.jobs, thread_name_prefix="extract")
+        try:
+            while pending or extracting:
+                for name in self._pop_ready_tables(pending, done):
+                    # Do not update if already updated at this runtime
+                    if self.ledger.was_updated(name):
+                        done.add(name)
+                        continue
+                    upstream = self.graph.upstream([name])
+                    if failed := sorted(upstream & self._failures.keys()):
+                        LOGGER.warning(
+                            "Skipping table %s as upstream tables %s failed", name, failed
+                        )
+                        done.add(name)
+                        continue
+                    table = self.schema[name]
+                    with self._isolated_update(name):
+                        if isinstance(table, StagingTable):
+                            future = self._update_staging_table(table, pool, done)
+                            if future is not None:
+                                extracting[future] = table
+                        elif isinstance(table, WarehouseTable):
+                            with self._atomic_step(name):
+                                n_rows = self._update_warehouse_table(table)
+                            if n_rows is not None:
+                                self._mark_as_updated(name, n_rows, done)
+                            else:
+                                done.add(name)
+                        else:
+                            with self._atomic_step(name):
+                                n_rows = table.update(self.db)
+                            self._mark_as_updated(name, n_rows, done)
+                    if name in self._failures:
+                        done.add(name)
+
+                finished, _ = wait(extracting, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    staging_table = extracting.pop(future)
+                    n_rows = self._load_staging_table(staging_table, future.result())
+                    self._mark_as_updated(staging_table.name, n_rows, done)
+        except BaseException:
+            # Running extractions stop at their next record and, as their data
+            # would be thrown away, the error is raised without waiting for them
+            self._stop_extracting.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+    def _update_staging_table(
+        self, table: StagingTable, pool: ThreadPoolExecutor, done: set[str]
+    ) -> Future[Iterable[NamedTuple]] | None:
+        """Update the staging table, or start extracting its data on the pool.
+
+        Returns
+        -------
+            The future of the extraction, if running on the pool.
+
+        """
+        with self._atomic_step():
+            table.prepare(self.db)
+        if not self.extract:
+            done.add(table.name)
+            return None
+        if self.jobs > 1 and self.commit_policy is CommitPolicy.TABLE:
+            return pool.submit(
+                _extract_all, table, self.run_context, self._stop_extracting
+            )
+        data = table.extract_external_data(self.run_context)
+        n_rows = self._load_staging_table(table, data)
+        self._mark_as_updated(table.name, n_rows, done)
+        return None
+
+    def _load_staging_table(
+        self, table: StagingTable, data: Iterable[NamedTuple]
+    ) -> int:
+        """Load the data into the staging table, each chunk as a separate step."""
+        return table.load(
+            self.db,
+            data,
+            chunk_size=self.chunk_size,
+            chunk_transaction=lambda: self._atomic_step(table.name),
+        )
+
+    @contextmanager
+    def _atomic_step(self, changed_table: str | None = None) -> Iterator[None]:
+        """Make a step of a table update all-or-nothing.
+
+        The step is committed straight away with the table commit policy.
+
+        Args:
+        ----
+            changed_table: The table whose content the step might change.
+
+        """
+        self.db.execute("SAVEPOINT table_update_step")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK TO table_update_step")
+            self.db.execute("RELEASE table_update_step")
+            raise
+        self.db.execute("RELEASE table_update_step")
+        if changed_table is not None:
+            self._changed_tables.add(changed_table)
+        if self.commit_policy is CommitPolicy.TABLE:
+            self._commit()
+        else:
+            # Extractors read through this connection, which sees the changes
+            # before they are committed
+            self.run_context.invalidate(self._changed_tables)
+            self._changed_tables.clear()
+
+    @contextmanager
+    def _isolated_update(self, table_name: str) -> Iterator[None]:
+        """Roll back a failing table alone and record the failure, keeping the run going.
+
+        With the table commit policy, each step is committed on its own and
+        the failure is raised straight away instead.
+
+        Args:
+        ----
+            table_name: The table being updated.
 
-        # Do not update if already updated at this runtime
-        if self.db.meta.was_updated_since(table.name, self.update_start_ts):
+        """
+        if self.commit_policy is CommitPolicy.TABLE:
+            yield
             return
+        self.db.execute("SAVEPOINT table_update")
+        try:
+            yield
+        except Exception as error:
+            self.db.execute("ROLLBACK TO table_update")
+            self.db.execute("RELEASE table_update")
+            self.run_context.invalidate({table_name})
+            LOGGER.exception("Failed to update table %s, rolled it back", table_name)
+            self._failures[table_name] = error
+        else:
+            self.db.execute("RELEASE table_update")
+
+    def _commit(self) -> None:
+        """Commit, then forget the lookups made stale by the committed changes.
+
+        With the table commit policy, extractors read through their own
+        connections, so lookups only change once the changes are committed.
+        """
+        self.db.commit()
+        self.run_context.invalidate(self._changed_tables)
+        self._changed_tables.clear()
+
+    @staticmethod
+    def _pop_ready_tables(pending: dict[str, set[str]], done: set[str]) -> Iterator[str]:
+        """Yield the pending tables whose dependencies are all up to date.
+
+        Tables marked as done while iterating are taken into account.
+        """
+        while ready := [name for name, deps in pending.items() if deps <= done]:
+            for name in ready:
+                del pending[name]
+                yield name
+
+    def _update_warehouse_table(self, table: WarehouseTable) -> int | None:
+        """Update the warehouse table unless none of its inputs changed.
+
+        The inputs are the table itself and all the tables upstream of it.
+        Staging tables are marked by their content, warehouse tables by their
+        definition, as the latter are fully determined by their own inputs.
+
+        Returns
+        -------
+            The number of rows written, None if the table was not updated.
+
+        """
+        inputs = self.graph.upstream([table.name]) | {table.name}
+        markers = {
+            name: self._marker(name)
+            for name in self.graph.topological_order
+            if name in inputs
+        }
+        if (
+            not self.full_rebuild
+            and self.db.get_attributes(table.name)
+            and self.db.meta.get_input_markers(table.name) == markers
+        ):
+            LOGGER.info("Skipping table %s as none of its inputs changed", table.name)
+            return None
+
+        # Stored in the same step as the table update
+        self.db.meta.set_input_markers(table.name, markers)
+        return table.update(self.db, full_rebuild=self.full_rebuild)
+
+    def _marker(self, table_name: str) -> str:
+        """Return a value that changes whenever the table's content might."""
+        if table_name not in self._markers:
+            table = self.schema[table_name]
+            if isinstance(table, WarehouseTable):
+                marker = table.definition_hash(self.db)
+            else:
+                n_rows = self.db.count_rows(table_name)
+                marker = f"{n_rows}:{self.db.max_rowid(table_name)}"
+            self._markers[table_name] = marker
+        return self._markers[table_name]
+
+    def _mark_as_updated(self, table_name: str, n_rows: int, done: set[str]) -> None:
+        self.ledger.record(table_name, n_rows)
+        done.add(table_name)
+
+
+def _extract_all(
+    table: StagingTable, run_context: RunContext, stop: threading.Event
+) -> list[NamedTuple]:
+    """Extract all the data of the staging table, e.g. on a worker thread.
 
-        table.update(self.db)
-        self.db.meta.log_table_update(table.name)
+    Extractors yield their records lazily, so the extraction only runs when
+    the records are consumed. It stops early, at the next record, once the
+    stop event is set.
+    """
+    records = []
+    for record in table.extract_external_data(run_context):
+        if stop.is_set():
+            break
+        records.append(record)
+    return records
@@ -46,6 +46,14 @@ class ColumnsNotFoundError(InvalidSqlScriptError):
         super().__init__(msg)
 
 
+class CyclicDependencyError(SetupError):
+    """The tables in the schema depend on each other in a loop."""
+
+    def __init__(self, tables: list[str]) -> None:
+        message = f"Cyclic dependency detected among the tables: {tables}."
+        super().__init__(message)
+
+
 class TableUpdateError(Exception):
     """Any error related to the table update."""
 
@@ -66,6 +74,14 @@ class IncompatibleDataError(TableUpdateError):
         super().__init__(msg)
 
 
+class UnexpectedPayloadError(ValueError):
+    """The payload of an API does not have the schema expected."""
+
+    def __init__(self, source: str, specific_message: str) -> None:
+        message = f"Unexpected payload of the {source}: {specific_message}."
+        super().__init__(message)
+
+
 class NoSuchTableError(OperationalError):
     """The table does not exist in the database."""
 
@@ -3,6 +3,10 @@ CREATE TABLE IF NOT EXISTS ft_tables_update (
     datetime_updated STR CHECK (
         datetime_updated = strftime('%Y-%m-%d %H:%M:%f', datetime_updated)
     ),
-    rows_number INT NOT NULL,
-    PRIMARY KEY (table_name, datetime_updated)
+    -- Rows of the table after the update, only logged by earlier versions
+    rows_number INT,
+    rows_written INT,
+    run_id STR NOT NULL,
+    sequence INT NOT NULL,
+    PRIMARY KEY (run_id, sequence)
 );
\ No newline at end of file
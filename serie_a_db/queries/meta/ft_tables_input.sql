@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS ft_tables_input (
+    table_name STR NOT NULL,
+    input_table_name STR NOT NULL,
+    marker STR NOT NULL,
+    PRIMARY KEY (table_name, input_table_name)
+);
\ No newline at end of file
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS ft_tables_watermark (
+    table_name STR NOT NULL,
+    source_table_name STR NOT NULL,
+    high_water_mark INT NOT NULL,
+    definition_hash STR NOT NULL,
+    PRIMARY KEY (table_name, source_table_name)
+);
\ No newline at end of file
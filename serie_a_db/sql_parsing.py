@@ -47,12 +47,13 @@ def validate_create_staging_statement(statement: str, table_name: str) -> str:
 
 
 def depends_on(statement: str, all_tables: set[str]) -> set[str]:
-    """Extract the tables that the statement depends on."""
-    return {
-        table
-        for table in all_tables
-        if re.findall(rf" {table}[^/w_-]", statement, re.IGNORECASE)
-    }
+    """Extract the tables that the statement depends on.
+
+    The statement is scanned once to collect the words following a space,
+    which are then matched against the table names.
+    """
+    words = {word.lower() for word in re.findall(r"(?<= )\w+", statement)}
+    return {table for table in all_tables if table.lower() in words}
 
 
 def derive_populate_staging_statement(
@@ -61,16 +62,23 @@ def derive_populate_staging_statement(
     """Infer the INSERT statement for populating the staging table.
 
     The statement is inferred by extracting the columns from the CREATE TABLE
-    statement.
+    statement. On conflict, the existing row is replaced rather than updated
+    in place, so that the new version gets a higher rowid. This is what
+    incremental warehouse tables rely on to spot the changed rows. Rows
+    identical to one already in the table are skipped, keeping their rowid,
+    so that loading the same data again does not look like a change.
     """
     columns = extract_attributes_from_create_statement(definition_statement)
     columns_str = ", ".join(columns)
-    question_marks = ", ".join("?" for _ in columns)
-    conflicts = ", ".join(f"{col} = excluded.{col}" for col in columns)
-    return f"""INSERT INTO {table_name}({columns_str})
-    VALUES({question_marks})
-    ON CONFLICT DO UPDATE
-    SET {conflicts};"""
+    parameters = ", ".join(f"?{i}" for i in range(1, len(columns) + 1))
+    same_values = " AND ".join(
+        f"{column} IS ?{i}" for i, column in enumerate(columns, start=1)
+    )
+    return f"""INSERT OR REPLACE INTO {table_name}({columns_str})
+    SELECT {parameters}
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {table_name} WHERE {same_values}
+    );"""
 
 
 def extract_attributes_from_create_statement(create_statement: str) -> tuple[str, ...]:
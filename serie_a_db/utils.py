@@ -2,7 +2,9 @@
 
 import datetime
 import re
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator, TypeVar
 
 import yaml
 
@@ -21,6 +23,19 @@ def split_no_empty(string: str, sep: str, maxplit: int = -1) -> list[str]:
     ]
 
 
+T = TypeVar("T")
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split the iterable into lists of the passed size, the last one shorter.
+
+    The iterable is consumed lazily, one chunk at a time.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
 def from_camel_to_snake_case(name: str) -> str:
     """Convert a camel case string to snake case."""
     return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
@@ -3,7 +3,9 @@ from datetime import datetime
 import pytest
 
 from serie_a_db import CONFIG_FILE, utils
+from serie_a_db.db import table
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import ConnectionPool, RunContext
 
 
 @pytest.fixture(name="db")
@@ -12,12 +14,26 @@ def in_memory_db():
     db = Db.in_memory()
     db.meta.create_meta_tables()
     db.meta.set_parameters(utils.read_yaml(CONFIG_FILE)["parameters"])
+    db.commit()
     try:
         yield db
     finally:
         db.close_connection()
 
 
+@pytest.fixture()
+def recovery_dir(tmp_path, monkeypatch):
+    """Save the data not inserted to a temporary directory."""
+    monkeypatch.setattr(table, "RECOVERY_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture()
+def run_context(db: Db):
+    """Provide a run context lending the in-memory db to the extractors."""
+    return RunContext(ConnectionPool.lending(db))
+
+
 DEFAULT_FROZEN_TIME = datetime(2024, 1, 1, 12, 0, 0)
 
 
@@ -1,4 +1,8 @@
+import pytest
+
 from serie_a_db.db.client import Db
+from serie_a_db.db.profile import PROFILE_ENV_VAR
+from serie_a_db.exceptions import SetupError
 
 
 def test_parameters_inserted_into_db_should_be_retrievable(db: Db):
@@ -36,3 +40,142 @@ def test_select_with_attribute_names(db: Db):
 
     # Assert
     assert actual == [("dummy_attr", "dummy_attr2"), (1, "a")]
+
+
+def test_legacy_tables_update_should_be_rebuilt_with_the_new_key():
+    # Arrange
+    db = Db.in_memory()
+    db.execute(
+        """CREATE TABLE ft_tables_update (
+            table_name STR,
+            datetime_updated STR,
+            rows_number INT NOT NULL,
+            PRIMARY KEY (table_name, datetime_updated)
+        );"""
+    )
+    logged_at = "2024-01-01 12:00:00.000"
+    n_table_rows = 10
+    db.execute(
+        "INSERT INTO ft_tables_update VALUES ('dm_dummy', ?, ?)",
+        (logged_at, n_table_rows),
+    )
+
+    # Act
+    db.meta.create_meta_tables()
+    # Two updates of the same table at the same time no longer collide
+    db.execute(
+        "INSERT INTO ft_tables_update VALUES ('dm_dummy', ?, NULL, 1, 'run', 0)",
+        (logged_at,),
+    )
+    db.execute(
+        "INSERT INTO ft_tables_update VALUES ('dm_dummy', ?, NULL, 2, 'run', 1)",
+        (logged_at,),
+    )
+
+    # Assert
+    assert db.get_attributes("ft_tables_update") == (
+        "table_name",
+        "datetime_updated",
+        "rows_number",
+        "rows_written",
+        "run_id",
+        "sequence",
+    )
+    assert db.get_all_rows("ft_tables_update")[0] == (
+        "dm_dummy",
+        logged_at,
+        n_table_rows,
+        None,
+        "legacy",
+        1,
+    )
+
+
+def test_rows_logged_with_a_run_id_should_be_moved_to_the_rows_written():
+    # Arrange
+    db = Db.in_memory()
+    db.execute(
+        """CREATE TABLE ft_tables_update (
+            table_name STR,
+            datetime_updated STR,
+            rows_number INT NOT NULL,
+            run_id STR,
+            sequence INT,
+            PRIMARY KEY (table_name, datetime_updated)
+        );"""
+    )
+    n_rows_written = 3
+    db.execute(
+        "INSERT INTO ft_tables_update VALUES ('dm_dummy', ?, ?, 'run', 0)",
+        ("2024-01-01 12:00:00.000", n_rows_written),
+    )
+
+    # Act
+    db.meta.create_meta_tables()
+
+    # Assert
+    assert db.select(
+        "SELECT rows_number, rows_written, run_id, sequence FROM ft_tables_update"
+    ) == [(None, n_rows_written, "run", 0)]
+
+
+def test_connection_profile_should_set_the_pragmas(tmp_path):
+    # Act
+    db = Db(tmp_path / "db.sqlite", profile="bulk-load")
+
+    # Assert
+    assert db.select("PRAGMA journal_mode") == [("wal",)]
+    assert db.select("PRAGMA synchronous") == [(0,)]
+    assert db.select("PRAGMA busy_timeout") == [(30000,)]
+    assert db.select("PRAGMA foreign_keys") == [(0,)]
+    db.close_connection()
+
+
+def test_connection_profile_should_be_overridable_per_process(monkeypatch):
+    # Arrange
+    monkeypatch.setenv(PROFILE_ENV_VAR, "serving")
+
+    # Act
+    db = Db.in_memory()
+
+    # Assert
+    assert db.profile.name == "serving"
+    assert db.select("PRAGMA foreign_keys") == [(1,)]
+    db.close_connection()
+
+
+def test_unknown_connection_profile_should_raise_error():
+    with pytest.raises(SetupError):
+        Db.in_memory(profile="unknown")
+
+
+def test_repeated_lookups_should_run_the_same_statement_text(db: Db):
+    # Arrange
+    db.meta.get_parameter("bonus_goal")
+    before = db.statements.stats()
+    keys = ("bonus_goal", "bonus_assist", "bonus_red_card")
+
+    # Act
+    for key in keys:
+        db.meta.get_parameter(key)
+
+    # Assert
+    after = db.statements.stats()
+    assert after.lookups == before.lookups + len(keys)
+    assert after.distinct_statements == before.distinct_statements
+
+
+def test_registered_statement_should_be_executable_by_name(db: Db):
+    # Arrange
+    db.statements.register("get_bonus", "SELECT value FROM dm_parameter WHERE key = ?")
+
+    # Act
+    value = db.statements.execute("get_bonus", ("bonus_goal",)).fetchone()[0]
+
+    # Assert
+    assert value == db.meta.get_parameter("bonus_goal")
+
+
+def test_invalid_identifier_should_not_be_formatted_into_a_statement(db: Db):
+    with pytest.raises(ValueError):
+        db.count_rows("dm_parameter; DROP TABLE dm_parameter")
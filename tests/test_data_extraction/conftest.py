@@ -0,0 +1,21 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture(name="server_url")
+def local_server(handler):
+    """Serve the requests on a local server, with the handler of the module.
+
+    Each module using the server defines the handler fixture, providing the
+    class handling the requests with its state reset.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
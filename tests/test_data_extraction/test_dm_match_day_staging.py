@@ -4,9 +4,10 @@ from serie_a_db.data_extraction.table_specific_extractors.st_match_day import (
     scrape_match_day_data,
 )
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import RunContext
 
 
-def test_scraping_match_day_data(db: Db):
+def test_scraping_match_day_data(run_context: RunContext):
     # Arrange
     serie_a_client = Mock()
     serie_a_client.get_homepage.return_value = r"""
@@ -33,7 +34,7 @@ def test_scraping_match_day_data(db: Db):
     }
 
     # Act
-    data = scrape_match_day_data(db, serie_a_client)
+    data = list(scrape_match_day_data(run_context, serie_a_client))
 
     # Assert
     assert data == [
@@ -42,7 +43,7 @@ def test_scraping_match_day_data(db: Db):
     ]
 
 
-def test_seasons_earlier_than_earliest_year_are_ignored(db: Db):
+def test_seasons_earlier_than_earliest_year_are_ignored(db: Db, run_context: RunContext):
     # Arrange
     serie_a_client = Mock()
     serie_a_client.get_homepage.return_value = r"""
@@ -67,7 +68,7 @@ def test_seasons_earlier_than_earliest_year_are_ignored(db: Db):
     earliest_season = db.meta.get_parameter("include_seasons_from_year")
 
     # Act
-    data = scrape_match_day_data(db, serie_a_client)
+    data = list(scrape_match_day_data(run_context, serie_a_client))
 
     # Assert
     assert all(row.season_year_start >= earliest_season for row in data)
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from serie_a_db.data_extraction.clients.fetch_engine import Fetch, FetchEngine
+
+
+class InFlightTracker:
+    """Record the maximum number of calls running at once for each host."""
+
+    def __init__(self) -> None:
+        self.running: Counter[str] = Counter()
+        self.max_running: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def call(self, host: str, value: int, seconds: float = 0.05):
+        def call():
+            with self._lock:
+                self.running[host] += 1
+                self.max_running[host] = max(self.max_running[host], self.running[host])
+            time.sleep(seconds)
+            with self._lock:
+                self.running[host] -= 1
+            return value
+
+        return call
+
+
+def test_requests_in_flight_should_be_limited_per_host():
+    # Arrange
+    engine = FetchEngine(max_in_flight=3, host_max_in_flight={"slow.com": 1})
+    tracker = InFlightTracker()
+    fetches = [
+        Fetch(f"{host}{i}", host, tracker.call(host, i))
+        for host in ("fast.com", "slow.com")
+        for i in range(6)
+    ]
+
+    # Act
+    results = list(engine.fetch_all(fetches))
+
+    # Assert
+    assert len(results) == len(fetches)
+    assert tracker.max_running == {"fast.com": 3, "slow.com": 1}
+
+
+def test_results_should_be_yielded_as_they_complete():
+    # Arrange
+    engine = FetchEngine(max_in_flight=2)
+    tracker = InFlightTracker()
+    fetches = [
+        Fetch("slow", "foo.com", tracker.call("foo.com", 1, seconds=0.2)),
+        Fetch("fast", "foo.com", tracker.call("foo.com", 2, seconds=0)),
+    ]
+
+    # Act
+    keys = [result.key for result in engine.fetch_all(fetches)]
+
+    # Assert
+    assert keys == ["fast", "slow"]
+
+
+def test_results_should_be_yielded_in_order_if_requested():
+    # Arrange
+    engine = FetchEngine(max_in_flight=3)
+    tracker = InFlightTracker()
+    fetches = [
+        Fetch(i, "foo.com", tracker.call("foo.com", i, seconds=0.05 * (3 - i)))
+        for i in range(3)
+    ]
+
+    # Act
+    values = [result.get() for result in engine.fetch_in_order(fetches)]
+
+    # Assert
+    assert values == [0, 1, 2]
+
+
+def test_errors_should_be_returned_in_the_results():
+    # Arrange
+    engine = FetchEngine()
+
+    def fail():
+        raise ConnectionError("Unreachable")
+
+    # Act
+    (result,) = engine.fetch_all([Fetch("key", "foo.com", fail)])
+
+    # Assert
+    assert isinstance(result.error, ConnectionError)
+    with pytest.raises(ConnectionError):
+        result.get()
+
+
+def test_requests_not_sent_should_be_cancelled_if_iteration_stops():
+    # Arrange
+    engine = FetchEngine(max_in_flight=1)
+    tracker = InFlightTracker()
+    calls = []
+
+    def call(i):
+        calls.append(i)
+        return tracker.call("foo.com", i, seconds=0.01)()
+
+    fetches = [Fetch(i, "foo.com", lambda i=i: call(i)) for i in range(10)]
+    n_processed = 2
+
+    # Act
+    results = engine.fetch_in_order(fetches)
+    for _ in range(n_processed):
+        next(results)
+    results.close()
+
+    # Assert
+    assert len(calls) < len(fetches)
+
+
+def test_prefetched_results_should_be_yielded_in_order():
+    # Arrange
+    engine = FetchEngine(max_in_flight=3, max_prefetched=1)
+    tracker = InFlightTracker()
+    fetches = [
+        Fetch(i, "foo.com", tracker.call("foo.com", i, seconds=0.05 * (3 - i)))
+        for i in range(3)
+    ]
+
+    # Act
+    values = [result.get() for result in engine.prefetch_in_order(fetches)]
+
+    # Assert
+    assert values == [0, 1, 2]
+
+
+def test_prefetching_should_go_on_while_the_caller_waits_up_to_the_limit():
+    # Arrange
+    engine = FetchEngine(max_in_flight=1, max_prefetched=1)
+    tracker = InFlightTracker()
+    calls = []
+
+    def call(i):
+        calls.append(i)
+        return tracker.call("foo.com", i, seconds=0.01)()
+
+    fetches = [Fetch(i, "foo.com", lambda i=i: call(i)) for i in range(10)]
+
+    # Act
+    results = engine.prefetch_in_order(fetches)
+    next(results)
+    time.sleep(0.3)
+    n_calls = len(calls)
+    results.close()
+
+    # Assert
+    assert 1 < n_calls < len(fetches)
@@ -0,0 +1,90 @@
+import csv
+
+import pytest
+
+from serie_a_db.data_extraction import html_parsing
+from serie_a_db.data_extraction.html_parsing import parse_html
+from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player import (
+    parse_players_page,
+)
+from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player_match import (
+    parse_match_day_page,
+)
+from tests.test_data_extraction import EXTRACTION_TEST_DATA_DIR
+
+A_MATCH_DAY_ID = "S23M01"
+A_SEASON_ID = "S23"
+A_LOAD_TS = "2024-01-01 12:00:00.000"
+A_PAGE = """
+<html><body>
+    <ul>
+        <li class="team team-table" data-value="1"><a title="Foo">Foo <b>Bar</b></a></li>
+        <li class="team"><a>Baz</a></li>
+    </ul>
+</body></html>
+"""
+
+
+@pytest.fixture(params=["html.parser", "lxml"])
+def backend(request):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    return request.param
+
+
+def test_elements_should_be_found_by_tag_class_and_attributes(backend):
+    # Act
+    root = parse_html(A_PAGE, backend=backend)
+
+    # Assert
+    assert [item.text for item in root.find_all("li", cls="team")] == ["Foo Bar", "Baz"]
+    assert root.find("li", cls="team-table").attr("data-value") == "1"
+    assert root.find(title="Foo").text == "Foo Bar"
+    assert root.contains("a", title=True)
+    assert not root.contains("a", title="Baz")
+
+
+def test_missing_elements_should_raise_value_error(backend):
+    # Arrange
+    root = parse_html(A_PAGE, backend=backend)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="No element"):
+        root.find("table")
+
+
+@pytest.mark.parametrize(
+    "page_name", ["player_entire_player_list.html", "player_one_player.html"]
+)
+def test_backends_should_parse_the_same_records(monkeypatch, page_name):
+    # Arrange
+    pytest.importorskip("lxml")
+    page = (EXTRACTION_TEST_DATA_DIR / "fpi" / page_name).read_text()
+    records = {}
+
+    # Act
+    for backend in html_parsing.BACKENDS:
+        monkeypatch.setattr(html_parsing, "get_backend", lambda backend=backend: backend)
+        records[backend] = parse_players_page(page, A_SEASON_ID, load_ts=A_LOAD_TS)
+
+    # Assert
+    assert records["lxml"] == records["html.parser"]
+
+
+def test_grades_page_should_be_parsed_as_by_the_document_tree_parser():
+    # Arrange
+    data_dir = EXTRACTION_TEST_DATA_DIR / "fpi"
+    page = (data_dir / "player_match_entire_real_page.html").read_text()
+    # Records parsed from the page when it went through the document tree
+    expected_path = data_dir / "player_match_entire_real_page_records.csv"
+    with open(expected_path, encoding="utf-8", newline="") as file:
+        fields, *expected = csv.reader(file)
+
+    # Act
+    records = list(parse_match_day_page(page, A_MATCH_DAY_ID))
+
+    # Assert
+    assert len(records) == len(expected)
+    for record, expected_values in zip(records, expected, strict=True):
+        assert record._fields == tuple(fields)
+        assert [str(value) for value in record] == expected_values
@@ -0,0 +1,108 @@
+from http.server import BaseHTTPRequestHandler
+from typing import ClassVar
+
+import pytest
+
+from serie_a_db.data_extraction.clients.http_cache import HttpCache
+from serie_a_db.data_extraction.clients.transport import Transport
+
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    statuses: ClassVar[list[int]] = []
+
+    def do_GET(self):  # noqa: N802
+        if self.headers.get("If-None-Match") == ETAG:
+            self.statuses.append(304)
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            body = f"content of {self.path}".encode()
+            self.statuses.append(200)
+            self.send_response(200)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    Handler.statuses = []
+    return Handler
+
+
+@pytest.fixture(name="make_transport")
+def transport_factory(tmp_path):
+    transports = []
+
+    def make_transport(**cache_kwargs) -> Transport:
+        cache_kwargs.setdefault("max_size_bytes", 1024)
+        transport = Transport(cache=HttpCache(tmp_path / "cache", **cache_kwargs))
+        transports.append(transport)
+        return transport
+
+    yield make_transport
+    for transport in transports:
+        transport.close()
+
+
+def test_cached_response_should_be_revalidated_once_expired(server_url, make_transport):
+    # Arrange
+    transport = make_transport(default_ttl=0)
+    transport.get(server_url + "/page")
+
+    # Act
+    resp = transport.get(server_url + "/page")
+
+    # Assert
+    assert Handler.statuses == [200, 304]
+    assert resp.text == "content of /page"
+
+
+def test_fresh_response_should_be_reused_across_runs(server_url, make_transport):
+    # Arrange
+    make_transport(ttls={"/page": 3600}).get(server_url + "/page")
+
+    # Act
+    resp = make_transport(ttls={"/page": 3600}).get(server_url + "/page")
+
+    # Assert
+    assert Handler.statuses == [200]
+    assert resp.text == "content of /page"
+
+
+def test_immutable_response_should_never_be_requested_again(server_url, make_transport):
+    # Arrange
+    transport = make_transport(default_ttl=0)
+    transport.get(server_url + "/completed", immutable=True)
+
+    # Act
+    transport.get(server_url + "/completed")
+
+    # Assert
+    assert Handler.statuses == [200]
+
+
+def test_least_recently_used_responses_should_be_evicted(server_url, make_transport):
+    # Arrange
+    size = len("content of /page_0")
+    transport = make_transport(max_size_bytes=2 * size, ttls={"/page": 3600})
+    transport.get(server_url + "/page_0")
+    transport.get(server_url + "/page_1")
+    transport.get(server_url + "/page_0")
+
+    # Act
+    transport.get(server_url + "/page_2")
+
+    # Assert
+    assert transport.cache is not None
+    assert transport.cache.get(server_url + "/page_0") is not None
+    assert transport.cache.get(server_url + "/page_1") is None
+    assert transport.cache.size() == 2 * size
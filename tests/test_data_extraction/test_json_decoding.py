@@ -0,0 +1,86 @@
+import json
+from typing import TypedDict
+from unittest.mock import Mock
+
+import pytest
+
+from serie_a_db.data_extraction.clients.fantamaster import FantamasterWebsite
+from serie_a_db.data_extraction.clients.json_decoding import (
+    decode_records,
+    iter_array,
+)
+from serie_a_db.exceptions import UnexpectedPayloadError
+
+
+class Player(TypedDict):
+    id: int
+    name: str
+    value: float | None
+
+
+def test_array_items_should_be_yielded_one_at_a_time():
+    # Arrange
+    content = b"""
+    {
+        "total" : {"players": ["]"]},
+        "players" : [ {"id": 1, "name": "Foo ]"} , {"id": 2, "name": "Bar"} ],
+        "other": 1
+    }
+    """
+
+    # Act
+    items = iter_array(content, "players", "players")
+
+    # Assert
+    assert next(items) == {"id": 1, "name": "Foo ]"}
+    assert list(items) == [{"id": 2, "name": "Bar"}]
+
+
+@pytest.mark.parametrize("content", [b'{"players": {}}', b"[]", b'{"total": 1}'])
+def test_missing_array_should_raise_a_clear_error(content):
+    with pytest.raises(UnexpectedPayloadError, match="Unexpected payload of the foo"):
+        list(iter_array(content, "players", "foo"))
+
+
+def test_records_should_keep_only_the_fields_of_the_struct():
+    # Arrange
+    records = json.loads(b'[{"id": 1, "name": "Foo", "value": 10, "goals": 3}]')
+
+    # Act
+    actual = decode_records(records, Player, "players")
+
+    # Assert
+    assert actual == [{"id": 1, "name": "Foo", "value": 10}]
+
+
+@pytest.mark.parametrize(
+    ("record", "message"),
+    [
+        ({"id": 1, "name": "Foo"}, "record 1 has no field 'value'"),
+        ({"id": "1", "name": "Foo", "value": None}, "field 'id' of record 1 is a str"),
+        ([1, "Foo", None], "record 1 is a list"),
+    ],
+)
+def test_records_of_an_unexpected_schema_should_raise_a_clear_error(record, message):
+    # Arrange
+    records = [{"id": 1, "name": "Foo", "value": 1.5}, record]
+
+    # Act & Assert
+    with pytest.raises(UnexpectedPayloadError, match=message):
+        decode_records(records, Player, "players")
+
+
+def test_fantamaster_players_should_be_decoded_with_the_fields_read():
+    # Arrange
+    player = {"id": 1, "name": "Foo", "team": "Bar", "role": "P", "value": 10}
+    transport = Mock()
+    transport.get.return_value.content = (
+        b'{"players": [{"id": 1, "name": "Foo", "team": "Bar", "role": "P", '
+        b'"value": 10, "goals": 3}]}'
+    )
+
+    # Act
+    actual = FantamasterWebsite(transport).get_players()
+
+    # Assert
+    assert actual == [player]
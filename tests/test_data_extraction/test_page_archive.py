@@ -0,0 +1,51 @@
+from serie_a_db.data_extraction.clients.fantacalcio_punto_it_website import (
+    FantacalcioPuntoItWebsite,
+)
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
+
+A_URL = "https://www.foo.com/page"
+
+
+def test_same_content_should_be_stored_once(tmp_path):
+    # Arrange
+    archive = PageArchive(tmp_path)
+    n_fetches = 3
+
+    # Act
+    pages = [archive.store(A_URL, b"<html>Same</html>") for _ in range(n_fetches)]
+
+    # Assert
+    assert len({page.digest for page in pages}) == 1
+    assert len(list(archive.blobs_dir.rglob("*.zz"))) == 1
+    assert len(list(archive.pages(A_URL))) == n_fetches
+    archive.close()
+
+
+def test_latest_page_of_each_url_should_be_read_back(tmp_path):
+    # Arrange
+    archive = PageArchive(tmp_path)
+    archive.store(A_URL, b"old")
+    archive.store(A_URL, "nuovo è".encode("latin-1"), encoding="ISO-8859-1")
+    archive.store("https://www.bar.com/page", b"other")
+
+    # Act
+    pages = list(archive.pages("foo", latest_only=True))
+
+    # Assert
+    assert [archive.read_text(page) for page in pages] == ["nuovo è"]
+    archive.close()
+
+
+def test_archived_grades_pages_should_be_found_by_match_day(tmp_path):
+    # Arrange
+    archive = PageArchive(tmp_path)
+    root = FantacalcioPuntoItWebsite.ROOT
+    archive.store(root + "/voti-fantacalcio-serie-a/2023-24/5", b"grades")
+    archive.store(root + "/quotazioni-fantacalcio/2023-24", b"players")
+
+    # Act
+    pages = list(FantacalcioPuntoItWebsite.archived_grades_pages(archive))
+
+    # Assert
+    assert pages == [(2023, 5, "grades")]
+    archive.close()
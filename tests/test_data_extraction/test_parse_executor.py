@@ -0,0 +1,68 @@
+import time
+from typing import NamedTuple
+
+import pytest
+
+from serie_a_db.data_extraction import parse_executor
+from serie_a_db.data_extraction.clients.fetch_engine import FetchResult
+from serie_a_db.data_extraction.parse_executor import ParseExecutor
+
+
+class Word(NamedTuple):
+    key: int
+    word: str
+
+
+def parse_words(key: int, page: str) -> list[NamedTuple]:
+    """Parse a page of words, the first pages taking the longest."""
+    if page == "":
+        raise ValueError(f"Page {key} is empty.")
+    time.sleep(0.01 * (5 - key % 5))
+    return [Word(key, word) for word in page.split()]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_records_should_be_returned_in_the_order_of_the_pages(workers):
+    # Arrange
+    executor = ParseExecutor(workers=workers)
+    n_pages = 10
+    pages = [FetchResult(key, f"a{key} b{key}") for key in range(n_pages)]
+
+    # Act
+    results = list(executor.parse_in_order(parse_words, pages))
+
+    # Assert
+    assert [result.key for result in results] == list(range(n_pages))
+    assert results[1].get() == [(1, "a1"), (1, "b1")]
+    assert results[1].get()[0].word == "a1"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parsing_and_fetch_errors_should_be_returned_in_the_results(workers):
+    # Arrange
+    executor = ParseExecutor(workers=workers)
+    fetch_error = ConnectionError("Unreachable.")
+    pages = [
+        FetchResult(0, "foo"),
+        FetchResult(1, ""),
+        FetchResult(2, error=fetch_error),
+        FetchResult(3, "bar"),
+    ]
+
+    # Act
+    results = list(executor.parse_in_order(parse_words, pages))
+
+    # Assert
+    assert results[0].get() == [(0, "foo")]
+    with pytest.raises(ValueError, match="Page 1 is empty."):
+        results[1].get()
+    assert results[2].error is fetch_error
+    assert results[3].get() == [(3, "bar")]
+
+
+def test_workers_should_not_be_forked():
+    # Act
+    start_method = parse_executor._worker_context().get_start_method()
+
+    # Assert
+    assert start_method != "fork"
@@ -0,0 +1,140 @@
+from http.server import BaseHTTPRequestHandler
+from typing import ClassVar
+
+import pytest
+import requests
+
+from serie_a_db.data_extraction.clients.http_cache import HttpCache
+from serie_a_db.data_extraction.clients.rate_limiter import (
+    HostRate,
+    RateLimiter,
+    TokenBucket,
+    parse_retry_after,
+)
+from serie_a_db.data_extraction.clients.transport import Transport
+
+# Ten requests per second, so that tests wait for tenths of a second
+FAST_RATE = HostRate(requests_per_minute=600, burst=2)
+
+
+def test_requests_within_the_burst_should_not_wait():
+    # Arrange
+    bucket = TokenBucket(FAST_RATE)
+
+    # Act
+    waits = [bucket.acquire() for _ in range(FAST_RATE.burst)]
+
+    # Assert
+    assert waits == [0, 0]
+
+
+def test_requests_beyond_the_burst_should_wait_for_the_next_token():
+    # Arrange
+    bucket = TokenBucket(FAST_RATE)
+    for _ in range(FAST_RATE.burst):
+        bucket.acquire()
+
+    # Act
+    wait = bucket.acquire()
+
+    # Assert
+    assert wait == pytest.approx(0.1, abs=0.02)
+    assert bucket.stats().seconds_waited == wait
+
+
+def test_push_back_should_halve_the_rate_and_hold_the_requests():
+    # Arrange
+    bucket = TokenBucket(FAST_RATE)
+    retry_after = 0.2
+
+    # Act
+    bucket.slow_down(retry_after)
+    wait = bucket.acquire()
+
+    # Assert
+    assert wait == pytest.approx(retry_after, abs=0.02)
+    assert bucket.rate == bucket.max_rate / 2
+
+
+def test_successes_should_restore_the_configured_rate():
+    # Arrange
+    bucket = TokenBucket(FAST_RATE)
+    bucket.slow_down(retry_after=0)
+    n_successes = 10
+
+    # Act
+    for _ in range(n_successes):
+        bucket.speed_up()
+
+    # Assert
+    assert bucket.rate == bucket.max_rate
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("120", 120),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0),
+        ("Wed, 21 Oct 2015 07:28:00 -0000", 0),
+        ("soon", None),
+        (None, None),
+    ],
+)
+def test_retry_after_parsing(header, expected):
+    assert parse_retry_after(header) == expected
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    statuses: ClassVar[list[int]] = []
+
+    def do_GET(self):  # noqa: N802
+        status = self.statuses.pop(0)
+        self.send_response(status)
+        if status == requests.codes.too_many_requests:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    Handler.statuses = []
+    return Handler
+
+
+def test_too_many_requests_should_slow_down_the_host(server_url):
+    # Arrange
+    Handler.statuses = [429]
+    limiter = RateLimiter(FAST_RATE)
+    transport = Transport(rate_limiter=limiter)
+
+    # Act
+    with pytest.raises(requests.HTTPError):
+        transport.get(server_url + "/page")
+
+    # Assert
+    (stats,) = limiter.stats().values()
+    assert stats.requests_per_minute == FAST_RATE.requests_per_minute / 2
+    transport.close()
+
+
+def test_responses_served_by_the_cache_should_not_be_rate_limited(server_url, tmp_path):
+    # Arrange
+    Handler.statuses = [200]
+    limiter = RateLimiter(FAST_RATE)
+    cache = HttpCache(tmp_path, max_size_bytes=1024, default_ttl=60)
+    transport = Transport(cache=cache, rate_limiter=limiter)
+    n_requests = 3
+
+    # Act
+    for _ in range(n_requests):
+        transport.get(server_url + "/page")
+
+    # Assert
+    (stats,) = limiter.stats().values()
+    assert stats.requests == 1
+    transport.close()
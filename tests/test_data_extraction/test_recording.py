@@ -0,0 +1,142 @@
+import json
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from serie_a_db.data_extraction.clients.lega_serie_a_website import SerieAWebsite
+from serie_a_db.data_extraction.clients.recording import (
+    Recording,
+    RecordingTransport,
+    ReplayTransport,
+)
+from serie_a_db.data_extraction.clients.retry import RetryPolicy
+from serie_a_db.data_extraction.table_specific_extractors.st_match_day import (
+    scrape_match_day_data,
+)
+from serie_a_db.db.run_context import RunContext
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    counter = 0
+
+    def do_GET(self):  # noqa: N802
+        Handler.counter += 1
+        body = f"response {Handler.counter}".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    Handler.counter = 0
+    return Handler
+
+
+def make_response(
+    content: str, elapsed_seconds: float = 0, status_code: int = requests.codes.ok
+) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp._content = content.encode()
+    resp.elapsed = timedelta(seconds=elapsed_seconds)
+    return resp
+
+
+def test_recorded_responses_should_be_replayed_in_order(server_url, tmp_path):
+    # Arrange
+    url = server_url + "/page"
+    recorder = RecordingTransport(Recording(tmp_path))
+    for _ in range(2):
+        recorder.get(url)
+    recorder.close()
+    replayer = ReplayTransport(Recording(tmp_path))
+
+    # Act
+    texts = [replayer.get(url).text for _ in range(3)]
+
+    # Assert
+    assert texts == ["response 1", "response 2", "response 2"]
+    replayer.close()
+
+
+def test_requests_never_recorded_should_fail(tmp_path):
+    # Arrange
+    replayer = ReplayTransport(Recording(tmp_path))
+
+    # Act / Assert
+    with pytest.raises(requests.ConnectionError):
+        replayer.get("https://www.foo.com/missing")
+    replayer.close()
+
+
+@pytest.mark.parametrize("retried", [True, False])
+def test_recorded_failures_should_be_retried_with_a_retry_policy(tmp_path, retried):
+    # Arrange
+    url = "https://www.foo.com/flaky"
+    recording = Recording(tmp_path)
+    recording.record(url, make_response("", status_code=requests.codes.unavailable))
+    recording.record(url, make_response("ok"))
+    retry_policy = RetryPolicy(base_delay=0) if retried else None
+    replayer = ReplayTransport(recording, retry_policy=retry_policy)
+
+    # Act / Assert
+    if retried:
+        assert replayer.get(url).text == "ok"
+    else:
+        with pytest.raises(requests.HTTPError):
+            replayer.get(url)
+    replayer.close()
+
+
+def test_replay_should_simulate_the_recorded_latency(tmp_path):
+    # Arrange
+    url = "https://www.foo.com/slow"
+    elapsed_seconds = 0.1
+    recording = Recording(tmp_path)
+    recording.record(url, make_response("slow", elapsed_seconds))
+    replayer = ReplayTransport(recording, latency_factor=2)
+
+    # Act
+    start = time.perf_counter()
+    replayer.get(url)
+    duration = time.perf_counter() - start
+
+    # Assert
+    assert duration >= elapsed_seconds * 2
+    replayer.close()
+
+
+def test_extractors_should_run_offline_on_a_recording(run_context: RunContext, tmp_path):
+    # Arrange
+    recording = Recording(tmp_path)
+    recording.record(
+        SerieAWebsite.ROOT + "/en/serie-a",
+        make_response(
+            '<select class="hm-select" name="season">'
+            '<option value="157617">2023-24</option></select>'
+        ),
+    )
+    season_page = {
+        "data": [{"id_category": 157707, "description": "1", "category_status": "PLAYED"}]
+    }
+    recording.record(
+        SerieAWebsite.ROOT + "/api/season/157617/championship/A/matchday?lang=eng",
+        make_response(json.dumps(season_page)),
+    )
+    client = SerieAWebsite(ReplayTransport(recording))
+
+    # Act
+    data = list(scrape_match_day_data(run_context, client))
+
+    # Assert
+    assert data == [(157617, 2023, 157707, 1, "completed")]
+    client.transport.close()
@@ -0,0 +1,123 @@
+from http.server import BaseHTTPRequestHandler
+from typing import ClassVar
+
+import pytest
+import requests
+
+from serie_a_db.data_extraction.clients.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+)
+from serie_a_db.data_extraction.clients.transport import Transport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    statuses: ClassVar[list[int]] = []
+    requests_served: ClassVar[int] = 0
+
+    def do_GET(self):  # noqa: N802
+        Handler.requests_served += 1
+        self.send_response(self.statuses.pop(0) if self.statuses else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    Handler.statuses = []
+    Handler.requests_served = 0
+    return Handler
+
+
+def test_transient_failures_should_be_retried(server_url):
+    # Arrange
+    Handler.statuses = [503, 502]
+    n_failures = len(Handler.statuses)
+    transport = Transport(retry_policy=RetryPolicy(base_delay=0))
+
+    # Act
+    resp = transport.get(server_url + "/page")
+
+    # Assert
+    assert resp.status_code == requests.codes.ok
+    assert Handler.requests_served == n_failures + 1
+    transport.close()
+
+
+def test_client_errors_should_not_be_retried(server_url):
+    # Arrange
+    Handler.statuses = [404]
+    transport = Transport(retry_policy=RetryPolicy(base_delay=0))
+
+    # Act
+    with pytest.raises(requests.HTTPError):
+        transport.get(server_url + "/page")
+
+    # Assert
+    assert Handler.requests_served == 1
+    transport.close()
+
+
+def test_retries_should_stop_once_the_budget_is_exhausted(server_url):
+    # Arrange
+    Handler.statuses = [500, 500, 500]
+    budget = 1
+    transport = Transport(retry_policy=RetryPolicy(base_delay=0, budget=budget))
+
+    # Act
+    with pytest.raises(requests.HTTPError):
+        transport.get(server_url + "/page")
+
+    # Assert
+    assert Handler.requests_served == budget + 1
+    transport.close()
+
+
+def test_backoff_should_grow_exponentially_up_to_the_max():
+    # Arrange
+    max_delay = 4
+    policy = RetryPolicy(base_delay=1, max_delay=max_delay)
+
+    # Act
+    delays = [policy.backoff(attempt) for attempt in range(1, 10)]
+
+    # Assert
+    assert all(0 <= delay <= max_delay for delay in delays)
+
+
+def test_circuit_should_open_after_repeated_failures(server_url):
+    # Arrange
+    Handler.statuses = [500, 500]
+    failure_threshold = 2
+    breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=60)
+    transport = Transport(retry_policy=RetryPolicy(base_delay=0), circuit_breaker=breaker)
+
+    # Act
+    with pytest.raises(CircuitOpenError):
+        transport.get(server_url + "/page")
+
+    # Assert
+    assert Handler.requests_served == failure_threshold
+    transport.close()
+
+
+def test_circuit_should_close_at_the_first_success_after_the_timeout(server_url):
+    # Arrange
+    host = server_url.removeprefix("http://")
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(host)
+    transport = Transport(circuit_breaker=breaker)
+
+    # Act
+    transport.get(server_url + "/page")
+
+    # Assert
+    breaker.record_failure(host)
+    breaker.check(host)
+    assert Handler.requests_served == 1
+    transport.close()
@@ -1,6 +1,7 @@
 from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player_match import (
     PlayerMatch,
     PlayerRole,
+    iter_match_day_page,
     parse_match_day_page,
 )
 from tests.test_data_extraction import EXTRACTION_TEST_DATA_DIR
@@ -148,3 +149,35 @@ def test_penalties_should_be_counted_in_goals_scored():
     # Assert
     assert data[0].goals_scored == 1
     assert data[0].penalties_scored == 1
+
+
+def test_entire_page_should_be_parsed_in_a_single_pass():
+    # Arrange
+    page = EXTRACTION_TEST_DATA_DIR / "fpi/player_match_entire_real_page.html"
+    expected_players_number = 292
+    expected_teams_number = 20
+
+    # Act
+    data = parse_match_day_page(page.read_bytes(), A_MATCHDAY_ID)
+
+    # Assert
+    assert len(data) == expected_players_number
+    assert len({player_match.team_name for player_match in data}) == expected_teams_number
+
+
+def test_raw_bytes_should_be_decoded_across_chunks():
+    # Arrange
+    page = EXTRACTION_TEST_DATA_DIR / "fpi/player_match_one_player.html"
+    name = "Mussò"
+    raw_page = page.read_text().replace("Musso", name).encode("utf-8")
+
+    # Act
+    # Chunks of a few bytes split the two bytes of the accented letter
+    chunks_results = [
+        list(iter_match_day_page(raw_page, A_MATCHDAY_ID, chunk_size=chunk_size))
+        for chunk_size in range(1, 8)
+    ]
+
+    # Assert
+    for data in chunks_results:
+        assert [player_match.name for player_match in data] == [name]
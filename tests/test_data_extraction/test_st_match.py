@@ -1,9 +1,16 @@
+import pytest
+
 from serie_a_db import DEFINITIONS_DIR
+from serie_a_db.data_extraction.clients.fetch_engine import FetchEngine
+from serie_a_db.data_extraction.table_specific_extractors import st_match
 from serie_a_db.data_extraction.table_specific_extractors.st_match import (
     Match,
     api_response_to_match,
+    scrape_match_data,
 )
+from serie_a_db.data_extraction.table_specific_extractors.st_match_day import Status
 from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import RunContext
 from serie_a_db.db.table import StagingTable
 from serie_a_db.sql_parsing import extract_attributes_from_create_statement
 
@@ -130,8 +137,95 @@ def test_udpate(db: Db):
         "INSERT INTO dm_match_day VALUES (?, ?)",
         (Match.fake().match_day_id, 23),
     )
-    table = StagingTable.from_file("st_match", lambda: [Match.fake().to_namedtuple()])
+    table = StagingTable.from_file("st_match", lambda _: [Match.fake().to_namedtuple()])
 
     table.update(db)
 
     assert db.count_rows("dm_match_day") == 1
+
+
+class FakeSerieAWebsite:
+    HOST = "www.legaseriea.it"
+
+    def get_matches(self, match_day_api_code: int, **_):
+        return [{"match_id": match_day_api_code}]
+
+
+@pytest.mark.parametrize(
+    ("home_goals", "expected_loaded"), [(2, 0), (3, 1)], ids=["unchanged", "changed"]
+)
+def test_ongoing_match_days_should_be_loaded_only_if_changed(
+    db: Db, run_context: RunContext, monkeypatch, home_goals, expected_loaded
+):
+    # Arrange
+    loaded_match = Match.fake(home_goals=2, status=Status.ONGOING)
+    db.execute(
+        "CREATE TABLE dm_match_day (match_day_id STR, code_serie_a_api INT, status STR)"
+    )
+    db.execute(
+        "INSERT INTO dm_match_day VALUES (?, ?, ?)",
+        (loaded_match.match_day_id, 23, "ongoing"),
+    )
+    StagingTable.from_file("st_match", lambda _: [loaded_match.to_namedtuple()]).update(
+        db
+    )
+    polled_match = Match.fake(home_goals=home_goals, status=Status.ONGOING)
+    monkeypatch.setattr(
+        st_match, "_api_response_to_records", lambda *_: [polled_match.model_dump()]
+    )
+    validated = []
+    validate_many = Match.validate_many
+
+    def spy_validate_many(records):
+        validated.append(records)
+        return validate_many(records)
+
+    monkeypatch.setattr(Match, "validate_many", spy_validate_many)
+
+    # Act
+    matches = list(
+        scrape_match_data(run_context, FakeSerieAWebsite(), fetch_engine=FetchEngine())
+    )
+
+    # Assert
+    assert len(matches) == expected_loaded
+    assert len(validated) == expected_loaded
+
+
+@pytest.mark.parametrize(
+    ("loaded_fields", "expected_fetched"),
+    [
+        ({"status": Status.ONGOING, "date": "2023-12-31"}, True),
+        ({"status": Status.UPCOMING, "date": "2024-01-02"}, True),
+        ({"status": Status.UPCOMING, "date": "2024-01-10"}, False),
+        ({"status": Status.COMPLETED, "date": "2023-12-31"}, False),
+    ],
+    ids=["ongoing", "upcoming-soon", "upcoming-later", "completed"],
+)
+def test_ongoing_match_days_should_be_fetched_only_if_matches_may_have_changed(
+    db: Db, run_context: RunContext, freeze_time, loaded_fields, expected_fetched
+):
+    # Arrange
+    loaded_match = Match.fake(**loaded_fields)
+    db.execute(
+        "CREATE TABLE dm_match_day (match_day_id STR, code_serie_a_api INT, status STR)"
+    )
+    db.execute(
+        "INSERT INTO dm_match_day VALUES (?, ?, ?)",
+        (loaded_match.match_day_id, 23, "ongoing"),
+    )
+    StagingTable.from_file("st_match", lambda _: [loaded_match.to_namedtuple()]).update(
+        db
+    )
+    fetched = []
+
+    class SpySerieAWebsite(FakeSerieAWebsite):
+        def get_matches(self, match_day_api_code: int, **_):
+            fetched.append(match_day_api_code)
+            return []
+
+    # Act
+    list(scrape_match_data(run_context, SpySerieAWebsite(), fetch_engine=FetchEngine()))
+
+    # Assert
+    assert bool(fetched) is expected_fetched
@@ -0,0 +1,95 @@
+import gzip
+from http.server import BaseHTTPRequestHandler
+from typing import ClassVar
+from unittest.mock import Mock
+
+import pytest
+
+from serie_a_db.data_extraction.clients.lega_serie_a_website import SerieAWebsite
+from serie_a_db.data_extraction.clients.transport import Transport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    client_ports: ClassVar[list[int]] = []
+
+    def do_GET(self):  # noqa: N802
+        self.client_ports.append(self.client_address[1])
+        body = b'{"data": "ok"}'
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    Handler.client_ports = []
+    return Handler
+
+
+def test_requests_to_the_same_host_should_reuse_the_connection(server_url):
+    # Arrange
+    transport = Transport()
+    n_requests = 3
+
+    # Act
+    for _ in range(n_requests):
+        transport.get(server_url + "/page")
+
+    # Assert
+    assert len(Handler.client_ports) == n_requests
+    assert len(set(Handler.client_ports)) == 1
+    transport.close()
+
+
+def test_compressed_responses_should_be_decoded(server_url):
+    # Arrange
+    transport = Transport()
+
+    # Act
+    resp = transport.get(server_url + "/page")
+
+    # Assert
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.json() == {"data": "ok"}
+    transport.close()
+
+
+def test_host_timeout_should_override_the_default():
+    # Arrange
+    transport = Transport(timeout=5, host_timeouts={"www.legaseriea.it": 10})
+    response = Mock()
+    session = transport._session("www.legaseriea.it")
+    session.get = Mock(return_value=response)
+
+    # Act
+    transport.get("https://www.legaseriea.it/en/serie-a")
+
+    # Assert
+    session.get.assert_called_once_with(
+        "https://www.legaseriea.it/en/serie-a", timeout=10
+    )
+    response.raise_for_status.assert_called_once()
+
+
+def test_clients_should_use_the_injected_transport(server_url):
+    # Arrange
+    transport = Transport()
+    client = SerieAWebsite(transport)
+    client.ROOT = server_url
+
+    # Act
+    page = client.get_homepage()
+
+    # Assert
+    assert page == '{"data": "ok"}'
+    transport.close()
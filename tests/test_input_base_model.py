@@ -1,3 +1,6 @@
+import pickle
+from enum import StrEnum
+
 import pytest
 from pydantic import ValidationError
 
@@ -38,3 +41,63 @@ def test_values_can_be_unpacked_as_in_namedtuple():
     name, age = actual
     assert name == actual.name
     assert age == actual.age
+
+
+def test_rows_of_a_model_should_share_their_type():
+    """Rows are namedtuples of one type per model, which can be pickled."""
+    first = DummyInput(name="John", age=25).to_row()
+    second = DummyInput(name="Jane", age=30).to_namedtuple()
+    assert type(first) is type(second)
+    assert type(first).__name__ == "DummyInput"
+    assert pickle.loads(pickle.dumps(first)) == first
+    assert type(pickle.loads(pickle.dumps(first))) is type(first)
+
+
+def test_rows_of_a_batch_should_share_their_strings():
+    """Repeated strings are stored once across the rows of a batch."""
+    # Built at runtime, so that they are equal but distinct objects
+    name, same_name = "John!"[:-1], "John?"[:-1]
+    actual = DummyInput.to_rows(
+        [DummyInput(name=name, age=25), DummyInput(name=same_name, age=30)]
+    )
+    assert actual == [("John", 25), ("John", 30)]
+    assert actual[0].name is actual[1].name
+
+
+class Colour(StrEnum):
+    RED = "red"
+
+
+class DummyColouredInput(DbInputBaseModel):
+    name: str
+    colour: Colour
+
+
+def test_enum_values_should_not_be_shared_with_equal_strings():
+    """Members of string enums are kept, even if equal to a string of the batch."""
+    actual = DummyColouredInput.to_rows(
+        [DummyColouredInput(name="red", colour=Colour.RED)]
+    )
+    assert not isinstance(actual[0].name, Colour)
+    assert isinstance(actual[0].colour, Colour)
+
+
+def test_batch_validation_should_report_the_invalid_record():
+    """The error of a batch validation points to the record that failed."""
+    records = [{"name": "John", "age": 25}, {"name": "Jane", "age": "non-a-number"}]
+    with pytest.raises(ValidationError, match=r"1\.age"):
+        DummyInput.validate_many(records)
+
+
+def test_batch_validation_should_convert_the_records():
+    """Records validated at once are converted like one at a time."""
+    actual = DummyInput.records_to_rows([{"name": "John", "age": "25"}])
+    expected = [DummyInput(name="John", age=25).to_namedtuple()]
+    assert actual == expected
+
+
+def test_trusted_records_should_not_be_validated():
+    """Records from internal sources are converted as they are."""
+    actual = DummyInput.records_to_rows([{"age": "25", "name": "John"}], trusted=True)
+    assert actual == [("John", "25")]
+    assert type(actual[0]) is DummyInput.row_type()
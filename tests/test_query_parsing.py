@@ -260,11 +260,11 @@ def test_columns_inference(statement, expected_columns):
             """CREATE TABLE dm_table_staging (
                 a_note
             );""",
-            """INSERT INTO dm_table_staging(a_note)
-            VALUES(?)
-            ON CONFLICT DO UPDATE
-            SET
-                a_note = excluded.a_note;
+            """INSERT OR REPLACE INTO dm_table_staging(a_note)
+            SELECT ?1
+            WHERE NOT EXISTS (
+                SELECT 1 FROM dm_table_staging WHERE a_note IS ?1
+            );
             """,
         ),
         (  # Multiple columns
@@ -272,12 +272,11 @@ def test_columns_inference(statement, expected_columns):
             a_note,
             a_date
             );""",
-            """INSERT INTO dm_table_staging(a_note, a_date)
-            VALUES(?, ?)
-            ON CONFLICT DO UPDATE
-            SET
-                a_note = excluded.a_note,
-                a_date = excluded.a_date;
+            """INSERT OR REPLACE INTO dm_table_staging(a_note, a_date)
+            SELECT ?1, ?2
+            WHERE NOT EXISTS (
+                SELECT 1 FROM dm_table_staging WHERE a_note IS ?1 AND a_date IS ?2
+            );
             """,
         ),
     ),
@@ -0,0 +1,234 @@
+import sqlite3
+from collections import namedtuple
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from serie_a_db import CONFIG_FILE, utils
+from serie_a_db.db.client import Db
+from serie_a_db.db.table import StagingTable, WarehouseTable
+from serie_a_db.db.update import CommitPolicy, DbUpdater
+from serie_a_db.exceptions import SetupError
+
+
+class Observer:
+    """Read what is committed to the database, through separate connections."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+
+    def select(self, statement: str) -> list[tuple]:
+        with closing(sqlite3.connect(self.db_path)) as connection:
+            return connection.execute(statement).fetchall()
+
+    def count_rows(self, table_name: str) -> int:
+        return self.select(f"SELECT COUNT(*) FROM {table_name}")[0][0]
+
+    def get_attributes(self, table_name: str) -> tuple[str, ...]:
+        return tuple(
+            row[0]
+            for row in self.select(f"SELECT name FROM PRAGMA_TABLE_INFO('{table_name}')")
+        )
+
+
+@pytest.fixture(name="file_db")
+def file_db_with_observer(tmp_path):
+    """Provide a Db instance on file, plus an observer of the same file."""
+    db = Db(tmp_path / "db.sqlite")
+    db.meta.create_meta_tables()
+    db.meta.set_parameters(utils.read_yaml(CONFIG_FILE)["parameters"])
+    db.commit()
+    try:
+        yield db, Observer(tmp_path / "db.sqlite")
+    finally:
+        db.close_connection()
+
+
+def make_schema(populate_second: str) -> dict:
+    return {
+        "dm_first": WarehouseTable(
+            "dm_first",
+            "CREATE TABLE IF NOT EXISTS dm_first (dummy_name INTEGER);",
+            "INSERT INTO dm_first VALUES (5);",
+        ),
+        "dm_second": WarehouseTable(
+            "dm_second",
+            "CREATE TABLE IF NOT EXISTS dm_second (dummy_name INTEGER NOT NULL);",
+            populate_second,
+        ),
+    }
+
+
+@pytest.mark.parametrize("policy", list(CommitPolicy))
+def test_failure_should_roll_back_the_failed_table_only(file_db, policy):
+    # Arrange
+    db, observer = file_db
+    schema = make_schema("INSERT INTO dm_second SELECT NULL FROM dm_first;")
+
+    # Act
+    with pytest.raises(sqlite3.IntegrityError):
+        DbUpdater(db, schema, commit_policy=policy).update_all_tables()
+
+    # Assert
+    assert observer.get_attributes("dm_first") == ("dummy_name",)
+    assert observer.get_attributes("dm_second") == ()
+    logged = observer.select("SELECT table_name FROM ft_tables_update")
+    assert logged == [("dm_first",)]
+
+
+@pytest.mark.parametrize("policy", [CommitPolicy.LEVEL, CommitPolicy.RUN])
+def test_failure_should_skip_downstream_tables_only(file_db, policy):
+    # Arrange
+    db, observer = file_db
+    schema = make_schema("INSERT INTO dm_second SELECT NULL FROM dm_first;")
+    schema["dm_downstream"] = WarehouseTable(
+        "dm_downstream",
+        "CREATE TABLE IF NOT EXISTS dm_downstream (dummy_name INTEGER);",
+        "INSERT INTO dm_downstream SELECT * FROM dm_second;",
+    )
+    schema["dm_independent"] = WarehouseTable(
+        "dm_independent",
+        "CREATE TABLE IF NOT EXISTS dm_independent (dummy_name INTEGER);",
+        "INSERT INTO dm_independent SELECT * FROM dm_first;",
+    )
+
+    # Act
+    with pytest.raises(sqlite3.IntegrityError):
+        DbUpdater(db, schema, commit_policy=policy).update_all_tables()
+
+    # Assert
+    assert observer.get_attributes("dm_downstream") == ()
+    assert observer.count_rows("dm_independent") == 1
+    logged = observer.select("SELECT table_name FROM ft_tables_update")
+    assert sorted(logged) == [("dm_first",), ("dm_independent",)]
+
+
+@pytest.mark.parametrize("policy", [CommitPolicy.LEVEL, CommitPolicy.RUN])
+def test_failing_staging_table_should_roll_back_its_loaded_chunks(file_db, policy):
+    # Arrange
+    db, observer = file_db
+    schema = make_schema("INSERT INTO dm_second VALUES (1);")
+    record = namedtuple("Record", ["dummy_name"])
+    n_loaded_before_failing = 3
+
+    def extract(_):
+        yield from (record(i) for i in range(n_loaded_before_failing))
+        raise ValueError("Source unavailable")
+
+    create_statement = "CREATE TABLE IF NOT EXISTS st_failing (dummy_name INTEGER);"
+    schema["st_failing"] = StagingTable("st_failing", create_statement, extract)
+    db.execute(create_statement)
+    db.commit()
+
+    # Act
+    with pytest.raises(ValueError, match="Source unavailable"):
+        DbUpdater(db, schema, commit_policy=policy, chunk_size=1).update_all_tables()
+
+    # Assert
+    assert observer.count_rows("st_failing") == 0
+    assert observer.count_rows("dm_second") == 1
+
+
+@pytest.mark.parametrize("policy", [CommitPolicy.LEVEL, CommitPolicy.RUN])
+def test_jobs_should_require_the_table_policy(file_db, policy):
+    # Arrange
+    db, _ = file_db
+    schema = make_schema("INSERT INTO dm_second VALUES (1);")
+
+    # Act & Assert
+    with pytest.raises(SetupError, match="table commit policy"):
+        DbUpdater(db, schema, jobs=2, commit_policy=policy)
+
+
+@pytest.mark.parametrize("policy", list(CommitPolicy))
+def test_extractors_should_see_the_tables_updated_before_them(file_db, policy):
+    # Arrange
+    db, observer = file_db
+    schema = make_schema("INSERT INTO dm_second VALUES (1);")
+    record = namedtuple("Record", ["dummy_name"])
+
+    def extract(run_context):
+        with run_context.pool.connection() as reader:
+            return [record(*row) for row in reader.select("SELECT * FROM dm_first")]
+
+    schema["st_reader"] = StagingTable(
+        "st_reader",
+        "CREATE TABLE st_reader (dummy_name INTEGER);",
+        extract,
+        upstream_tables={"dm_first"},
+    )
+
+    # Act
+    DbUpdater(db, schema, commit_policy=policy).update_all_tables()
+
+    # Assert
+    assert observer.select("SELECT * FROM st_reader") == [(5,)]
+
+
+def test_table_policy_should_commit_each_table(file_db):
+    # Arrange
+    db, observer = file_db
+    schema = make_schema("INSERT INTO dm_second SELECT COUNT(*) FROM dm_first;")
+    seen_by_observer = []
+    original_update = schema["dm_second"].update
+
+    def update_and_observe(db, full_rebuild=False):
+        seen_by_observer.append(observer.count_rows("dm_first"))
+        original_update(db, full_rebuild)
+
+    schema["dm_second"].update = update_and_observe
+
+    # Act
+    DbUpdater(db, schema, commit_policy=CommitPolicy.TABLE).update_all_tables()
+
+    # Assert
+    assert seen_by_observer == [1]
+
+
+def test_run_policy_should_commit_at_the_end(file_db):
+    # Arrange
+    db, observer = file_db
+    schema = make_schema("INSERT INTO dm_second SELECT COUNT(*) FROM dm_first;")
+    seen_by_observer = []
+    original_update = schema["dm_second"].update
+
+    def update_and_observe(db, full_rebuild=False):
+        seen_by_observer.append(observer.get_attributes("dm_first"))
+        original_update(db, full_rebuild)
+
+    schema["dm_second"].update = update_and_observe
+
+    # Act
+    DbUpdater(db, schema, commit_policy=CommitPolicy.RUN).update_all_tables()
+
+    # Assert
+    assert seen_by_observer == [()]
+    assert observer.count_rows("dm_second") == 1
+
+
+def test_level_policy_should_commit_after_each_level(file_db):
+    # Arrange
+    db, observer = file_db
+    schema = make_schema("INSERT INTO dm_second SELECT COUNT(*) FROM dm_first;")
+    schema["dm_third"] = WarehouseTable(
+        "dm_third",
+        "CREATE TABLE IF NOT EXISTS dm_third (dummy_name INTEGER);",
+        "INSERT INTO dm_third VALUES (1);",
+    )
+    seen_by_observer = []
+    original_update = schema["dm_second"].update
+
+    def update_and_observe(db, full_rebuild=False):
+        seen_by_observer.append(
+            (observer.count_rows("dm_first"), observer.get_attributes("dm_third"))
+        )
+        original_update(db, full_rebuild)
+
+    schema["dm_second"].update = update_and_observe
+
+    # Act
+    DbUpdater(db, schema, commit_policy=CommitPolicy.LEVEL).update_all_tables()
+
+    # Assert
+    assert seen_by_observer == [(1, ("dummy_name",))]
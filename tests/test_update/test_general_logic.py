@@ -1,3 +1,6 @@
+import sqlite3
+import threading
+import time
 from collections import namedtuple
 
 import pytest
@@ -11,14 +14,14 @@ DUMMY_RECORD = namedtuple("Season", ["dummy_attr"])
 DUMMY_RECORDS = [DUMMY_RECORD(1), DUMMY_RECORD(2)]
 
 
-def test_error_if_data_being_inserted_does_not_match_table_columns(db):
+def test_error_if_data_being_inserted_does_not_match_table_columns(db, recovery_dir):
     # Arrange
     script_with_different_column = """CREATE TABLE IF NOT EXISTS dm_dummy (
             dummy_name INTEGER
     );"""
 
     table = StagingTable(
-        "dm_dummy", script_with_different_column, lambda: DUMMY_RECORDS
+        "dm_dummy", script_with_different_column, lambda _: DUMMY_RECORDS
     )
 
     # Act & Assert
@@ -31,7 +34,7 @@ def test_nothing_happens_if_no_data_is_inserted(db: Db):
     table = StagingTable(
         "dm_dummy",
         "CREATE TABLE IF NOT EXISTS dm_dummy (dummy_name INTEGER);",
-        lambda: [],
+        lambda _: [],
     )
 
     # Act
@@ -56,7 +59,7 @@ def test_update_is_logged_in_meta_table(db: Db, freeze_time):
 
     # Assert
     assert db.get_all_rows("ft_tables_update") == [
-        ("dm_dummy", "2024-01-01 12:00:00.000", 1)
+        ("dm_dummy", "2024-01-01 12:00:00.000", None, 1, builder.ledger.run_id, 0)
     ]
 
 
@@ -123,7 +126,10 @@ def test_db_update_dep_lev_1_tables_one_layer(db):
     builder.update_all_tables()
 
     # Assert
-    assert db.meta.last_updated("dm_dep_lev_1") > db.meta.last_updated("dm_base")
+    assert db.select("SELECT table_name FROM ft_tables_update ORDER BY sequence") == [
+        ("dm_base",),
+        ("dm_dep_lev_1",),
+    ]
 
 
 def test_db_update_dep_lev_1_tables_two_layers(db):
@@ -157,8 +163,11 @@ def test_db_update_dep_lev_1_tables_two_layers(db):
     builder.update_all_tables()
 
     # Assert
-    assert db.meta.last_updated("dm_dep_lev_1") > db.meta.last_updated("dm_base")
-    assert db.meta.last_updated("dm_dep_lev_2") > db.meta.last_updated("dm_dep_lev_1")
+    assert db.select("SELECT table_name FROM ft_tables_update ORDER BY sequence") == [
+        ("dm_base",),
+        ("dm_dep_lev_1",),
+        ("dm_dep_lev_2",),
+    ]
 
 
 def test_immuted_staging_columns_should_result_in_staging_not_being_dropped(db: Db):
@@ -170,7 +179,7 @@ def test_immuted_staging_columns_should_result_in_staging_not_being_dropped(db:
     table = StagingTable(
         "st_dummy",
         "CREATE TABLE st_dummy (dummy_attr INTEGER);",
-        lambda: [DUMMY_RECORD(1), DUMMY_RECORD(2)],
+        lambda _: [DUMMY_RECORD(1), DUMMY_RECORD(2)],
     )
 
     # Act
@@ -191,7 +200,7 @@ def test_uniqueness_conflict_should_resolve_in_overwrite_with_new(db: Db):
 
     record = namedtuple("Dummy", ["dummy_id", "dummy_name"])
     table = StagingTable(
-        "st_dummy", definition, lambda: [record(2, "new"), record(3, "new")]
+        "st_dummy", definition, lambda _: [record(2, "new"), record(3, "new")]
     )
 
     # Act
@@ -200,3 +209,281 @@ def test_uniqueness_conflict_should_resolve_in_overwrite_with_new(db: Db):
 
     # Assert
     assert db.get_all_rows("st_dummy") == [(1, "old"), (2, "new"), (3, "new")]
+
+
+def test_independent_staging_tables_should_be_extracted_concurrently(db: Db):
+    # Arrange
+    # Both extractions must be running at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def extract(value):
+        barrier.wait()
+        return [DUMMY_RECORD(value)]
+
+    schema = {
+        f"st_dummy{i}": StagingTable(
+            f"st_dummy{i}",
+            f"CREATE TABLE st_dummy{i} (dummy_attr INTEGER);",
+            lambda _, i=i: extract(i),
+        )
+        for i in (1, 2)
+    }
+
+    # Act
+    builder = DbUpdater(db, schema, jobs=2)
+    builder.update_all_tables()
+
+    # Assert
+    assert db.get_all_rows("st_dummy1") == [(1,)]
+    assert db.get_all_rows("st_dummy2") == [(2,)]
+
+
+def test_failure_should_not_wait_for_running_extractions(db: Db):
+    # Arrange
+    started = threading.Event()
+    n_records_available = 1000
+    extracted = []
+
+    def extract_slowly(_):
+        started.set()
+        for value in range(n_records_available):
+            time.sleep(0.01)
+            extracted.append(value)
+            yield DUMMY_RECORD(value)
+
+    def fail(_):
+        started.wait(timeout=5)
+        raise RuntimeError("Extraction failed")
+
+    schema = {
+        name: StagingTable(name, f"CREATE TABLE {name} (dummy_attr INTEGER);", extract)
+        for name, extract in (("st_slow", extract_slowly), ("st_failing", fail))
+    }
+
+    # Act
+    with pytest.raises(RuntimeError, match="Extraction failed"):
+        DbUpdater(db, schema, jobs=2).update_all_tables()
+    n_extracted_when_raised = len(extracted)
+    time.sleep(0.1)
+
+    # Assert
+    assert n_extracted_when_raised < n_records_available
+    # The running extraction stopped at its next record
+    assert len(extracted) <= n_extracted_when_raised + 1
+
+
+def test_staging_table_should_be_extracted_after_its_upstream_tables(db: Db):
+    # Arrange
+    base = WarehouseTable(
+        "dm_base",
+        "CREATE TABLE IF NOT EXISTS dm_base (dummy_name INTEGER);",
+        "INSERT INTO dm_base VALUES (5);",
+    )
+    dependent = StagingTable(
+        "st_dummy",
+        "CREATE TABLE st_dummy (dummy_attr INTEGER);",
+        lambda _: [DUMMY_RECORD(db.count_rows("dm_base"))],
+        upstream_tables={"dm_base"},
+    )
+
+    # Act
+    builder = DbUpdater(db, {"st_dummy": dependent, "dm_base": base})
+    builder.update_all_tables()
+
+    # Assert
+    assert db.get_all_rows("st_dummy") == [(1,)]
+
+
+def test_table_should_be_updated_once_per_run(db: Db):
+    # Arrange
+    table = WarehouseTable(
+        "dm_dummy",
+        "CREATE TABLE IF NOT EXISTS dm_dummy (dummy_name INTEGER);",
+        "INSERT INTO dm_dummy VALUES (5);",
+    )
+    builder = DbUpdater(db, {"dm_dummy": table})
+
+    # Act
+    builder.update_all_tables()
+    builder.update_all_tables()
+
+    # Assert
+    assert db.count_rows("dm_dummy") == 1
+    assert db.count_rows("ft_tables_update") == 1
+
+
+def test_tables_updated_before_a_failure_should_be_logged(db: Db):
+    # Arrange
+    base = WarehouseTable(
+        "dm_base",
+        "CREATE TABLE IF NOT EXISTS dm_base (dummy_name INTEGER);",
+        "INSERT INTO dm_base VALUES (5);",
+    )
+    failing = WarehouseTable(
+        "dm_failing",
+        "CREATE TABLE IF NOT EXISTS dm_failing (dummy_name INTEGER NOT NULL);",
+        "INSERT INTO dm_failing SELECT NULL FROM dm_base;",
+    )
+
+    # Act
+    builder = DbUpdater(db, {"dm_base": base, "dm_failing": failing})
+    with pytest.raises(sqlite3.IntegrityError):
+        builder.update_all_tables()
+
+    # Assert
+    assert db.select("SELECT table_name FROM ft_tables_update") == [("dm_base",)]
+
+
+class TestSkipUnchangedTables:
+    @staticmethod
+    def make_schema(staging_records: list) -> dict:
+        return {
+            "st_dummy": StagingTable(
+                "st_dummy",
+                "CREATE TABLE st_dummy (dummy_attr INTEGER);",
+                lambda _: staging_records,
+            ),
+            "dm_dummy": WarehouseTable(
+                "dm_dummy",
+                "CREATE TABLE IF NOT EXISTS dm_dummy (dummy_attr INTEGER);",
+                "INSERT INTO dm_dummy SELECT dummy_attr FROM st_dummy;",
+            ),
+        }
+
+    def test_warehouse_table_should_be_skipped_if_no_input_changed(self, db: Db):
+        # Arrange
+        DbUpdater(db, self.make_schema(DUMMY_RECORDS)).update_all_tables()
+
+        # Act
+        builder = DbUpdater(db, self.make_schema([]))
+        builder.update_all_tables()
+
+        # Assert
+        assert db.count_rows("dm_dummy") == len(DUMMY_RECORDS)
+        assert [record.table_name for record in builder.ledger.records] == [
+            "st_dummy"
+        ]
+
+    @pytest.mark.parametrize(
+        ("reloaded_value", "dm_updated"),
+        [(2, False), (3, True)],
+        ids=["identical", "changed"],
+    )
+    def test_reloaded_staging_rows_should_update_downstream_only_if_changed(
+        self, db: Db, reloaded_value, dm_updated
+    ):
+        # Arrange
+        keyed_record = namedtuple("Keyed", ["dummy_key", "dummy_attr"])
+
+        def make_schema(value: int) -> dict:
+            schema = self.make_schema([])
+            schema["st_dummy"] = StagingTable(
+                "st_dummy",
+                """CREATE TABLE st_dummy (
+                    dummy_key STR,
+                    dummy_attr INTEGER,
+                    PRIMARY KEY (dummy_key)
+                );""",
+                lambda _: [keyed_record("a", 1), keyed_record("b", value)],
+            )
+            return schema
+
+        DbUpdater(db, make_schema(2)).update_all_tables()
+
+        # Act
+        builder = DbUpdater(db, make_schema(reloaded_value))
+        builder.update_all_tables()
+
+        # Assert
+        updated = [record.table_name for record in builder.ledger.records]
+        assert ("dm_dummy" in updated) is dm_updated
+
+    def test_warehouse_table_should_be_updated_if_staging_changed(self, db: Db):
+        # Arrange
+        DbUpdater(db, self.make_schema(DUMMY_RECORDS)).update_all_tables()
+
+        # Act
+        builder = DbUpdater(db, self.make_schema([DUMMY_RECORD(3)]))
+        builder.update_all_tables()
+
+        # Assert
+        assert db.count_rows("dm_dummy") == 2 * len(DUMMY_RECORDS) + 1
+
+    def test_full_rebuild_should_update_unchanged_tables(self, db: Db):
+        # Arrange
+        DbUpdater(db, self.make_schema(DUMMY_RECORDS)).update_all_tables()
+
+        # Act
+        builder = DbUpdater(db, self.make_schema([]), full_rebuild=True)
+        builder.update_all_tables()
+
+        # Assert
+        assert db.count_rows("dm_dummy") == 2 * len(DUMMY_RECORDS)
+
+    def test_rows_written_by_each_update_should_be_logged(self, db: Db):
+        # Arrange
+        DbUpdater(db, self.make_schema(DUMMY_RECORDS)).update_all_tables()
+        new_records = [DUMMY_RECORD(3)]
+
+        # Act
+        builder = DbUpdater(db, self.make_schema(new_records))
+        builder.update_all_tables()
+
+        # Assert
+        # The warehouse table is populated again from all the staging rows
+        n_staging_rows = len(DUMMY_RECORDS) + len(new_records)
+        logged = db.execute(
+            "SELECT table_name, rows_written FROM ft_tables_update "
+            "WHERE run_id = ? ORDER BY sequence",
+            (builder.ledger.run_id,),
+        ).fetchall()
+        assert logged == [("st_dummy", len(new_records)), ("dm_dummy", n_staging_rows)]
+
+
+class TestChunkedStagingLoad:
+    DEFINITION = "CREATE TABLE st_dummy (dummy_attr INTEGER);"
+
+    def test_generated_records_should_be_loaded_one_chunk_at_a_time(self, db: Db):
+        # Arrange
+        rows_loaded_when_extracting = []
+        n_records = 5
+
+        def extract(_):
+            for value in range(n_records):
+                rows_loaded_when_extracting.append(db.count_rows("st_dummy"))
+                yield DUMMY_RECORD(value)
+
+        table = StagingTable("st_dummy", self.DEFINITION, extract)
+
+        # Act
+        DbUpdater(db, {"st_dummy": table}, chunk_size=2).update_all_tables()
+
+        # Assert
+        assert rows_loaded_when_extracting == [0, 0, 2, 2, 4]
+        assert db.count_rows("st_dummy") == n_records
+
+    def test_only_incompatible_chunk_should_be_saved_to_csv(
+        self, db: Db, recovery_dir
+    ):
+        # Arrange
+        other_record = namedtuple("Other", ["other_attr"])
+        extracted = []
+
+        def extract(_):
+            records = [DUMMY_RECORD(1), DUMMY_RECORD(2), other_record(3)]
+            records += [DUMMY_RECORD(4), DUMMY_RECORD(5)]
+            for record in records:
+                extracted.append(record)
+                yield record
+
+        table = StagingTable("st_dummy", self.DEFINITION, extract)
+
+        # Act
+        with pytest.raises(TableUpdateError):
+            DbUpdater(db, {"st_dummy": table}, chunk_size=2).update_all_tables()
+
+        # Assert
+        assert db.get_all_rows("st_dummy") == [(1,), (2,)]
+        recovery = (recovery_dir / "recovery_st_dummy.csv").read_text().splitlines()
+        assert recovery == ["other_attr", "3", "4"]
+        assert DUMMY_RECORD(5) not in extracted
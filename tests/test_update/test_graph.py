@@ -0,0 +1,70 @@
+import pytest
+
+from serie_a_db.db.graph import SchemaGraph
+from serie_a_db.db.schema import TABLES
+from serie_a_db.db.table import WarehouseTable
+from serie_a_db.exceptions import CyclicDependencyError
+
+
+def make_table(name: str, *sources: str) -> WarehouseTable:
+    select = " UNION ALL ".join(f"SELECT * FROM {source}" for source in sources)
+    return WarehouseTable(
+        name,
+        f"CREATE TABLE IF NOT EXISTS {name} (dummy_attr INTEGER);",
+        f"INSERT INTO {name} {select or 'SELECT 1'};",
+    )
+
+
+@pytest.fixture(name="graph")
+def diamond_graph() -> SchemaGraph:
+    """Graph where dm_top depends on dm_left and dm_right, both on dm_base."""
+    return SchemaGraph(
+        {
+            "dm_top": make_table("dm_top", "dm_left", "dm_right"),
+            "dm_left": make_table("dm_left", "dm_base"),
+            "dm_right": make_table("dm_right", "dm_base"),
+            "dm_base": make_table("dm_base"),
+            "dm_alone": make_table("dm_alone"),
+        }
+    )
+
+
+def test_topological_order_follows_dependencies_then_schema_order(graph):
+    assert graph.topological_order == (
+        "dm_base",
+        "dm_alone",
+        "dm_left",
+        "dm_right",
+        "dm_top",
+    )
+
+
+def test_direct_dependencies_and_dependents(graph):
+    assert graph.dependencies("dm_top") == {"dm_left", "dm_right"}
+    assert graph.dependents("dm_base") == {"dm_left", "dm_right"}
+
+
+def test_upstream_closure_includes_indirect_dependencies(graph):
+    assert graph.upstream(["dm_top"]) == {"dm_left", "dm_right", "dm_base"}
+    assert graph.upstream(["dm_base", "dm_alone"]) == set()
+
+
+def test_downstream_closure_includes_indirect_dependents(graph):
+    assert graph.downstream(["dm_base"]) == {"dm_left", "dm_right", "dm_top"}
+    assert graph.downstream(["dm_top"]) == set()
+
+
+def test_cycles_are_detected_when_building_the_graph():
+    schema = {
+        "dm_first": make_table("dm_first", "dm_second"),
+        "dm_second": make_table("dm_second", "dm_first"),
+        "dm_alone": make_table("dm_alone"),
+    }
+    with pytest.raises(CyclicDependencyError, match="dm_first"):
+        SchemaGraph(schema)
+
+
+def test_graph_of_the_actual_schema_can_be_built():
+    graph = SchemaGraph(TABLES)
+
+    assert set(graph.topological_order) == set(TABLES)
@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+import pytest
+
+from serie_a_db.db.client import Db
+from serie_a_db.db.table import StagingTable, WarehouseTable
+
+RECORD = namedtuple("Record", ["dummy_id", "dummy_value"])
+
+STAGING_DEFINITION = """CREATE TABLE st_dummy (
+    dummy_id INT NOT NULL,
+    dummy_value INT NOT NULL,
+    PRIMARY KEY (dummy_id)
+);"""
+
+
+@pytest.fixture(name="warehouse")
+def incremental_warehouse_table() -> WarehouseTable:
+    return WarehouseTable(
+        "ft_dummy",
+        """CREATE TABLE IF NOT EXISTS ft_dummy (
+            dummy_id INT PRIMARY KEY,
+            dummy_value INT NOT NULL
+        );""",
+        """INSERT INTO ft_dummy SELECT dummy_id, dummy_value FROM st_dummy
+        WHERE TRUE ON CONFLICT (dummy_id) DO UPDATE
+        SET dummy_value = EXCLUDED.dummy_value;""",
+        incremental_sources=["st_dummy"],
+    )
+
+
+def load_staging(db: Db, records: list) -> None:
+    StagingTable("st_dummy", STAGING_DEFINITION, lambda _: records).update(db)
+
+
+def tamper_with_warehouse(db: Db) -> None:
+    """Change the warehouse so that rows processed again are detectable."""
+    db.execute("UPDATE ft_dummy SET dummy_value = -1")
+
+
+def test_only_new_and_replaced_rows_should_be_processed(db: Db, warehouse):
+    # Arrange
+    load_staging(db, [RECORD(1, 10), RECORD(2, 20)])
+    warehouse.update(db)
+    tamper_with_warehouse(db)
+
+    # Act
+    load_staging(db, [RECORD(2, 21), RECORD(3, 30)])
+    warehouse.update(db)
+
+    # Assert
+    assert db.get_all_rows("ft_dummy") == [(1, -1), (2, 21), (3, 30)]
+
+
+def test_full_rebuild_should_process_all_rows(db: Db, warehouse):
+    # Arrange
+    load_staging(db, [RECORD(1, 10), RECORD(2, 20)])
+    warehouse.update(db)
+    tamper_with_warehouse(db)
+
+    # Act
+    warehouse.update(db, full_rebuild=True)
+
+    # Assert
+    assert db.get_all_rows("ft_dummy") == [(1, 10), (2, 20)]
+
+
+def test_recreated_staging_table_should_trigger_a_full_rebuild(db: Db, warehouse):
+    # Arrange
+    load_staging(db, [RECORD(1, 10), RECORD(2, 20)])
+    warehouse.update(db)
+    tamper_with_warehouse(db)
+    db.execute("DROP TABLE st_dummy")
+
+    # Act
+    load_staging(db, [RECORD(1, 11)])
+    warehouse.update(db)
+
+    # Assert
+    assert db.get_all_rows("ft_dummy") == [(1, 11), (2, -1)]
+
+
+def test_changed_parameters_should_trigger_a_full_rebuild(db: Db, warehouse):
+    # Arrange
+    load_staging(db, [RECORD(1, 10)])
+    warehouse.update(db)
+    tamper_with_warehouse(db)
+
+    # Act
+    db.execute("UPDATE dm_parameter SET value = 4 WHERE key = 'bonus_goal'")
+    warehouse.update(db)
+
+    # Assert
+    assert db.get_all_rows("ft_dummy") == [(1, 10)]
+
+
+def test_source_views_should_not_outlive_the_update(db: Db, warehouse):
+    # Arrange
+    load_staging(db, [RECORD(1, 10)])
+    warehouse.update(db)
+
+    # Act
+    load_staging(db, [RECORD(2, 20)])
+    warehouse.update(db)
+
+    # Assert
+    assert db.count_rows("st_dummy") == 2  # noqa: PLR2004
@@ -0,0 +1,97 @@
+from serie_a_db.data_extraction.clients.fantacalcio_punto_it_website import (
+    FantacalcioPuntoItWebsite,
+)
+from serie_a_db.data_extraction.clients.page_archive import PageArchive
+from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player import (
+    parse_players_page,
+    reparse_player_data,
+    scrape_player_data,
+)
+from serie_a_db.data_extraction.table_specific_extractors.st_fpi_player_match import (
+    parse_match_day_page,
+    reparse_player_match_data,
+    scrape_player_match_data,
+)
+from serie_a_db.db.client import Db
+from serie_a_db.db.reparse import reparse_from_archive
+from serie_a_db.db.table import StagingTable
+from serie_a_db.db.update import DbUpdater
+from tests.conftest import DEFAULT_FROZEN_TIME
+from tests.test_data_extraction import EXTRACTION_TEST_DATA_DIR
+
+GRADES_PAGE_URL = FantacalcioPuntoItWebsite.ROOT + "/voti-fantacalcio-serie-a/2023-24/1"
+PLAYERS_PAGE_URL = FantacalcioPuntoItWebsite.ROOT + "/quotazioni-fantacalcio/2023-24"
+
+
+def test_archived_pages_should_replace_the_rows_of_their_match_day(db: Db, tmp_path):
+    # Arrange
+    table = StagingTable.from_file("st_fpi_player_match", scrape_player_match_data)
+    table.prepare(db)
+    page = EXTRACTION_TEST_DATA_DIR / "fpi/player_match_one_player.html"
+    (player_match,) = parse_match_day_page(page.read_text(), "S23M01")
+    table.load(
+        db,
+        [
+            player_match._replace(team_name="Wrong team"),
+            player_match._replace(match_day_id="S23M02", code_fpi=1),
+        ],
+    )
+    archive = PageArchive(tmp_path)
+    archive.store(GRADES_PAGE_URL, page.read_bytes(), encoding="utf-8")
+
+    # Act
+    reparse_from_archive(
+        db,
+        {table.name: table},
+        {table.name: reparse_player_match_data},
+        archive,
+    )
+
+    # Assert
+    rows = db.select(
+        "SELECT match_day_id, team_name, code_fpi FROM st_fpi_player_match "
+        "ORDER BY match_day_id"
+    )
+    assert rows == [("S23M01", "Atalanta", 2792), ("S23M02", "Atalanta", 1)]
+    archive.close()
+
+
+def test_archived_pages_should_keep_the_snapshots_taken_before_them(
+    db: Db, tmp_path, freeze_time
+):
+    # Arrange
+    table = StagingTable.from_file("st_fpi_player", scrape_player_data)
+    table.prepare(db)
+    page = EXTRACTION_TEST_DATA_DIR / "fpi/player_one_player.html"
+    fetched_at = DEFAULT_FROZEN_TIME.isoformat(sep=" ", timespec="milliseconds")
+    before_archive = "2023-09-01 10:00:00.000"
+    since_archive = "2024-01-01 12:00:00.250"
+    for load_ts in (before_archive, since_archive):
+        table.load(db, parse_players_page(page.read_text(), "S23", load_ts=load_ts))
+    archive = PageArchive(tmp_path)
+    archive.store(PLAYERS_PAGE_URL, page.read_bytes(), encoding="utf-8")
+
+    # Act
+    reparse_from_archive(
+        db, {table.name: table}, {table.name: reparse_player_data}, archive
+    )
+
+    # Assert
+    rows = db.select("SELECT load_ts FROM st_fpi_player ORDER BY load_ts")
+    assert rows == [(before_archive,), (fetched_at,)]
+    archive.close()
+
+
+def test_staging_tables_should_not_extract_if_not_requested(db: Db):
+    # Arrange
+    def extract(_):
+        raise AssertionError("Should not extract")
+
+    table = StagingTable.from_file("st_fpi_player_match", extract)
+    updater = DbUpdater(db, {table.name: table}, extract=False)
+
+    # Act
+    updater.update_all_tables()
+
+    # Assert
+    assert db.count_rows(table.name) == 0
@@ -0,0 +1,101 @@
+from collections import namedtuple
+
+from serie_a_db.db.client import Db
+from serie_a_db.db.run_context import ConnectionPool, RunContext
+from serie_a_db.db.table import StagingTable, WarehouseTable
+from serie_a_db.db.update import DbUpdater
+
+DUMMY_RECORD = namedtuple("Dummy", ["dummy_attr"])
+
+
+class CountingQuery:
+    def __init__(self, result) -> None:
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, _: Db):
+        self.calls += 1
+        return self.result
+
+
+def test_lookup_should_be_queried_once(run_context: RunContext):
+    # Arrange
+    query = CountingQuery(5)
+
+    # Act
+    results = [run_context.lookup("dummy", {"dm_dummy"}, query) for _ in range(3)]
+
+    # Assert
+    assert results == [5, 5, 5]
+    assert query.calls == 1
+
+
+def test_only_lookups_reading_changed_tables_should_be_invalidated(
+    run_context: RunContext,
+):
+    # Arrange
+    changed, unchanged = CountingQuery(1), CountingQuery(2)
+    run_context.lookup("changed", {"dm_changed", "dm_other"}, changed)
+    run_context.lookup("unchanged", {"dm_other"}, unchanged)
+
+    # Act
+    run_context.invalidate({"dm_changed"})
+    run_context.lookup("changed", {"dm_changed", "dm_other"}, changed)
+    run_context.lookup("unchanged", {"dm_other"}, unchanged)
+
+    # Assert
+    assert (changed.calls, unchanged.calls) == (2, 1)
+
+
+def test_pooled_connection_should_see_later_commits(tmp_path):
+    # Arrange
+    db = Db(tmp_path / "db.sqlite")
+    db.execute("CREATE TABLE dm_dummy (dummy_attr INTEGER)")
+    db.commit()
+    pool = ConnectionPool.for_db(db)
+    with pool.connection() as pooled:
+        rows_before = pooled.count_rows("dm_dummy")
+
+    # Act
+    db.execute("INSERT INTO dm_dummy VALUES (1)")
+    db.commit()
+    with pool.connection() as pooled:
+        rows_after = pooled.count_rows("dm_dummy")
+
+    # Assert
+    assert (rows_before, rows_after) == (0, 1)
+    pool.close()
+    db.close_connection()
+
+
+def test_extractors_should_see_lookups_refreshed_by_upstream_updates(db: Db):
+    # Arrange
+    def extract_base_count(run_context: RunContext) -> list:
+        count = run_context.lookup(
+            "base_count", {"dm_base"}, lambda db: db.count_rows("dm_base")
+        )
+        return [DUMMY_RECORD(count)]
+
+    schema = {
+        "dm_base": WarehouseTable(
+            "dm_base",
+            "CREATE TABLE IF NOT EXISTS dm_base (dummy_attr INTEGER);",
+            "INSERT INTO dm_base VALUES (1), (2);",
+        ),
+        "st_dummy": StagingTable(
+            "st_dummy",
+            "CREATE TABLE st_dummy (dummy_attr INTEGER);",
+            extract_base_count,
+            upstream_tables={"dm_base"},
+        ),
+    }
+    db.execute("CREATE TABLE dm_base (dummy_attr INTEGER);")
+    builder = DbUpdater(db, schema)
+    builder.run_context = RunContext(ConnectionPool.lending(db))
+    builder.run_context.lookup("base_count", {"dm_base"}, lambda _: 0)
+
+    # Act
+    builder.update_all_tables()
+
+    # Assert
+    assert db.get_all_rows("st_dummy") == [(2,)]
@@ -30,7 +30,7 @@ def test_dm_season_update(db: Db):
     ]
     test_schema = {
         "dm_season": Wt.from_file("dm_season"),
-        "st_match_day": St.from_file("st_match_day", lambda: match_day_data),
+        "st_match_day": St.from_file("st_match_day", lambda _: match_day_data),
     }
 
     # Act
@@ -73,7 +73,7 @@ def test_dm_match_day_update(db: Db):
     ]
     test_schema = {
         "dm_season": Wt.from_file("dm_season"),
-        "st_match_day": St.from_file("st_match_day", lambda: match_day_data),
+        "st_match_day": St.from_file("st_match_day", lambda _: match_day_data),
         "dm_match_day": Wt.from_file("dm_match_day"),
     }
 
@@ -104,7 +104,7 @@ def test_dm_team_update(db: Db):
     ]
     test_schema = {
         "dm_team": Wt.from_file("dm_team"),
-        "st_match": St.from_file("st_match", lambda: match_data),
+        "st_match": St.from_file("st_match", lambda _: match_data),
     }
 
     # Act
@@ -145,7 +145,7 @@ def test_dm_coach_update(db: Db):
 
     test_schema = {
         "dm_coach": Wt.from_file("dm_coach"),
-        "st_match": St.from_file("st_match", lambda: [match1, match1, match2]),
+        "st_match": St.from_file("st_match", lambda _: [match1, match1, match2]),
     }
 
     # Act
@@ -201,8 +201,8 @@ def test_ft_match_update(db: Db):
         "dm_match_day": Wt.from_file("dm_match_day"),
         "dm_team": Wt.from_file("dm_team"),
         "dm_coach": Wt.from_file("dm_coach"),
-        "st_match_day": St.from_file("st_match_day", lambda: match_day_data),
-        "st_match": St.from_file("st_match", lambda: match_data),
+        "st_match_day": St.from_file("st_match_day", lambda _: match_day_data),
+        "st_match": St.from_file("st_match", lambda _: match_data),
     }
 
     # Act
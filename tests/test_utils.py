@@ -2,7 +2,7 @@
 
 import pytest
 
-from serie_a_db.utils import strip_whitespaces_and_newlines
+from serie_a_db.utils import chunked, strip_whitespaces_and_newlines
 
 
 def strings_equivalent(str1: str, str2: str) -> bool:
@@ -23,3 +23,15 @@ def strings_equivalent(str1: str, str2: str) -> bool:
 )
 def test_strings_equivalent(string1, string2):
     assert strings_equivalent(string1, string2)
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        (2, [[0, 1], [2, 3], [4]]),
+        (5, [[0, 1, 2, 3, 4]]),
+        (10, [[0, 1, 2, 3, 4]]),
+    ],
+)
+def test_iterable_should_be_split_into_chunks(size, expected):
+    assert list(chunked(iter(range(5)), size)) == expected